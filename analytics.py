@@ -0,0 +1,231 @@
+"""
+Derived price metrics for the Byadgi dashboard.
+
+Everything works on the weekly price matrix at once (rows = weeks, columns =
+variety/grade), so the cost of a metric does not grow with a Python loop per
+variety. Metrics that describe the market (month-on-month change, rolling
+averages, min/max, volatility) only use prices that were actually quoted:
+interpolated cells are masked to NaN first, and NaN propagates through the
+arithmetic instead of being special-cased.
+"""
+
+import numpy as np
+
+ROLLING_WINDOWS = (4, 8, 13)  # weeks
+WEEKS_PER_MONTH = 4
+DOWNSAMPLE_POINTS = 200  # longer histories are LTTB-reduced to this many points
+TOP_MOVERS = 5  # risers / fallers listed in the movers block
+
+
+def pct_change(values, periods=1):
+    """Percent change against the row `periods` weeks earlier; NaN where either side is missing"""
+    out = np.full(values.shape, np.nan)
+    if len(values) > periods:
+        prev = values[:-periods]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[periods:] = (values[periods:] - prev) / prev * 100
+        out[periods:][prev == 0] = np.nan
+    return out
+
+
+def rolling_mean(values, window):
+    """Mean of the non-NaN prices in the trailing `window` rows; NaN where the window is empty"""
+    present = ~np.isnan(values)
+    sums = np.cumsum(np.where(present, values, 0.0), axis=0)
+    counts = np.cumsum(present, axis=0)
+    sums[window:] = sums[window:] - sums[:-window].copy()
+    counts[window:] = counts[window:] - counts[:-window].copy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def column_stats(values, dates):
+    """{min, max, min_date, max_date, volatility} arrays per column.
+
+    volatility is the standard deviation of week-on-week % changes between
+    consecutive quoted weeks. Columns with no quotes get NaN / None.
+    """
+    quoted = ~np.isnan(values).all(axis=0)
+    filled_hi = np.where(np.isnan(values), -np.inf, values)
+    filled_lo = np.where(np.isnan(values), np.inf, values)
+    hi_idx = filled_hi.argmax(axis=0)
+    lo_idx = filled_lo.argmin(axis=0)
+    cols = np.arange(values.shape[1])
+
+    changes = pct_change(values)
+    volatility = np.full(values.shape[1], np.nan)
+    enough = (~np.isnan(changes)).sum(axis=0) >= 2
+    if enough.any():
+        volatility[enough] = np.nanstd(changes[:, enough], axis=0, ddof=1)
+
+    return {
+        'min': np.where(quoted, filled_lo[lo_idx, cols], np.nan),
+        'max': np.where(quoted, filled_hi[hi_idx, cols], np.nan),
+        'min_date': [dates[i] if q else None for i, q in zip(lo_idx.tolist(), quoted.tolist())],
+        'max_date': [dates[i] if q else None for i, q in zip(hi_idx.tolist(), quoted.tolist())],
+        'volatility': volatility,
+    }
+
+
+def compute_metrics(values, interpolated, dates):
+    """All derived metrics for a weekly price matrix.
+
+    values is the filled float matrix (what the dashboard plots), interpolated
+    the boolean mask of filled-in cells, dates the row labels. Week-on-week
+    change follows the plotted line; the other metrics use quoted prices only.
+    """
+    actual = np.where(interpolated, np.nan, values)
+    metrics = {
+        'wow_change': np.round(pct_change(values), 2),
+        'mom_change': np.round(pct_change(actual, WEEKS_PER_MONTH), 2),
+        'rolling_avg': {str(w): np.round(rolling_mean(actual, w), 2) for w in ROLLING_WINDOWS},
+    }
+    metrics.update(column_stats(actual, dates))
+    return metrics
+
+
+def json_columns(matrix, labels):
+    """{label: [float or None, ...]} from a 2-D matrix, column by column"""
+    cells = matrix.T.astype(object)
+    cells[np.isnan(matrix.T)] = None
+    return dict(zip(labels, cells.tolist()))
+
+
+def json_values(values, labels):
+    """{label: float or None} from one value per column"""
+    return {label: None if np.isnan(v) else round(float(v), 2)
+            for label, v in zip(labels, np.asarray(values, dtype=float).tolist())}
+
+
+def _js_round(x):
+    """Math.round() semantics (halves round up), so precomputed numbers match what the page used to show"""
+    return int(np.floor(x + 0.5))
+
+
+def lttb(y, threshold=DOWNSAMPLE_POINTS):
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling of y (x = row index).
+
+    NaN rows are skipped; the first and last valid points are always kept.
+    """
+    rows = np.flatnonzero(~np.isnan(y))
+    n = len(rows)
+    if threshold >= n or threshold < 3:
+        return rows
+    x = rows.astype(float)
+    y = y[rows]
+    every = (n - 2) / (threshold - 2)
+    keep = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # twice the triangle area between the last kept point, each candidate and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep.append(a)
+    keep.append(n - 1)
+    return rows[keep]
+
+
+def dashboard_aggregates(values, metrics, labels, dates):
+    """Everything the dashboard used to recompute from full arrays on every redraw.
+
+    latest: the last week's prices, week-on-week changes, top and average price.
+    movers: the biggest week-on-week risers and fallers.
+    variety_stats: one block of headline numbers per variety.
+    downsampled: LTTB-reduced (index, price) series for histories longer than
+    DOWNSAMPLE_POINTS weeks; `length` says which dates array the indices refer to.
+    """
+    if not len(values):
+        return {'latest': {}, 'movers': {'up': [], 'down': []}, 'variety_stats': {}, 'downsampled': {}}
+    last = values[-1]
+    wow = metrics['wow_change'][-1]
+    mom = metrics['mom_change'][-1]
+    avg4 = metrics['rolling_avg'][str(ROLLING_WINDOWS[0])][-1]
+
+    # the page only counted truthy prices (not null, not zero)
+    quoted = ~np.isnan(last) & (last != 0)
+    top = int(np.argmax(np.where(quoted, last, -np.inf))) if quoted.any() else None
+    has_wow = ~np.isnan(wow)
+    latest = {
+        'date': dates[-1],
+        'prices': json_values(last, labels),
+        'wow': json_values(wow, labels),
+        'top': {'variety': labels[top], 'price': float(last[top])} if top is not None else None,
+        'avg_price': _js_round(last[quoted].mean()) if quoted.any() else 0,
+        'avg_wow': _js_round(wow[has_wow].mean()) if has_wow.any() else 0,
+        'count': int(quoted.sum()),
+    }
+
+    order = np.argsort(-np.where(has_wow, wow, 0.0), kind='stable')
+    up = [i for i in order[:TOP_MOVERS] if has_wow[i] and wow[i] > 0]
+    down = [i for i in order[::-1][:TOP_MOVERS] if has_wow[i] and wow[i] < 0]
+    movers = {
+        'up': [{'variety': labels[i], 'wow': float(wow[i])} for i in up],
+        'down': [{'variety': labels[i], 'wow': float(wow[i])} for i in down],
+    }
+
+    blocks = {
+        'latest': json_values(last, labels),
+        'wow': json_values(wow, labels),
+        'mom': json_values(mom, labels),
+        'avg_4w': json_values(avg4, labels),
+        'min': json_values(metrics['min'], labels),
+        'max': json_values(metrics['max'], labels),
+        'volatility': json_values(metrics['volatility'], labels),
+    }
+    variety_stats = {}
+    for j, label in enumerate(labels):
+        block = {name: col[label] for name, col in blocks.items()}
+        block['min_date'] = metrics['min_date'][j]
+        block['max_date'] = metrics['max_date'][j]
+        variety_stats[label] = block
+
+    downsampled = {}
+    if len(values) > DOWNSAMPLE_POINTS:
+        series = {}
+        for j, label in enumerate(labels):
+            idx = lttb(values[:, j], DOWNSAMPLE_POINTS)
+            series[label] = {'idx': idx.tolist(), 'y': values[idx, j].tolist()}
+        downsampled = {'length': len(values), 'points': DOWNSAMPLE_POINTS, 'series': series}
+
+    return {'latest': latest, 'movers': movers, 'variety_stats': variety_stats, 'downsampled': downsampled}
+
+
+def arrivals_index(values, sections, bags):
+    """Arrivals-weighted market price index.
+
+    values is the weekly price matrix, sections the section name of each
+    column ("AC", "New Crop") and bags {section: weekly arrivals, NaN where
+    unknown}. Each week a section's price is the mean of its quoted columns;
+    the market index is those section prices weighted by the week's arrivals.
+    A section only carries weight in weeks where it has both a price and an
+    arrivals count.
+
+    Returns {'index': (weeks,), 'section_avg': {section: (weeks,)},
+    'weighted_avg': {section: float}} where weighted_avg is the section's
+    price averaged across all weeks with arrivals as weights.
+    """
+    names = list(bags)
+    if not names:
+        return {'index': np.full(len(values), np.nan), 'section_avg': {}, 'weighted_avg': {}}
+    sections = np.asarray(sections, dtype=object)
+    member = np.stack([sections == s for s in names], axis=1).astype(float)  # columns x sections
+    quoted = ~np.isnan(values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        section_avg = (np.where(quoted, values, 0.0) @ member) / (quoted.astype(float) @ member)
+    volume = np.column_stack([np.asarray(bags[s], dtype=float) for s in names])
+    weights = np.where(np.isnan(section_avg) | np.isnan(volume), 0.0, volume)
+    weighted = np.where(weights > 0, section_avg, 0.0) * weights
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        index = np.where(weights.sum(axis=1) > 0, weighted.sum(axis=1) / weights.sum(axis=1), np.nan)
+        across = np.where(weights.sum(axis=0) > 0, weighted.sum(axis=0) / weights.sum(axis=0), np.nan)
+    return {
+        'index': np.round(index, 2),
+        'section_avg': {s: np.round(section_avg[:, i], 2) for i, s in enumerate(names)},
+        'weighted_avg': dict(zip(names, np.round(across, 2))),
+    }
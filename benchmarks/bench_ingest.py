@@ -0,0 +1,91 @@
+"""
+End-to-end ingest benchmark on synthetic rate cards with known prices.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_ingest [--sizes 10 100 1000] [--workers N] [--keep DIR]
+                                      [--noise 6] [--blur 0.5] [--quality 75] [--duplicates 0.2]
+                                      [--text-lines] [--no-dedup]
+
+For every size a folder of cards is rendered (see benchmarks/ratecards.py)
+and run through byadgi_trends.process_folder with the OCR cache and ingest
+manifest off, so every image is really OCR'd. Reports images/sec, OCR passes
+(more than one per image when an image escalates to a slower OCR tier), the
+mean and worst latency of every pipeline stage, and recall / precision of the
+extracted prices (an item counts only with the right date, label and price).
+--duplicates adds forwarded, re-encoded copies of that share of the cards,
+so the OCR calls saved by near-duplicate detection show up in the counts.
+--keep DIR keeps the rendered cards and their ground_truth.json for reuse.
+"""
+
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+import byadgi_trends as bt
+import instrumentation
+from benchmarks.ratecards import load_font, load_ground_truth, score, write_cards
+
+
+def run_size(folder, workers):
+    """Ingest one card folder; returns (images, OCR'd images, seconds, score dict, stage summary)"""
+    truth = load_ground_truth(folder)
+    expected = {t['date']: t['prices'] for t in truth.values()}
+    instrumentation.reset()
+    start = time.perf_counter()
+    store = bt.process_folder(folder, workers, cache=None, manifest=None)
+    elapsed = time.perf_counter() - start
+    extracted = {d.isoformat(): prices for d, prices in store.to_records().items()}
+    ocr_images = len({r['image'] for r in instrumentation.records() if r['stage'] == 'ocr'})
+    return len(truth), ocr_images, elapsed, score(expected, extracted), instrumentation.summary()['stages']
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000])
+    ap.add_argument('--workers', type=int, default=1)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--noise', type=float, default=6.0, help='std of Gaussian pixel noise (0 = off)')
+    ap.add_argument('--blur', type=float, default=0.5, help='Gaussian blur radius (0 = off)')
+    ap.add_argument('--quality', type=int, default=75, help='JPEG quality (0 = save PNG)')
+    ap.add_argument('--duplicates', type=float, default=0.0, help='share of cards with forwarded copies')
+    ap.add_argument('--font', help='TrueType font for the cards')
+    ap.add_argument('--text-lines', action='store_true', help='parse plain text lines instead of word boxes')
+    ap.add_argument('--no-dedup', action='store_true', help='OCR near-duplicate images too')
+    ap.add_argument('--keep', help='render into (and reuse) DIR/<size> instead of a temporary folder')
+    args = ap.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    bt.OCR_WORD_BOXES = not args.text_lines
+    bt.DEDUP_IMAGES = not args.no_dedup
+
+    try:
+        bt.ocr_engine()
+    except Exception as e:
+        raise SystemExit(f"No OCR engine available: {e}")
+
+    font = load_font(24, args.font)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            folder = os.path.join(args.keep or tmp, str(size))
+            if not os.path.exists(os.path.join(folder, 'ground_truth.json')):
+                t0 = time.perf_counter()
+                write_cards(folder, size, args.seed, noise=args.noise, blur=args.blur,
+                            quality=args.quality, font=font, dup_rate=args.duplicates)
+                print(f"rendered {size} cards in {time.perf_counter() - t0:.1f}s")
+
+            images, ocr_images, elapsed, result, stages = run_size(folder, args.workers)
+            passes = stages.get('ocr', {}).get('count', 0)
+            print(f"\n{images} images ({size} cards), {args.workers} worker(s): {elapsed:.2f}s, "
+                  f"{images / elapsed:.2f} img/s")
+            print(f"  {ocr_images} images OCR'd ({images - ocr_images} skipped), {passes} OCR passes")
+            print(f"  recall {result['recall']:.3f}  precision {result['precision']:.3f}  "
+                  f"({result['correct']} correct of {result['expected']} expected, {result['extracted']} extracted)")
+            print(f"  {'stage':<20} {'calls':>6} {'mean ms':>9} {'max ms':>9} {'total s':>9}")
+            for name, s in stages.items():
+                print(f"  {name:<20} {s['count']:>6} {s['wall_s'] / s['count'] * 1000:>9.1f} "
+                      f"{s['wall_max_s'] * 1000:>9.1f} {s['wall_s']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Micro-benchmark: precompiled LineMatcher vs the old per-pattern regex loops.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_line_matcher [CORPUS_DIR] [--lines N] [--repeat R]
+
+CORPUS_DIR is a folder of OCR .txt files or the OCR cache folder; without it
+the cache at byadgi_trends.OCR_CACHE_DIR (or a built-in sample) is used.
+"""
+
+import re
+import argparse
+import timeit
+
+import byadgi_trends as bt
+from benchmarks.corpus import load_ocr_corpus, corpus_lines
+
+
+def legacy_classify(line):
+    """The pre-LineMatcher logic: one re.search per pattern per line"""
+    for pattern in bt.IGNORE_PATTERNS:
+        if re.search(pattern, line, re.IGNORECASE):
+            return True, None, None
+    low = line.lower()
+    variety = None
+    for pattern, canonical in bt.VARIETY_PATTERNS:
+        if re.search(pattern, low):
+            variety = canonical
+            break
+    m = re.search(bt.GRADE_PATTERN, low, re.IGNORECASE)
+    return False, variety, m.group(0).strip() if m else None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('corpus', nargs='?', default=bt.OCR_CACHE_DIR)
+    ap.add_argument('--lines', type=int, default=100_000, help='scale the corpus up to this many lines')
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    lines = corpus_lines(load_ocr_corpus(args.corpus), args.lines)
+    print(f"Corpus: {len(lines)} lines")
+
+    # Results must match exactly before timings mean anything
+    for line in set(lines):
+        assert bt.LINE_MATCHER.classify(line) == legacy_classify(line), line
+
+    cases = [
+        ('classify  per-pattern loop', lambda: [legacy_classify(ln) for ln in lines]),
+        ('classify  LineMatcher     ', lambda: [bt.LINE_MATCHER.classify(ln) for ln in lines]),
+    ]
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name}  {best * 1000:8.1f} ms  {len(lines) / best:12,.0f} lines/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare OCR backends: one tesseract subprocess per call vs a persistent engine.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_ocr_backend IMAGE_DIR [--backends pytesseract tesserocr] [--limit N]
+
+Every image is preprocessed once with the configured profile; each backend
+then OCRs the same binarized images. Reports first-call latency (process
+spawn / model load), steady-state ms per image, and whether the text matches
+the first backend's output.
+"""
+
+import os
+import time
+import logging
+import argparse
+
+from PIL import Image
+
+import byadgi_trends as bt
+from ocr_backend import BACKENDS, create_backend
+from preprocess import preprocess
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('image_dir')
+    ap.add_argument('--backends', nargs='+', default=list(reversed(BACKENDS)), choices=list(BACKENDS))
+    ap.add_argument('--limit', type=int, default=50)
+    args = ap.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    paths = sorted(os.path.join(args.image_dir, f) for f in os.listdir(args.image_dir)
+                   if f.lower().endswith(('.png', '.jpg', '.jpeg')))[:args.limit]
+    if not paths:
+        raise SystemExit(f"No images in {args.image_dir}")
+    images = [preprocess(Image.open(p), bt.PREPROCESS_PROFILE, **bt.PREPROCESS_OPTIONS) for p in paths]
+    print(f"{len(images)} images, config {bt.OCR_CONFIG!r}")
+
+    reference = None
+    print(f"{'backend':<12} {'first ms':>9} {'ms/img':>8} {'img/s':>7} {'same text':>10}")
+    for name in args.backends:
+        try:
+            t0 = time.perf_counter()
+            engine = create_backend(name, bt.OCR_LANG, bt.TESSERACT_CMD)
+            texts = [engine.image_to_string(images[0], bt.OCR_CONFIG)]
+            first = time.perf_counter() - t0
+        except Exception as e:
+            print(f"{name:<12} unavailable: {e}")
+            continue
+        t1 = time.perf_counter()
+        texts += engine.images_to_strings(images[1:], bt.OCR_CONFIG)
+        rest = time.perf_counter() - t1
+        engine.close()
+
+        per_img = rest / max(1, len(images) - 1)
+        same = '-' if reference is None else f"{sum(a.strip() == b.strip() for a, b in zip(reference, texts))}/{len(texts)}"
+        reference = reference or texts
+        print(f"{name:<12} {first * 1000:>9.0f} {per_img * 1000:>8.1f} "
+              f"{1 / per_img if per_img else 0:>7.1f} {same:>10}")
+
+
+if __name__ == '__main__':
+    main()
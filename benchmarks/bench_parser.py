@@ -0,0 +1,144 @@
+"""
+Replay stored OCR text through the parser: throughput, allocations and a golden diff.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_parser [CORPUS_DIR] [--synthetic N] [--lines N]
+                                      [--golden FILE] [--update-golden] [--profile]
+
+The corpus is the saved OCR output in CORPUS_DIR (a .txt folder or the OCR
+cache, default byadgi_trends.OCR_CACHE_DIR) plus N seeded synthetic cards.
+Every text goes through byadgi_trends.parse_text, the pure text -> (date,
+prices) step, so no Tesseract is needed. The corpus is repeated up to
+--lines lines for the timing; the allocation pass (tracemalloc) and the
+golden diff run over each distinct text once.
+
+The golden file maps a hash of each OCR text to the date and prices it
+parsed to. Texts missing from it are reported as new; any other difference
+is printed and makes the run exit with status 1. --update-golden rewrites it.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tracemalloc
+
+import byadgi_trends as bt
+from benchmarks.corpus import load_ocr_corpus, synthetic_texts
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_golden.json')
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def parse_all(texts):
+    return [bt.parse_text(t) for t in texts]
+
+
+def measure_allocations(texts, top=5):
+    """Peak traced memory of one pass, memory still held by its results and the top allocation sites"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = parse_all(texts)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'lineno')
+    held = sum(s.size_diff for s in stats)
+    blocks = sum(s.count_diff for s in stats)
+    del results
+    return peak, held, blocks, stats[:top]
+
+
+def golden_entries(texts):
+    entries = {}
+    for text in texts:
+        date, prices = bt.parse_text(text)
+        entries[text_key(text)] = {'date': date.isoformat() if date else None, 'prices': prices}
+    return entries
+
+
+def diff_golden(golden, current, limit=20):
+    """Lines describing every difference; returns (lines, number of new texts)"""
+    out = []
+    new = 0
+    for key, entry in current.items():
+        old = golden.get(key)
+        if old is None:
+            new += 1
+            continue
+        if old['date'] != entry['date']:
+            out.append(f"{key}: date {old['date']} -> {entry['date']}")
+        for label in sorted(set(old['prices']) | set(entry['prices'])):
+            a, b = old['prices'].get(label), entry['prices'].get(label)
+            if a != b:
+                out.append(f"{key}: {label}: {a} -> {b}")
+    if len(out) > limit:
+        out = out[:limit] + [f"... and {len(out) - limit} more"]
+    return out, new
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('corpus', nargs='?', default=bt.OCR_CACHE_DIR)
+    ap.add_argument('--synthetic', type=int, default=100, help='seeded synthetic cards added to the corpus')
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--lines', type=int, default=1_000_000, help='repeat the corpus up to this many lines')
+    ap.add_argument('--golden', default=GOLDEN_FILE)
+    ap.add_argument('--update-golden', action='store_true')
+    ap.add_argument('--profile', action='store_true', help='print the top functions of a cProfile pass')
+    args = ap.parse_args()
+
+    texts = list(dict.fromkeys(load_ocr_corpus(args.corpus) + synthetic_texts(args.synthetic, args.seed)))
+    per_text = [sum(1 for ln in t.splitlines() if ln.strip()) for t in texts]
+    base_lines = sum(per_text)
+    repeats = max(1, -(-args.lines // base_lines))
+    replay = texts * repeats
+    print(f"Corpus: {len(texts)} texts, {base_lines} lines; replaying {len(replay)} texts, "
+          f"{base_lines * repeats:,} lines")
+
+    start = time.perf_counter()
+    parse_all(replay)
+    elapsed = time.perf_counter() - start
+    print(f"parse_text  {elapsed:8.2f} s  {base_lines * repeats / elapsed:12,.0f} lines/s  "
+          f"{len(replay) / elapsed:10,.0f} texts/s")
+
+    peak, held, blocks, top = measure_allocations(texts)
+    print(f"allocations over {len(texts)} texts: peak {peak / 1024:.0f} KiB, "
+          f"results hold {held / 1024:.0f} KiB in {blocks:,} blocks "
+          f"({held / base_lines:.0f} B/line)")
+    for stat in top:
+        print(f"  {stat}")
+
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.runcall(parse_all, texts)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+
+    current = golden_entries(texts)
+    if args.update_golden:
+        with open(args.golden, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=0, sort_keys=True)
+        print(f"Golden file written: {args.golden} ({len(current)} texts)")
+        return 0
+    if not os.path.exists(args.golden):
+        print(f"No golden file at {args.golden}; create it with --update-golden")
+        return 0
+    with open(args.golden, encoding='utf-8') as f:
+        golden = json.load(f)
+    changes, new = diff_golden(golden, current)
+    print(f"Golden diff: {len(current) - new} texts compared, {new} new, "
+          f"{'no changes' if not changes else 'CHANGED'}")
+    for line in changes:
+        print(f"  {line}")
+    return 1 if changes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Compare preprocessing profiles for speed and OCR item yield on the same images.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_preprocess IMAGE_DIR [--profiles fixed otsu local_mean] [--no-ocr]
+
+For every profile this reports preprocessing time per image and, unless
+--no-ocr is given, Tesseract time and the number of price items that
+parse_ocr_text extracts (more is better, as long as the prices are right).
+"""
+
+import os
+import time
+import logging
+import argparse
+
+import pytesseract
+from PIL import Image
+
+import byadgi_trends as bt
+from preprocess import PROFILES, preprocess
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('image_dir')
+    ap.add_argument('--profiles', nargs='+', default=sorted(PROFILES), choices=sorted(PROFILES))
+    ap.add_argument('--no-ocr', action='store_true', help='only time preprocessing')
+    args = ap.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    paths = sorted(os.path.join(args.image_dir, f) for f in os.listdir(args.image_dir)
+                   if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+    if not paths:
+        raise SystemExit(f"No images in {args.image_dir}")
+    images = []
+    for p in paths:
+        img = Image.open(p)
+        img.load()
+        images.append((p, img))
+
+    print(f"{len(images)} images")
+    print(f"{'profile':<12} {'prep ms/img':>12} {'ocr ms/img':>11} {'items':>7}")
+    for profile in args.profiles:
+        prep = ocr_time = 0.0
+        items = 0
+        for path, img in images:
+            t0 = time.perf_counter()
+            bw = preprocess(img, profile)
+            t1 = time.perf_counter()
+            prep += t1 - t0
+            if not args.no_ocr:
+                text = pytesseract.image_to_string(bw, lang=bt.OCR_LANG, config=bt.OCR_CONFIG)
+                ocr_time += time.perf_counter() - t1
+                items += len(bt.parse_ocr_text(text, path)[1])
+        n = len(images)
+        ocr_col = '-' if args.no_ocr else f"{ocr_time / n * 1000:.1f}"
+        items_col = '-' if args.no_ocr else str(items)
+        print(f"{profile:<12} {prep / n * 1000:>12.1f} {ocr_col:>11} {items_col:>7}")
+
+
+if __name__ == '__main__':
+    main()
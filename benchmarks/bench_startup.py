@@ -0,0 +1,58 @@
+"""
+Startup time of the byadgi_trends command line.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup [--runs 10]
+
+Every case runs in a fresh interpreter, --runs times, and the median wall
+time is reported next to a bare `python -c pass`. The last case imports the
+OCR/data stack (pandas, NumPy, PIL, dateutil) that only the ocr and
+build-json commands load, which is what every command used to pay up front.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('numpy', 'pandas', 'PIL.Image', 'dateutil.parser')
+
+
+def run(args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--runs', type=int, default=10)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as out:
+        cases = [
+            ('python -c pass', ['-c', 'pass']),
+            ('import byadgi_trends', ['-c', 'import byadgi_trends']),
+            ('byadgi_trends --help', ['byadgi_trends.py', '--help']),
+            ('byadgi_trends build-html', ['byadgi_trends.py', 'build-html', '--output', out]),
+            ('import OCR/data stack', ['-c', 'import ' + ', '.join(HEAVY)]),
+        ]
+        print(f"{'case':<28} {'median ms':>10} {'min ms':>8}")
+        for name, case in cases:
+            run(case)  # warm the bytecode and file caches
+            times = [run(case) for _ in range(args.runs)]
+            print(f"{name:<28} {statistics.median(times) * 1000:>10.1f} {min(times) * 1000:>8.1f}")
+
+    check = ('import sys, byadgi_trends; '
+             f'print(", ".join(m for m in {HEAVY!r} if m in sys.modules) or "none")')
+    loaded = subprocess.run([sys.executable, '-c', check], cwd=ROOT, capture_output=True, text=True)
+    print(f"heavy modules loaded by 'import byadgi_trends': {loaded.stdout.strip() or loaded.stderr.strip()}")
+
+
+if __name__ == '__main__':
+    main()
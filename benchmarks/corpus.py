@@ -0,0 +1,81 @@
+"""
+Stored OCR text corpus for the parser benchmarks.
+
+A corpus is either a folder of ``.txt`` files (one OCR output per file) or the
+OCR cache folder written by byadgi_trends, whose entries carry the raw OCR
+text (or word boxes, flattened back to lines) of every rate card seen so far. When neither is available a
+small built-in sample modelled on our WhatsApp rate cards is used.
+synthetic_texts() adds seeded synthetic cards (benchmarks/ratecards.py) to
+grow a corpus beyond what has been saved.
+"""
+
+import os
+import json
+import random
+from datetime import date
+
+from price_grid import PriceGrid, Word
+
+SAMPLE_OCR_TEXT = """\
+NAMMA BYADGI APMC RATES
+11/12/25
+AC COLD STORAGE APPROX 15000 BAGS
+Dabbi DLX 28000 - 29000
+Dabbi BEST 23,000
+Dabbi Medium BEST 18000
+KDL DLX 29500
+KDL BEST 24000 to 24500
+Local KDL 48000
+Syngenta 2043 17000 15000 12000
+5531 BEST 15000
+102 BEST 26000
+Seed Quality 14000
+Guntur S-10 16650
+DD BEST 18500
+NEW ARRIVALS 24000 BAGS
+Market steady
+Naya maal 55500
+*11-12-2025
+"""
+
+
+def load_ocr_corpus(path=None):
+    """Return a list of OCR texts from a .txt folder or an OCR cache folder"""
+    texts = []
+    if path and os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for fn in sorted(files):
+                full = os.path.join(root, fn)
+                if fn.endswith('.txt'):
+                    with open(full, encoding='utf-8') as f:
+                        texts.append(f.read())
+                elif fn.endswith('.json'):
+                    try:
+                        with open(full, encoding='utf-8') as f:
+                            entry = json.load(f)
+                    except (OSError, ValueError):
+                        continue
+                    if not isinstance(entry, dict):
+                        continue
+                    if entry.get('ocr_words'):
+                        texts.append(PriceGrid(Word(*w) for w in entry['ocr_words']).text())
+                    elif entry.get('ocr_text'):
+                        texts.append(entry['ocr_text'])
+    if not texts:
+        texts = [SAMPLE_OCR_TEXT]
+    return texts
+
+
+def corpus_lines(texts, min_lines=0):
+    """Non-empty lines of the corpus, repeated until there are at least min_lines"""
+    lines = [ln.strip() for t in texts for ln in t.splitlines() if ln.strip()]
+    if lines and len(lines) < min_lines:
+        lines = lines * (min_lines // len(lines) + 1)
+    return lines
+
+
+def synthetic_texts(count, seed=0, start=date(2023, 1, 2)):
+    """Plain text of count synthetic rate cards, as a perfect OCR would read them"""
+    from benchmarks.ratecards import card_text, market_day, random_card
+    rng = random.Random(seed)
+    return [card_text(random_card(rng, market_day(start, i))) for i in range(count)]
@@ -0,0 +1,199 @@
+"""
+Synthetic rate-card images with known prices, for the ingest benchmarks.
+
+A card is laid out like the WhatsApp rate cards: a dark title bar, the date,
+the AC cold storage arrivals line and its table, then the new arrivals line
+and the moisture (new crop) table, each row a variety name with its grade
+and one price (three for Syngenta 2043: DLX, BEST, Medium BEST). Varieties
+and prices are drawn from a seeded random generator, so the same seed always
+gives the same cards, and every card carries the {label: price} dict that a
+perfect parse would extract; moisture prices are labelled 'variety | grade |
+New Crop'. degrade() adds sensor noise, blur and JPEG artifacts on top.
+"""
+
+import io
+import os
+import json
+import random
+from datetime import date, timedelta
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# printed name, printed grade, variety | grade label(s), typical AC price(s) (PRICE_REFERENCE.csv)
+CATALOG = [
+    ('Dabbi', 'DLX', ['Kashmiri (Dabbi) | DLX'], [31000]),
+    ('Dabbi', 'BEST', ['Kashmiri (Dabbi) | BEST'], [28000]),
+    ('Dabbi Medium', 'BEST', ['Kashmiri (Dabbi) | Medium BEST'], [24000]),
+    ('Dabbi', 'Medium', ['Kashmiri (Dabbi) | Medium'], [16000]),
+    ('Dabbi', 'FATKI', ['Kashmiri (Dabbi) | FATKI'], [9000]),
+    ('Byadgi KDL', 'DLX', ['Byadgi (KDL) | DLX'], [28000]),
+    ('Byadgi KDL', 'BEST', ['Byadgi (KDL) | BEST'], [27000]),
+    ('Byadgi KDL', 'Medium', ['Byadgi (KDL) | Medium'], [20000]),
+    ('Local KDL', '', ['Local KDL'], [43000]),
+    ('Syngenta 2043', '', ['Syngenta 2043 | DLX', 'Syngenta 2043 | BEST', 'Syngenta 2043 | Medium BEST'],
+     [20000, 19500, 17000]),
+    ('5531', 'BEST', ['Syngenta 5531 | BEST'], [15000]),
+    ('102', 'BEST', ['Syngenta 102 | BEST'], [26000]),
+    ('DD', 'BEST', ['Devanur Deluxe (DD) | BEST'], [18500]),
+    ('Guntur S-10', '', ['Guntur S-10'], [16650]),
+    ('Seed Quality', '', ['Seed Quality'], [14000]),
+]
+NEW_CROP_MARKUP = 1.6  # moisture prices run well above AC storage
+COMMENTS = ['Market steady', 'Market slow', 'Market improving']
+DATE_FORMATS = ['%d/%m/%y', '%d-%m-%Y', '%d %b %Y']
+
+# one printed line: text in the name column plus the strings in the price columns
+Line = namedtuple('Line', 'text prices')
+# date: the card's date; lines: what is printed; truth: {label: price} a perfect parse extracts
+RateCard = namedtuple('RateCard', 'date lines truth')
+
+
+def market_day(start, i):
+    """The i-th market day (Monday, Thursday) on or after start"""
+    start = start - timedelta(days=start.weekday())
+    return start + timedelta(days=7 * (i // 2) + 3 * (i % 2))
+
+
+def _price_text(price, rng, comma_rate):
+    return f"{price // 1000},{price % 1000:03d}" if rng.random() < comma_rate else str(price)
+
+
+def random_card(rng, day, comma_rate=0.1):
+    """A RateCard for one market day; rng is a random.Random"""
+    entries = rng.sample(CATALOG, rng.randint(8, len(CATALOG)))
+    split = rng.randint(len(entries) // 2, len(entries) - 2)
+    truth = {}
+    lines = [Line('NAMMA BYADGI APMC RATES', []),
+             Line(day.strftime(rng.choice(DATE_FORMATS)), [])]
+
+    for section, rows in (('AC', entries[:split]), ('New Crop', entries[split:])):
+        bags = rng.randrange(5000, 60000, 500)
+        truth['Arrivals | ' + section] = bags
+        heading = f'AC COLD STORAGE APPROX {bags} BAGS' if section == 'AC' else f'NEW ARRIVALS {bags} BAGS'
+        lines.append(Line(heading, []))
+        markup = 1.0 if section == 'AC' else NEW_CROP_MARKUP
+        suffix = '' if section == 'AC' else ' | New Crop'
+        for name, grade, labels, bases in sorted(rows, key=CATALOG.index):
+            swing = rng.uniform(0.85, 1.15)
+            prices = [int(round(base * markup * swing, -2)) for base in bases]
+            truth.update((label + suffix, price) for label, price in zip(labels, prices))
+            lines.append(Line(f'{name} {grade}'.strip(), [_price_text(p, rng, comma_rate) for p in prices]))
+    lines.append(Line(rng.choice(COMMENTS), []))
+    return RateCard(day, lines, truth)
+
+
+def card_text(card):
+    """The card as plain text, one printed line per line (what a perfect OCR returns)"""
+    return '\n'.join(' '.join([line.text, *line.prices]) for line in card.lines)
+
+
+def load_font(size, path=None):
+    """A TrueType font: path, else a common system font, else PIL's bundled default"""
+    for candidate in (path, 'DejaVuSans.ttf', 'arial.ttf', 'LiberationSans-Regular.ttf'):
+        if candidate:
+            try:
+                return ImageFont.truetype(candidate, size)
+            except OSError:
+                continue
+    return ImageFont.load_default(size)
+
+
+def render_card(card, font=None, width=720, row_height=44):
+    """Draw a card as an RGB image: title bar, zebra-striped rows, right-aligned price columns"""
+    font = font or load_font(24)
+    img = Image.new('RGB', (width, row_height * (len(card.lines) + 2)), 'white')
+    draw = ImageDraw.Draw(img)
+    price_right = [width - 40 - 130 * k for k in range(3)][::-1]
+
+    for i, line in enumerate(card.lines):
+        top = row_height * (i + 1)
+        if i == 0:
+            draw.rectangle([0, top - row_height // 2, width, top + row_height], fill=(140, 20, 20))
+            draw.text((width // 2, top + row_height // 2), line.text, fill='white', font=font, anchor='mm')
+            continue
+        if line.prices and i % 2:
+            draw.rectangle([20, top, width - 20, top + row_height], fill=(232, 240, 226))
+        draw.text((32, top + row_height // 2), line.text, fill='black', font=font, anchor='lm')
+        for right, price in zip(price_right[-len(line.prices):] if line.prices else [], line.prices):
+            draw.text((right, top + row_height // 2), price, fill='black', font=font, anchor='rm')
+    return img
+
+
+def degrade(img, rng, noise=6.0, blur=0.5, quality=75):
+    """Gaussian sensor noise (std in grey levels), a Gaussian blur radius and a JPEG round trip.
+
+    rng is a numpy Generator; 0 / None turns a step off.
+    """
+    if blur:
+        img = img.filter(ImageFilter.GaussianBlur(blur))
+    if noise:
+        arr = np.asarray(img, dtype=np.float32)
+        arr = arr + rng.normal(0.0, noise, arr.shape).astype(np.float32)
+        img = Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+    if quality:
+        buf = io.BytesIO()
+        img.save(buf, 'JPEG', quality=quality)
+        buf.seek(0)
+        img = Image.open(buf)
+        img.load()
+    return img
+
+
+def write_cards(folder, count, seed=0, start=date(2023, 1, 2), noise=6.0, blur=0.5, quality=75,
+                comma_rate=0.1, font=None, dup_rate=0.0):
+    """Render count cards into folder plus ground_truth.json; returns the ground truth.
+
+    Ground truth is {filename: {'date': ISO date, 'prices': {label: price}, 'text': card text}}.
+    Cards are saved as JPEG when quality is set, else PNG. With dup_rate, that
+    share of cards also gets forwarded copies ("card_00012 (2).jpg"),
+    re-encoded at another JPEG quality.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    pixels = np.random.default_rng(seed)
+    font = font or load_font(24)
+    ext = '.jpg' if quality else '.png'
+    truth = {}
+    for i in range(count):
+        card = random_card(rng, market_day(start, i), comma_rate)
+        name = f'card_{i:05d}{ext}'
+        img = degrade(render_card(card, font), pixels, noise, blur, quality=None)
+        if quality:
+            img.save(os.path.join(folder, name), 'JPEG', quality=quality)
+        else:
+            img.save(os.path.join(folder, name))
+        truth[name] = {'date': card.date.isoformat(), 'prices': card.truth, 'text': card_text(card)}
+        copies = rng.randint(1, 3) if rng.random() < dup_rate else 0
+        for k in range(2, copies + 2):
+            copy = f'card_{i:05d} ({k}).jpg'
+            img.convert('RGB').save(os.path.join(folder, copy), 'JPEG', quality=rng.randint(40, 90))
+            truth[copy] = truth[name]
+    with open(os.path.join(folder, 'ground_truth.json'), 'w', encoding='utf-8') as f:
+        json.dump(truth, f, indent=1)
+    return truth
+
+
+def load_ground_truth(folder):
+    with open(os.path.join(folder, 'ground_truth.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def score(expected, extracted):
+    """Recall / precision of extracted against expected, both {key: {label: price}}.
+
+    An item counts as correct only with the right key, label and price; a
+    wrong price is both a miss and a false positive.
+    """
+    correct = sum(1 for key, prices in expected.items()
+                  for label, price in prices.items() if extracted.get(key, {}).get(label) == price)
+    n_expected = sum(len(p) for p in expected.values())
+    n_extracted = sum(len(p) for p in extracted.values())
+    return {
+        'expected': n_expected,
+        'extracted': n_extracted,
+        'correct': correct,
+        'recall': correct / n_expected if n_expected else 0.0,
+        'precision': correct / n_extracted if n_extracted else 0.0,
+    }
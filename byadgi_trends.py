@@ -10,13 +10,21 @@ import os
 import re
 import sys
 import json
+import time
+import hashlib
 import logging
-from datetime import datetime
-from PIL import Image
-import pytesseract
-import pandas as pd
-import numpy as np
-from dateutil import parser as dateparser
+import argparse
+from datetime import datetime, timezone
+from itertools import groupby
+from collections import deque, namedtuple
+from price_grid import DATE_TOKEN_RE, PriceGrid, Word
+import compact_json
+import instrumentation
+from instrumentation import stage, timed
+
+# pandas, NumPy, PIL, dateutil and the modules built on them (preprocess, layout,
+# price_store, gapfill, analytics) are imported inside the functions that need them,
+# so commands that never touch OCR or the price matrix (build-html) start fast.
 
 # ============================================================================
 # CONFIGURATION
@@ -25,20 +33,76 @@ from dateutil import parser as dateparser
 INPUT_FOLDER = r'C:\Users\mrmay\Downloads\APMC Prices\Prices'
 OUTPUT_FOLDER = r'C:\Users\mrmay\Downloads\APMC Prices\web'
 TESSERACT_CMD = None
-
-if TESSERACT_CMD:
-    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
-
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(os.path.join(OUTPUT_FOLDER, 'generation.log'), encoding='utf-8')
-    ]
-)
+OCR_BACKEND = 'auto'  # 'tesserocr' (persistent engine), 'pytesseract' (subprocess per call) or 'auto'
+OCR_WORKERS = 1  # >1 spreads parse_image across a process pool
+OCR_QUEUE_DEPTH = 4  # images in flight per worker; bounds memory while streaming the archive
+OCR_LANG = 'eng'
+OCR_CONFIG = '--psm 6'  # assume a block of text; improves line grouping on screenshots
+PREPROCESS_PROFILE = 'fixed'  # see preprocess.PROFILES: 'fixed', 'otsu', 'local_mean'
+PREPROCESS_OPTIONS = {}  # extra keyword arguments for the profile, e.g. {'level': 150}
+OCR_CROP_TABLE = True  # OCR only the detected price table (plus the header above it, for the date)
+OCR_ROW_STRIPS = False  # OCR the table one row at a time with --psm 7
+OCR_WORD_BOXES = True  # read word boxes and assign prices by table column (False: plain text lines)
+# Tiered OCR: every image gets the first (cheap) tier and moves on to the next one only while its
+# result looks poor - fewer than OCR_MIN_ITEMS prices, or the price words' mean confidence below
+# OCR_MIN_CONFIDENCE (word boxes only). When no pass gets there, the one with the most prices
+# (then the highest confidence) is kept.
+# (name, upscale small images 2-3x, tesseract config)
+OCR_WHITELIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz/-.,:()*'
+OCR_TIERS = [
+    ('fast', False, f'{OCR_CONFIG} -c tessedit_char_whitelist={OCR_WHITELIST}'),
+    ('full', True, OCR_CONFIG),
+    ('psm4', True, '--psm 4'),  # one column of text of variable sizes: rescues unusual layouts
+]
+OCR_MIN_ITEMS = 4
+OCR_MIN_CONFIDENCE = 75
+OCR_PIPELINE_VERSION = 6  # bump when ocr_image preprocessing changes
+PARSER_VERSION = 4  # bump when parse_ocr_text logic changes
+
+# Persistent OCR cache (keyed by image content hash); set OCR_CACHE_DIR = None to disable
+OCR_CACHE_DIR = os.path.join(os.path.dirname(INPUT_FOLDER), 'ocr_cache')
+OCR_CACHE_MAX_MB = 256
+
+# Forwarded copies of the same card (see dedup.py) reuse the first copy's result instead of
+# being OCR'd; set DEDUP_IMAGES = False to OCR every image
+DEDUP_IMAGES = True
+DEDUP_MAX_DISTANCE = 10  # dHash bits (of 64) a copy may differ by
+DEDUP_MAX_DIFF = 40  # grey levels any thumbnail pixel may differ by (a changed digit is far more)
+
+# Incremental rebuilds: only new/changed images are parsed; set INGEST_MANIFEST = None for full rebuilds
+INGEST_MANIFEST = os.path.join(os.path.dirname(INPUT_FOLDER), 'ingest_manifest.json')
+
+# Columnar copy of the extracted prices (see price_store.py); set PRICE_STORE = None to skip writing it
+PRICE_STORE = os.path.join(os.path.dirname(INPUT_FOLDER), 'price_store')
+
+# data.json layout: 'pretty' (indented) or 'compact' (delta-encoded, see compact_json.py)
+JSON_FORMAT = 'pretty'
+JSON_SIDECARS = True  # with 'compact': also write pre-compressed .gz (and .br) copies
+JSON_SPLIT = False  # also write latest.json plus history/<season>.json for a fast first paint
+
+# Run report (see instrumentation.py): wall/CPU time and peak RSS per stage and per image,
+# written to <RUN_REPORT>.json and .csv; set RUN_REPORT = None to skip it
+RUN_REPORT = os.path.join(OUTPUT_FOLDER, 'run_report')
+PROFILER = None  # 'cprofile' or 'pyinstrument': also dump a profile of the run to <RUN_REPORT>.prof/.html
+
+# Gap filling (see gapfill.py): cards snap to the nearest Monday; gaps of up to GAP_MAX_WEEKS are
+# interpolated, nothing is extrapolated past a variety's first/last quote unless a policy allows it
+GAP_MAX_WEEKS = 4
+GAP_EXTRAPOLATE_WEEKS = 0
+GAP_POLICIES = {}  # per-variety overrides, label regex -> (max_gap, extrapolate), e.g. {r'FATKI': (2, 0)}
+
+def setup_logging(output_folder=None):
+    """Log to the console and to generation.log in the output folder (called by the CLI, not on import)"""
+    output_folder = output_folder or OUTPUT_FOLDER
+    os.makedirs(output_folder, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s: %(message)s',
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler(os.path.join(output_folder, 'generation.log'), encoding='utf-8')
+        ]
+    )
 
 # ============================================================================
 # CANONICAL VARIETY NAMES - Source of Truth
@@ -92,6 +156,20 @@ IGNORE_PATTERNS = [
     r'Naya maal|NEW ARRIVALS',  # Hindi text and new arrivals metadata
 ]
 
+# Grade labels that may follow a variety on the same line
+GRADE_PATTERN = r'\b(dlx|delux|deluxe|dlx|best|medium best|medium|fatki|fatki\b)\b'
+# A single word of a grade column header ("DLX", "BEST", "Medium")
+GRADE_WORD_RE = re.compile(r'dlx|delux|deluxe|best|medium|fatki', re.IGNORECASE)
+
+# Bag arrival lines ("APPROX ARRIVALS 40,000 BAGS", "NEW ARRIVALS", "10000 BAGS"). They are noise
+# for variety matching; read_arrivals() picks the counts out of them instead.
+ARRIVALS_HEADING_RE = re.compile(r'ARRIVALS?|ARRIVEL', re.IGNORECASE | re.ASCII)
+BAGS_RE = re.compile(r'(\d{2,7})?\s*\bBAGS?\b', re.IGNORECASE | re.ASCII)
+NEW_CROP_RE = re.compile(r'\bNEW\b|naya\s*maal|moisture', re.IGNORECASE | re.ASCII)
+ARRIVAL_SECTIONS = ('AC', 'New Crop')
+ARRIVALS_PREFIX = 'Arrivals | '  # arrivals ride along with the prices as 'Arrivals | AC' etc.
+NEW_CROP_SUFFIX = ' | New Crop'  # prices read below a new crop arrivals heading: 'variety | grade | New Crop'
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -147,17 +225,20 @@ def pick_mid(nums):
         return nums[0]
     if len(nums) == 2:
         return int(round((nums[0] + nums[1]) / 2))
+    import numpy as np
     return int(np.median(nums))
 
-def parse_date(text, filename):
+def find_date(text, filename=''):
     """
-    Extract date from OCR text or filename.
+    Extract date from OCR text or filename, or None.
     Supports:
     - 11/12/25
     - 11-12-2025
     - 11 Dec 2025
-    - Uses file modified date as final fallback
+    - 2025-12-11 in the filename
     """
+    from dateutil import parser as dateparser
+
     # 1️⃣ Try DD/MM/YY or DD/MM/YYYY
     m = re.search(r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})', text)
     if m:
@@ -189,82 +270,283 @@ def parse_date(text, filename):
             return dateparser.parse(m.group(1)).date()
         except:
             pass
+    return None
 
-    # 4️⃣ FINAL fallback → file modified date
-    return pd.to_datetime(os.path.getmtime(filename), unit='s').date()
+def parse_date(text, filename):
+    """find_date(), falling back to the file's modified date"""
+    return find_date(text, filename) or mtime_date(filename)
 
+def mtime_date(path):
+    """The file's modification date (UTC)"""
+    return datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).date()
+
+
+class LineMatcher:
+    """
+    Classify an OCR line as noise, variety and grade label with precompiled regexes.
+
+    IGNORE_PATTERNS become one alternation (a line is noise if any of them
+    matches). VARIETY_PATTERNS become one alternation of named groups, each
+    inside a zero-width lookahead so finditer reports every position where a
+    variety starts; the lowest group index wins, exactly like the old
+    first-pattern-in-order loop. Lines are ASCII after clean_text, so the
+    ASCII flag changes nothing but lets re use its fast case folding.
+    """
+
+    def __init__(self, variety_patterns, ignore_patterns, grade_pattern=GRADE_PATTERN):
+        flags = re.IGNORECASE | re.ASCII
+        self.canonical = [canonical for _, canonical in variety_patterns]
+        self.noise_re = re.compile('|'.join(f'(?:{p})' for p in ignore_patterns), flags)
+        self.variety_re = re.compile(
+            '(?=(?:' + '|'.join(f'(?P<v{i}>{p})' for i, (p, _) in enumerate(variety_patterns)) + '))',
+            flags
+        )
+        self.grade_re = re.compile(grade_pattern, flags)
+
+    def classify(self, line: str):
+        """Return (is_noise, variety, grade_label) for one line"""
+        if self.noise_re.search(line):
+            return True, None, None
+        best = None
+        for m in self.variety_re.finditer(line):
+            idx = int(m.lastgroup[1:])
+            if best is None or idx < best:
+                best = idx
+                if idx == 0:
+                    break
+        variety = self.canonical[best] if best is not None else None
+        m = self.grade_re.search(line)
+        return False, variety, m.group(0).strip().lower() if m else None
+
+LINE_MATCHER = LineMatcher(VARIETY_PATTERNS, IGNORE_PATTERNS)
 
 def should_ignore(line: str):
     """Check if line should be ignored (noise)"""
-    for pattern in IGNORE_PATTERNS:
-        if re.search(pattern, line, re.IGNORECASE):
-            return True
-    return False
+    return LINE_MATCHER.classify(line)[0]
 
 def extract_variety_name(line: str):
-    """Extract variety name from line - match patterns in order"""
-    low = line.lower()
-    
-    for pattern, canonical in VARIETY_PATTERNS:
-        if re.search(pattern, low):
-            return canonical
-    
-    return None
+    """Extract variety name from line - patterns earlier in VARIETY_PATTERNS win"""
+    noise, variety, _ = LINE_MATCHER.classify(line)
+    return None if noise else variety
 
 # ---- REPLACE parse_image ----
-def parse_image(path):
-    """Parse single image and extract prices robustly."""
+def ocr_image(path):
+    """OCR and parse a single image, escalating through OCR_TIERS while the result looks poor.
+
+    Returns (ocr output, date, prices, tier) for the first pass that meets the
+    thresholds, else for the highest-scoring pass (ocr_score); tier names the
+    last tier that ran. ocr is None when the image could not be read at all.
+    """
+    from PIL import Image
+
     try:
-        img = Image.open(path).convert('RGB')
+        with stage('open', path):
+            img = Image.open(path)
+            img.load()
     except Exception as e:
         logging.error("Could not open image: %s (%s)", path, e)
-        return None, {}
-    # OCR preprocessing: resize small images, grayscale, adaptive threshold
+        return None, None, {}, None
+    engine = ocr_engine()
+    best = None
+    for tier, upscale, config in OCR_TIERS:
+        ocr = ocr_pass(img, path, upscale, config, engine)
+        if ocr is None:
+            continue
+        with stage('parse', path):
+            date, prices = parse_ocr(ocr, path)
+        items = sum(1 for label in prices if not label.startswith(ARRIVALS_PREFIX))
+        confidence = price_confidence(ocr)
+        if items >= OCR_MIN_ITEMS and (confidence is None or confidence >= OCR_MIN_CONFIDENCE):
+            return ocr, date, prices, tier
+        score = ocr_score(items, confidence)
+        if best is None or score > best[0]:
+            best = (score, ocr, date, prices)
+        logging.info("OCR tier %s: %d prices, confidence %s in %s", tier, items,
+                     'n/a' if confidence is None else f'{confidence:.0f}', os.path.basename(path))
+    if best is not None:
+        return best[1], best[2], best[3], tier
+
+    try:
+        ocr = engine.image_to_string(img.convert('RGB'))
+    except Exception as e:
+        logging.error("Tesseract fallback failed: %s", e)
+        return None, None, {}, None
+    with stage('parse', path):
+        date, prices = parse_ocr(ocr, path)
+    return ocr, date, prices, 'fallback'
+
+def ocr_pass(img, path, upscale, config, engine):
+    """Preprocess and OCR an image once with one tier's settings; None when Tesseract fails"""
+    from PIL import Image
+    from preprocess import binarize, load_gray
+
+    # OCR preprocessing: grayscale, upscale small images, binarize (see preprocess.PROFILES)
     try:
-        w, h = img.size
-        scale = 1.0
-        if max(w, h) < 1000:
-            scale = 2.0
-        if max(w, h) < 600:
-            scale = 3.0
-        if scale != 1.0:
-            new_size = (int(w * scale), int(h * scale))
-            img = img.resize(new_size, Image.LANCZOS)
-        gray = img.convert('L')
-        # adaptive threshold (PIL point can be used; keep safe)
-        bw = gray.point(lambda x: 0 if x < 140 else 255, '1')
-        ocr_config = '--psm 6'  # assume a block of text; improves line grouping on screenshots
-        ocr = pytesseract.image_to_string(bw, lang='eng', config=ocr_config)
+        with stage('resize', path):
+            gray = load_gray(img, upscale)
+        with stage('threshold', path):
+            bw = Image.fromarray(binarize(gray, PREPROCESS_PROFILE, **PREPROCESS_OPTIONS))
+        with stage('ocr', path):
+            if OCR_CROP_TABLE:
+                regions = table_regions(bw, config)
+            else:
+                regions = [((0, 0, bw.width, bw.height), config)]
+            if OCR_WORD_BOXES:
+                return ocr_words(bw, regions, engine)
+            return '\n'.join(ocr_texts(bw, regions, engine))
     except Exception as e:
         logging.error("Tesseract failed on preproc image: %s (%s)", path, e)
-        try:
-            ocr = pytesseract.image_to_string(img, lang='eng')
-        except Exception as e2:
-            logging.error("Tesseract fallback failed: %s", e2)
-            return None, {}
+        return None
+
+def price_confidence(ocr):
+    """Mean Tesseract confidence of the numeric words, None for plain text (or no numbers)"""
+    if not isinstance(ocr, list):
+        return None
+    confs = [w[5] for w in ocr if w[5] >= 0 and sum(ch.isdigit() for ch in w[0]) >= 3]
+    return sum(confs) / len(confs) if confs else None
+
+def ocr_score(items, confidence):
+    """Rank of a pass that missed the thresholds: more prices first, then higher confidence"""
+    return items, -1 if confidence is None else confidence
+
+def ocr_engine():
+    """This process's OCR backend (a persistent engine when tesserocr is available)"""
+    from ocr_backend import get_backend
+    return get_backend(OCR_BACKEND, OCR_LANG, TESSERACT_CMD)
 
+def table_regions(bw, config=OCR_CONFIG):
+    """Crop boxes and Tesseract configs covering only the price table of a binarized card.
+
+    The table is found by projection profiles. The header above it is kept
+    because it carries the card's date; footers, banners and margins are
+    never sent to Tesseract. Falls back to the whole image when no table is found.
+    """
+    import numpy as np
+    from layout import find_table_roi, header_span, row_strips
+
+    arr = np.asarray(bw)
+    roi = find_table_roi(arr)
+    if roi is None:
+        return [((0, 0, bw.width, bw.height), config)]
+
+    top, bottom, left, right = roi
+    regions = []
+    header = header_span(arr, roi)
+    if header:
+        regions.append(((0, header[0], bw.width, header[1]), config))
+    if OCR_ROW_STRIPS:
+        strip = re.sub(r'--psm\s+\d+', '', config).strip()
+        strip = f'--psm 7 {strip}'.strip()
+        regions.extend(((left, a, right, b), strip) for a, b in row_strips(arr, roi))
+    else:
+        regions.append(((left, top, right, bottom), config))
+    return regions
+
+def ocr_texts(bw, regions, engine):
+    """OCR text per region; runs of regions sharing a config go to the engine as one batch"""
+    texts = []
+    for config, group in groupby(regions, key=lambda region: region[1]):
+        texts.extend(engine.images_to_strings([bw.crop(box) for box, _ in group], config))
+    return texts
+
+def ocr_words(bw, regions, engine):
+    """Word boxes for all regions, in full-image coordinates with image-wide line ids"""
+    words = []
+    next_line = 0
+    for (left, top, right, bottom), config in regions:
+        region_words = engine.image_to_words(bw.crop((left, top, right, bottom)), config)
+        for text, x, y, w, h, conf, line in region_words:
+            words.append([text, x + left, y + top, w, h, conf, line + next_line])
+        next_line += 1 + max((wd[6] for wd in region_words), default=-1)
+    return words
+
+def parse_image(path):
+    """Parse single image and extract prices robustly."""
+    ocr, date, prices, _ = ocr_image(path)
+    if ocr is None:
+        return None, {}
+    return date, prices
+
+def parse_ocr(ocr, path):
+    """Extract (date, prices) from OCR output: word boxes when available, else plain text"""
+    if isinstance(ocr, list):
+        return parse_ocr_words(ocr, path)
+    return parse_ocr_text(ocr, path)
+
+def normalize_grade(label):
+    """Map an OCR'd grade label (dlx, deluxe, medium best, ...) to its canonical name"""
+    lab = label.lower()
+    if 'delux' in lab or 'dlx' in lab:
+        return 'DLX'
+    if 'best' in lab and 'medium' in lab:
+        return 'Medium BEST'
+    if 'best' in lab:
+        return 'BEST'
+    if 'medium' in lab:
+        return 'Medium'
+    if 'fatki' in lab or 'fatky' in lab:
+        return 'FATKI'
+    return label.upper()
+
+def section_key(key, section):
+    """Price key for the arrivals section a line was read in; New Crop prices get NEW_CROP_SUFFIX"""
+    return key + NEW_CROP_SUFFIX if section == 'New Crop' else key
+
+def assign_prices(prices, variety, label, nums, section=None):
+    """Store the price(s) read for one variety line under 'variety | grade' keys"""
+    # if range present - both endpoints are in nums; keep the top two for graded varieties
+    if variety in ('Byadgi (KDL)', 'Kashmiri (Dabbi)') and len(nums) >= 3:
+        nums = sorted(nums, reverse=True)[:2]
+
+    if variety.startswith('Syngenta') and len(nums) >= 3:
+        for g, p in zip(('DLX', 'BEST', 'Medium BEST'), nums):
+            prices[section_key(f"{variety} | {g}", section)] = p
+        return
+
+    # canonicalize variety to the whitelist (ensures only allowed varieties)
+    if variety not in CANONICAL_VARIETIES:
+        return
+    # 🚫 Disallow grade-less Dabbi
+    if variety == 'Kashmiri (Dabbi)' and not label:
+        return
+    key = f"{variety} | {normalize_grade(label)}" if label else variety
+    prices[section_key(key, section)] = nums[0]
+
+def parse_ocr_text(ocr, path):
+    """Extract (date, prices) from raw OCR text of the image at path."""
+    date, prices = parse_text(ocr, path)
+    if date is None:
+        date = mtime_date(path)
+    logging.info("Extracted %d items from %s", len(prices), os.path.basename(path))
+    return date, prices
+
+def parse_text(ocr, filename=''):
+    """(date or None, prices) from raw OCR text.
+
+    Pure: no Tesseract, no file access and no logging, so stored OCR output
+    can be replayed through it (see benchmarks/bench_parser.py). filename is
+    only searched for a date.
+    """
     text = clean_text(ocr)
-    date = parse_date(text, path)
+    return find_date(text, filename), extract_prices(text)
+
+def extract_prices(text):
+    """{'variety | grade': price} (plus arrivals) from cleaned OCR text"""
     lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
     prices = {}
+    arrivals_section = None
 
     # Build a sliding window of lines so we can join adjacent lines (variety on one line, price next)
     for i, line in enumerate(lines):
         low = line.lower()
-        if should_ignore(line):
+        # precompiled matchers find noise, the canonical variety and any grade label (DLX,BEST,MEDIUM,FATKI)
+        noise, variety, label = LINE_MATCHER.classify(line)
+        if noise or not variety:
+            arrivals_section = record_arrivals(prices, line, arrivals_section)
             continue
 
-        # try to find canonical variety on this line
-        variety = extract_variety_name(line)
-        label = None
-
         # if found variety, attempt to get numbers from same line or next 2 lines
         if variety:
-            # look for label keywords (DLX,BEST,MEDIUM,FATKI) on same line
-            m_label = re.search(r'\b(dlx|delux|deluxe|dlx|best|medium best|medium|fatki|fatki\b)\b', low, re.IGNORECASE)
-            if m_label:
-                label = m_label.group(0).strip()
-
             nums = extract_numbers(line)
             # if not nums:
             #     # look ahead 1 or 2 lines
@@ -296,69 +578,96 @@ def parse_image(path):
                     nums = []
 
             if nums:
-                # if range present - we already added both endpoints; pick median
-                # price = pick_mid(nums)
-                # price = nums[0] if nums else None
+                assign_prices(prices, variety, label, nums, arrivals_section)
+    return prices
+
+_THOUSANDS_RE = re.compile(r'(?<=\d),(?=\d{3}\b)')
+
+def cell_numbers(text):
+    """Prices in one table cell; a cell holds one quote, so "24,000" is a thousands separator"""
+    return extract_numbers(_THOUSANDS_RE.sub('', text))
+
+_DATE_TOKEN_RE = re.compile(r'\d{1,4}[/-]\d{1,2}[/-]\d{2,4}')
+_COUNT_RE = re.compile(r'\b\d{3,7}\b', re.ASCII)
+
+def read_arrivals(line, section=None):
+    """(section, bags) for a bag arrivals line, None for any other line.
+
+    A heading ("APPROX ARRIVALS", "NEW ARRIVALS") names the section: 'New Crop'
+    when it mentions new crop / Naya maal, else 'AC'. A bare "10000 BAGS" line
+    belongs to the section of the heading before it. bags is None when the
+    line has no count.
+    """
+    heading = ARRIVALS_HEADING_RE.search(line)
+    bags = BAGS_RE.search(line)
+    if not heading and not bags:
+        return None
+    if heading or section is None:
+        section = 'New Crop' if NEW_CROP_RE.search(line) else 'AC'
+    text = _DATE_TOKEN_RE.sub(' ', _THOUSANDS_RE.sub('', line))
+    bags = BAGS_RE.search(text)
+    if bags and bags.group(1):
+        return section, int(bags.group(1))
+    counts = _COUNT_RE.findall(text)
+    return section, int(counts[0]) if counts else None
+
+def record_arrivals(prices, line, section):
+    """Store the count of an arrivals line in prices; returns the section now in effect"""
+    arrival = read_arrivals(line, section)
+    if arrival is None:
+        return section
+    section, bags = arrival
+    if bags:
+        prices[ARRIVALS_PREFIX + section] = bags
+    return section
+
+def _is_variety_code(text):
+    """True for numeric words that name a variety on their own ("2043", "5531")"""
+    return LINE_MATCHER.classify(clean_text(text))[1] is not None
+
+def _is_variety_row(text):
+    """True for table rows that name a variety, the only rows whose numbers are prices"""
+    noise, variety, _ = LINE_MATCHER.classify(clean_text(text))
+    return variety is not None and not noise
+
+def parse_ocr_words(words, path):
+    """Extract (date, prices) from word boxes, reading each price from its table cell."""
+    grid = PriceGrid((Word(*w) for w in words), is_name=_is_variety_code, is_price_row=_is_variety_row)
+    date = parse_date(clean_text(grid.text()), path)
+    prices = {}
+    grades = {}  # column -> grade, from the latest header row ("DLX  BEST  Medium BEST")
+    arrivals_section = None
+
+    for r in range(len(grid.rows)):
+        header = grid.header_columns(r, GRADE_WORD_RE)
+        if header:
+            grades = {col: normalize_grade(lab) for col, lab in header.items()}
+            continue
+
+        line = clean_text(grid.row_text(r))
+        noise, variety, label = LINE_MATCHER.classify(line)
+        if noise or not variety:
+            arrivals_section = record_arrivals(prices, line, arrivals_section)
+            continue
+
+        cells = grid.cells(r)
+        if not cells and r + 1 < len(grid.rows):
+            # price wrapped onto the next row, as long as that row isn't another variety
+            if LINE_MATCHER.classify(clean_text(grid.row_text(r + 1)))[1] is None:
+                cells = grid.cells(r + 1)
+
+        if grades and not label and variety in CANONICAL_VARIETIES:
+            graded = [(grades[col], cell_numbers(text)) for col, text in cells if col in grades]
+            graded = [(g, nums) for g, nums in graded if nums]
+            if graded:
+                for g, nums in graded:
+                    prices[section_key(f"{variety} | {g}", arrivals_section)] = nums[0]
+                continue
+
+        nums = [n for _, text in cells for n in cell_numbers(text)]
+        if nums:
+            assign_prices(prices, variety, label, nums, arrivals_section)
 
-                if variety in ('Byadgi (KDL)', 'Kashmiri (Dabbi)') and len(nums) >= 3:
-                    # nums = sorted(nums, reverse=True)
-                    nums = sorted(nums, reverse=True)[:2]
-                
-                price = nums[0] if nums else None
-
-                if variety.startswith('Syngenta') and len(nums) >= 3:
-                    grade_map = [
-                        ('DLX', nums[0]),
-                        ('BEST', nums[1]),
-                        ('Medium BEST', nums[2]),
-                    ]
-                    for g, p in grade_map:
-                        prices[f"{variety} | {g}"] = p
-                    continue
-
-                # canonicalize variety to the whitelist (ensures only allowed varieties)
-                if variety in CANONICAL_VARIETIES:
-                    # craft final key including label if present (optional)
-                    # 🚫 Disallow grade-less Dabbi
-                    if variety == 'Kashmiri (Dabbi)' and not label:
-                        continue
-
-
-                    
-                    key = variety
-                    if label:
-                        # normalize label names
-                        lab = label.lower()
-                        if 'delux' in lab or 'dlx' in lab:
-                            lab = 'DLX'
-                        elif 'best' in lab and 'medium' in lab:
-                            lab = 'Medium BEST'
-                        elif 'best' in lab:
-                            lab = 'BEST'
-                        elif 'medium' in lab:
-                            lab = 'Medium'
-                        elif 'fatki' in lab or 'fatky' in lab:
-                            lab = 'FATKI'
-                        else:
-                            lab = label.upper()
-                        # attach label (you can choose to store separately instead)
-                        key = f"{variety} | {lab}"
-                    # if variety already exists average the values
-                    # if key in prices:
-                    #     # prices[key] = int(round((prices[key] + price) / 2))
-                    #     if key in prices:
-                    #         if key in prices:
-                    #             prices[key] = int(round((prices[key] + price) / 2))
-                    #         else:
-                    #             prices[key] = price
-                    #     else:
-                    #         prices[key] = price
-                        prices[key] = price
-
-
-
-                    else:
-                        prices[key] = price
     logging.info("Extracted %d items from %s", len(prices), os.path.basename(path))
     return date, prices
 
@@ -366,30 +675,289 @@ def parse_image(path):
 # PROCESS FOLDER
 # ============================================================================
 
-def process_folder(input_folder):
-    """Process all images in folder"""
-    files = sorted([f for f in os.listdir(input_folder) 
-                   if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
-    
-    if not files:
+def ocr_fingerprint():
+    """Identify the OCR settings; cached OCR text is only reused when they match"""
+    payload = [OCR_PIPELINE_VERSION, OCR_LANG, OCR_CONFIG, PREPROCESS_PROFILE,
+               sorted(PREPROCESS_OPTIONS.items()), OCR_CROP_TABLE, OCR_ROW_STRIPS, OCR_WORD_BOXES,
+               TESSERACT_CMD, OCR_TIERS, OCR_MIN_ITEMS, OCR_MIN_CONFIDENCE]
+    return hashlib.sha256(json.dumps(payload).encode('utf-8')).hexdigest()[:16]
+
+def parser_fingerprint():
+    """Identify the parser; cached (date, prices) are re-parsed when the patterns change.
+
+    Covers every module-level pattern parse_text and parse_ocr_words read;
+    logic inside the functions is covered by PARSER_VERSION.
+    """
+    payload = [PARSER_VERSION, VARIETY_PATTERNS, IGNORE_PATTERNS, CANONICAL_VARIETIES,
+               GRADE_PATTERN, GRADE_WORD_RE.pattern, ARRIVALS_HEADING_RE.pattern, BAGS_RE.pattern,
+               NEW_CROP_RE.pattern, ARRIVALS_PREFIX, NEW_CROP_SUFFIX, _THOUSANDS_RE.pattern, _DATE_TOKEN_RE.pattern,
+               _COUNT_RE.pattern, DATE_TOKEN_RE.pattern]
+    return hashlib.sha256(json.dumps(payload).encode('utf-8')).hexdigest()[:16]
+
+def open_ocr_cache(cache_dir=None, max_mb=None):
+    """Open the persistent OCR cache, or return None when caching is disabled"""
+    cache_dir = cache_dir or OCR_CACHE_DIR
+    if not cache_dir:
+        return None
+    max_mb = OCR_CACHE_MAX_MB if max_mb is None else max_mb
+    from ocr_cache import OcrCache
+    return OcrCache(cache_dir, ocr_fingerprint(), parser_fingerprint(),
+                    max_bytes=int(max_mb * 1024 * 1024))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# One image on its way through the pipeline; source is 'manifest', 'cache', 'ocr', 'duplicate'
+# or 'failed' (OCR produced nothing; not remembered, so the next run tries again)
+ParsedImage = namedtuple('ParsedImage', 'path digest date prices source')
+# An image that shows the same card as the earlier image rep; it takes rep's result
+Duplicate = namedtuple('Duplicate', 'path digest rep')
+
+def open_dedup():
+    """Near-duplicate detector for this run, or None when DEDUP_IMAGES is off"""
+    if not DEDUP_IMAGES:
+        return None
+    from dedup import Deduplicator
+    return Deduplicator(DEDUP_MAX_DISTANCE, DEDUP_MAX_DIFF)
+
+def open_ingest_manifest(input_folder, manifest_path=None):
+    """Load the incremental-ingest manifest, or return None for a full rebuild"""
+    manifest_path = manifest_path or INGEST_MANIFEST
+    if not manifest_path:
+        return None
+    from ingest_manifest import IngestManifest
+    # results depend on how the images were OCR'd as much as on how the text was parsed
+    return IngestManifest(manifest_path, input_folder, f'{ocr_fingerprint()}-{parser_fingerprint()}')
+
+def iter_images(input_folder):
+    """Lazily yield image paths under input_folder, including month/season subfolders.
+
+    Each folder's own images come before its subfolders, both in sorted order,
+    so a flat archive is walked exactly as before. Hidden folders are skipped.
+    """
+    for root, dirs, files in os.walk(input_folder):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for fn in sorted(files):
+            if fn.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, fn)
+
+def _parse_image_task(path):
+    """Pool entry point: OCR and parse one image, and report which worker took how long."""
+    logging.info("Processing: %s", os.path.basename(path))
+    start = time.perf_counter()
+    first = instrumentation.mark()
+    ocr, date, prices, tier = ocr_image(path)
+    return (ocr, date, prices, tier, os.getpid(), time.perf_counter() - start,
+            instrumentation.records_since(first))
+
+def _cached_result(cache, path, digest):
+    """(date, prices) for an image from the OCR cache, or None on a miss"""
+    entry = cache.get(digest)
+    if entry is None:
+        return None
+    parsed = cache.parsed(entry)
+    if parsed is None:
+        # patterns changed since this entry was written: re-parse, don't re-OCR
+        ocr = cache.ocr_output(entry)
+        with stage('parse', path):
+            parsed = parse_ocr(ocr, path)
+        cache.put(digest, ocr, *parsed)
+        cache.reparsed += 1
+    return parsed
+
+def _finish_ocr(item, result, cache, worker_stats, tier_counts):
+    """Turn a finished OCR task into a ParsedImage, recording its stats and cache entry"""
+    path, digest = item
+    ocr, date, prices, tier, pid, elapsed, records = result
+    if pid != os.getpid():
+        instrumentation.add(records)
+    tier_counts[tier or 'failed'] = tier_counts.get(tier or 'failed', 0) + 1
+    stats = worker_stats.setdefault(pid, [0, 0.0])
+    stats[0] += 1
+    stats[1] += elapsed
+    if ocr is None:
+        return ParsedImage(path, digest, date, prices, 'failed')
+    if cache is not None:
+        cache.put(digest, ocr, date, prices)
+    return ParsedImage(path, digest, date, prices, 'ocr')
+
+def parse_stage(paths, workers=1, cache=None, manifest=None, worker_stats=None, dedup=None,
+                tier_counts=None):
+    """Yield a ParsedImage per path, in input order.
+
+    Manifest and cache hits are answered here, and so are images dedup
+    recognises as a copy of an earlier image (they take its result). The
+    dedup index starts with the images the manifest remembers, and cache
+    hits are added to it, so a copy still finds an original from an earlier
+    run. Only the rest are OCR'd, inline or in a process pool. At most
+    workers * OCR_QUEUE_DEPTH images are buffered at once, so a slow image
+    holds back the output but never the memory bound. tier_counts collects
+    how many images finished in each OCR tier.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from ocr_cache import file_digest
+
+    worker_stats = {} if worker_stats is None else worker_stats
+    tier_counts = {} if tier_counts is None else tier_counts
+    ocr_results = {}  # path -> (date, prices, source) of every OCR'd or cached image, for its duplicates
+    if dedup is not None and manifest is not None:
+        for path, signature in manifest.signatures():
+            dedup.load(path, signature)
+
+    def resolve(path):
+        digest = None
+        if manifest is not None:
+            result, digest = manifest.lookup(path)
+            if result is not None:
+                return ParsedImage(path, digest, *result, 'manifest')
+        if cache is not None:
+            digest = digest or file_digest(path)
+            result = _cached_result(cache, path, digest)
+            if result is not None:
+                if dedup is not None:
+                    with stage('dedup', path):
+                        dedup.remember(path)
+                return ParsedImage(path, digest, *result, 'cache')
+        if dedup is not None:
+            with stage('dedup', path):
+                rep = dedup.match(path)
+            if rep is not None:
+                logging.info("Duplicate: %s is a copy of %s", os.path.basename(path), os.path.basename(rep))
+                return Duplicate(path, digest, rep)
+        return path, digest
+
+    def pending(item):
+        return not isinstance(item, (ParsedImage, Duplicate))
+
+    def finish(item, result=None):
+        if isinstance(item, Duplicate):
+            # rep came earlier in walk order, so it has already been finished, or it is
+            # an image from an earlier run whose result the manifest remembers
+            date, prices, source = ocr_results.get(item.rep) or (*manifest.result(item.rep), 'manifest')
+            return ParsedImage(item.path, item.digest, date, prices,
+                               'failed' if source == 'failed' else 'duplicate')
+        if result is not None:
+            item = _finish_ocr(item, result, cache, worker_stats, tier_counts)
+        if dedup is not None and item.source in ('ocr', 'failed', 'cache'):
+            ocr_results[item.path] = (item.date, item.prices, item.source)
+        return item
+
+    if workers <= 1:
+        for path in paths:
+            item = resolve(path)
+            yield finish(item, _parse_image_task(path)) if pending(item) else finish(item)
+        return
+
+    window = workers * OCR_QUEUE_DEPTH
+    pool = None
+    queue = deque()  # ParsedImage, Duplicate, or ((path, digest), future) still being OCR'd
+
+    def pop():
+        head = queue.popleft()
+        return finish(head[0], head[1].result()) if pending(head) else finish(head)
+
+    try:
+        for path in paths:
+            item = resolve(path)
+            if pending(item):
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=workers)
+                item = (item, pool.submit(_parse_image_task, path))
+            queue.append(item)
+            while queue and (len(queue) >= window or not pending(queue[0]) or queue[0][1].done()):
+                yield pop()
+        while queue:
+            yield pop()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+def normalize_stage(items):
+    """Fill in a date for images whose card had none, from the file's modification time"""
+    for item in items:
+        if item.date is None:
+            item = item._replace(date=mtime_date(item.path))
+        yield item
+
+def log_worker_throughput(worker_stats, wall_seconds):
+    """Log images/sec per worker process and for the whole run"""
+    total = sum(n for n, _ in worker_stats.values())
+    for i, (pid, (n, busy)) in enumerate(sorted(worker_stats.items()), 1):
+        logging.info("Worker %d (pid %d): %d images, %.2fs busy, %.2f img/s",
+                     i, pid, n, busy, n / busy if busy else 0.0)
+    logging.info("OCR'd %d images in %.2fs with %d worker(s): %.2f img/s",
+                 total, wall_seconds, len(worker_stats),
+                 total / wall_seconds if wall_seconds else 0.0)
+
+def log_tier_distribution(tier_counts):
+    """Log how many OCR'd images finished in each tier, in OCR_TIERS order"""
+    total = sum(tier_counts.values())
+    order = [name for name, _, _ in OCR_TIERS] + ['fallback', 'failed']
+    logging.info("OCR tiers: %s", ', '.join(
+        f"{name} {tier_counts[name]} ({tier_counts[name] / total:.0%})" for name in order if name in tier_counts))
+
+def iter_parsed_images(input_folder, workers=None, cache=None, manifest=None):
+    """Stream normalized ParsedImages for every image under input_folder.
+
+    walk -> parse -> normalize, each stage a generator, so the first results
+    arrive before the last image is read. Manifest and cache bookkeeping is
+    finalised once the stream is exhausted. Near-duplicate images
+    (DEDUP_IMAGES) are OCR'd only once, also across runs when the manifest
+    remembers the original.
+    """
+    if workers is None:
+        workers = OCR_WORKERS
+    workers = max(1, int(workers))
+
+    worker_stats = {}
+    tier_counts = {}
+    start = time.perf_counter()
+    seen = 0
+    dedup = open_dedup()
+    parsed = parse_stage(iter_images(input_folder), workers, cache, manifest, worker_stats, dedup,
+                         tier_counts)
+    for item in normalize_stage(parsed):
+        seen += 1
+        if manifest is not None and item.source not in ('manifest', 'failed'):
+            signature = dedup.signatures.get(item.path) if dedup is not None else None
+            manifest.record(item.path, item.digest, item.date, item.prices, signature)
+        yield item
+
+    if manifest is not None:
+        # also when the folder is now empty, so deleted images drop out of the snapshot
+        manifest.finish()
+        manifest.save()
+    if not seen:
         logging.error("No image files found")
-        return {}
-    
-    records = {}
-    
-    for fn in files:
-        path = os.path.join(input_folder, fn)
-        logging.info("Processing: %s", fn)
-        
-        date, prices = parse_image(path)
-        
-        if date is None:
-            date = pd.to_datetime(os.path.getmtime(path), unit='s').date()
-        
-        if prices:
-            records.setdefault(date, {}).update(prices)
-    
-    return records
+        return
+    if worker_stats:
+        log_worker_throughput(worker_stats, time.perf_counter() - start)
+        log_tier_distribution(tier_counts)
+    if dedup is not None and dedup.hashed:
+        dedup.log_stats()
+    if cache is not None:
+        cache.log_stats()
+        cache.prune()
+
+def aggregate_records(items, store=None):
+    """Append a stream of ParsedImages to a PriceStore; later images win on the same date"""
+    from price_store import PriceStore
+    store = PriceStore() if store is None else store
+    for item in items:
+        store.append(item.date, item.prices)
+    return store
+
+@timed('process_folder')
+def process_folder(input_folder, workers=None, cache=None, manifest=None):
+    """Process all images in folder (and its subfolders).
+
+    With workers > 1 the OCR runs in a process pool, but results are merged
+    in walk order so records come out identical to a serial run.
+    Images listed unchanged in the manifest are not parsed at all, and images
+    already in the OCR cache are not sent to Tesseract again. Forwarded
+    copies of a card already ingested reuse its result.
+    Returns a PriceStore; store.to_records() gives the old {date: {variety: price}}.
+    """
+    return aggregate_records(iter_parsed_images(input_folder, workers, cache, manifest))
 
 
 # def fill_missing_weeks(df):
@@ -414,25 +982,15 @@ def process_folder(input_folder):
 
 #     return df
 
+@timed('fill_missing_weeks')
 def fill_missing_weeks(df):
-    full_index = pd.date_range(
-        start=df.index.min(),
-        end=df.index.max(),
-        freq='W-MON'
-    )
-
-    df = df.reindex(full_index)
-
-    actual_mask = df.notna()
-
-    df_filled = df.interpolate(
-        method='linear',
-        limit_direction='both'
-    ).ffill().bfill()
+    """Weekly (Monday) grid of prices with short gaps interpolated per GAP_MAX_WEEKS / GAP_POLICIES.
 
-    interp_mask = df_filled.notna() & (~actual_mask)
-
-    return df_filled, interp_mask
+    Returns (filled frame, interpolated mask).
+    """
+    from gapfill import GapPolicy, fill_frame
+    policies = {pattern: GapPolicy(*policy) for pattern, policy in GAP_POLICIES.items()}
+    return fill_frame(df, policies, GapPolicy(GAP_MAX_WEEKS, GAP_EXTRAPOLATE_WEEKS))
 
 
 
@@ -441,13 +999,25 @@ def fill_missing_weeks(df):
 # GENERATE JSON
 # ============================================================================
 
+def price_section(label):
+    """Arrivals section ('AC' or 'New Crop') a price column belongs to, from the parser's tag"""
+    return 'New Crop' if label.endswith(NEW_CROP_SUFFIX) else 'AC'
+
+@timed('generate_json_data')
 def generate_json_data(records, output_path):
     """Generate JSON"""
+    import numpy as np
+    import pandas as pd
+    import analytics
+    from gapfill import snap_to_grid
     
     # df = pd.DataFrame.from_dict(records, orient='index').sort_index()
-    df = pd.DataFrame.from_dict(records, orient='index')
-    df.index = pd.to_datetime(df.index)
-    df = df.sort_index()
+    dates, labels, values = records.matrix()
+    df = pd.DataFrame(values, index=pd.DatetimeIndex(dates), columns=labels)
+    # arrival counts are stored alongside the prices; they are volumes, not a variety
+    arrival_cols = [c for c in df.columns if c.startswith(ARRIVALS_PREFIX)]
+    bags = df[arrival_cols].rename(columns=lambda c: c[len(ARRIVALS_PREFIX):])
+    df = df.drop(columns=arrival_cols).dropna(how='all')
 
     # 🔥 NEW: fill missing weekly data
     # df = fill_missing_weeks(df)
@@ -465,51 +1035,53 @@ def generate_json_data(records, output_path):
     logging.info("Detected %d varieties, %d dates", len(all_varieties), len(all_dates))
     logging.info("Varieties: %s", ', '.join(all_varieties))
     
+    df = df[all_varieties]
+    interp_mask = interp_mask[all_varieties]
+    values = df.to_numpy(dtype=float)
+    interpolated = interp_mask.to_numpy(dtype=bool)
+    dates = [d.strftime('%d %b %Y') for d in df.index]
+    metrics = analytics.compute_metrics(values, interpolated, dates)
+    bags = snap_to_grid(bags).reindex(index=df.index, columns=list(ARRIVAL_SECTIONS)).to_numpy(dtype=float)
+    index = analytics.arrivals_index(np.where(interpolated, np.nan, values),
+                                     [price_section(v) for v in all_varieties],
+                                     dict(zip(ARRIVAL_SECTIONS, bags.T)))
+    
     output = {
-        "dates": [d.strftime('%d %b %Y') for d in df.index],
+        "dates": dates,
         "varieties": all_varieties,
-        "ac_prices": {},
-        "interpolated": {},
-        "wow_change": {},
+        "ac_prices": analytics.json_columns(values, all_varieties),
+        "interpolated": dict(zip(all_varieties, interpolated.T.tolist())),
+        "wow_change": analytics.json_columns(metrics['wow_change'], all_varieties),
+        "mom_change": analytics.json_columns(metrics['mom_change'], all_varieties),
+        "rolling_avg": {w: analytics.json_columns(m, all_varieties)
+                        for w, m in metrics['rolling_avg'].items()},
+        "stats": {
+            "min": analytics.json_values(metrics['min'], all_varieties),
+            "max": analytics.json_values(metrics['max'], all_varieties),
+            "min_date": dict(zip(all_varieties, metrics['min_date'])),
+            "max_date": dict(zip(all_varieties, metrics['max_date'])),
+            "volatility": analytics.json_values(metrics['volatility'], all_varieties),
+        },
+        # bags per section, and prices weighted by them (only quoted prices count)
+        "arrivals": analytics.json_columns(bags, ARRIVAL_SECTIONS),
+        "arrivals_index": analytics.json_columns(
+            np.column_stack([index['index']] + list(index['section_avg'].values())),
+            ['market', *index['section_avg']]),
+        "arrivals_weighted_avg": analytics.json_values(list(index['weighted_avg'].values()),
+                                                       list(index['weighted_avg'])),
+        **analytics.dashboard_aggregates(values, metrics, all_varieties, dates),
         "last_updated": datetime.utcnow().isoformat() + 'Z'
     }
-
-
-    
-    for var in all_varieties:
-        series = df[var] if var in df.columns else pd.Series([np.nan] * len(all_dates), index=all_dates)
-        series = series.reindex(all_dates)
-        # output["ac_prices"][var] = [float(v) if pd.notna(v) else None for v in series.values]
-        # prices = series.values.tolist()
-        # interp_flags = interp_mask[var].fillna(False).values.tolist()
-        prices = [
-            float(v) if pd.notna(v) else None
-            for v in series.values
-        ]
-
-        interp_flags = [
-            bool(v) if pd.notna(v) else False
-            for v in interp_mask[var].values
-        ]
-
-
-        # Week-on-week %
-        wow = []
-        for i in range(len(prices)):
-            if i == 0 or prices[i] is None or prices[i-1] is None:
-                wow.append(None)
-            else:
-                wow.append(round(((prices[i] - prices[i-1]) / prices[i-1]) * 100, 2))
-
-        output["ac_prices"][var] = prices
-        output["interpolated"][var] = interp_flags
-        output["wow_change"][var] = wow
-
-        # output["new_prices"][var] = [None] * len(all_dates)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        # json.dump(output, f, indent=2, ensure_ascii=False)
-        json.dump(output, f, indent=2, ensure_ascii=False, allow_nan=False)
+    if JSON_FORMAT == 'compact':
+        size = compact_json.write(compact_json.encode(output), output_path, JSON_SIDECARS)
+        logging.info("Compact JSON: %d bytes", size)
+    else:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            # json.dump(output, f, indent=2, ensure_ascii=False)
+            json.dump(output, f, indent=2, ensure_ascii=False, allow_nan=False)
+    if JSON_SPLIT:
+        compact_json.write_split(output, os.path.dirname(output_path), JSON_SIDECARS)
 
     
     logging.info("JSON saved: %s", output_path)
@@ -808,11 +1380,106 @@ HTML_TEMPLATE = """<!DOCTYPE html>
         let trendChart = null;
         let latestChart = null;
         
+        // Set by generate_html: load latest.json first, then the per-season history shards
+        const SPLIT_DATA = __SPLIT_DATA__;
+        const MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
+        
+        // Inverse of compact_json.delta_encode: deltas, with [n] for a run of n nulls
+        function deltaDecode(tokens, scale) {
+            const values = [];
+            let prev = 0;
+            for (const t of tokens) {
+                if (Array.isArray(t)) {
+                    for (let i = 0; i < t[0]; i++) values.push(null);
+                } else {
+                    prev += t;
+                    values.push(scale === 1 ? prev : prev / scale);
+                }
+            }
+            return values;
+        }
+        
+        function runDecode(runs) {
+            const flags = [];
+            let flag = false;
+            for (const n of runs) {
+                for (let i = 0; i < n; i++) flags.push(flag);
+                flag = !flag;
+            }
+            return flags;
+        }
+        
+        function formatDay(day) {
+            const d = new Date(day * 86400000);
+            return String(d.getUTCDate()).padStart(2, '0') + ' ' + MONTHS[d.getUTCMonth()] + ' ' + d.getUTCFullYear();
+        }
+        
+        // Turn compact_json output back into the plain data.json shape
+        function decodeData(raw) {
+            if (raw.format !== 'compact-1') return raw;
+            const data = { rowKeys: [] };
+            for (const [key, value] of Object.entries(raw)) {
+                if (!['format', 'days', 'series', 'flags'].includes(key)) data[key] = value;
+            }
+            data.dates = deltaDecode(raw.days, 1).map(formatDay);
+            for (const [key, s] of Object.entries(raw.series)) {
+                const cols = {};
+                for (const [v, tokens] of Object.entries(s.data)) cols[v] = deltaDecode(tokens, s.scale);
+                const [name, sub] = key.split('.');
+                if (sub === undefined) data[name] = cols;
+                else (data[name] = data[name] || {})[sub] = cols;
+                if (!data.rowKeys.includes(name)) data.rowKeys.push(name);
+            }
+            for (const [key, f] of Object.entries(raw.flags)) {
+                data[key] = {};
+                for (const [v, runs] of Object.entries(f)) data[key][v] = runDecode(runs);
+                data.rowKeys.push(key);
+            }
+            return data;
+        }
+        
+        // Join history shards (oldest first) into one dataset; other keys come from latest
+        function mergeShards(latest, shards) {
+            const data = Object.assign({}, latest, { dates: [] });
+            // names: the columns latest has for this series (varieties, or e.g. arrival sections)
+            const concat = (target, cols, n, names) => {
+                names.forEach(v => {
+                    target[v] = (target[v] || []).concat(cols[v] || new Array(n).fill(null));
+                });
+            };
+            latest.rowKeys.forEach(key => {
+                const nested = !Array.isArray(Object.values(latest[key])[0]);
+                data[key] = {};
+                shards.forEach(shard => {
+                    const n = shard.dates.length;
+                    if (nested) {
+                        for (const [sub, cols] of Object.entries(shard[key] || {})) {
+                            concat(data[key][sub] = data[key][sub] || {}, cols, n,
+                                   Object.keys(latest[key][sub] || cols));
+                        }
+                    } else {
+                        concat(data[key], shard[key] || {}, n, Object.keys(latest[key]));
+                    }
+                });
+            });
+            shards.forEach(shard => { data.dates = data.dates.concat(shard.dates); });
+            return data;
+        }
+        
+        async function fetchData(url) {
+            const response = await fetch(url);
+            if (!response.ok) throw new Error('Failed to load ' + url);
+            return decodeData(await response.json());
+        }
+        
+        function renderAll() {
+            updateChart();
+            updateTable();
+        }
+        
         async function loadData() {
             try {
-                const response = await fetch('data.json');
-                if (!response.ok) throw new Error('Failed to load data');
-                globalData = await response.json();
+                globalData = await fetchData(SPLIT_DATA ? 'latest.json' : 'data.json');
                 
                 if (!globalData.varieties || globalData.varieties.length === 0) {
                     document.body.innerHTML = '<div style="padding:20px; color:red; font-size:18px;">❌ No varieties found. Run Python script again.</div>';
@@ -832,9 +1499,15 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 
                 
                 populateVarietySelect();
-                updateChart();
-                updateTable();
-                updateStats();
+                renderAll();
+                
+                if (SPLIT_DATA && globalData.shards) {
+                    const shards = await Promise.all(globalData.shards.map(fetchData));
+                    globalData = mergeShards(globalData, shards);
+                    renderAll();
+                }
+                
+                if (location.search.includes('perf')) chartBenchmark();
             } catch (error) {
                 console.error('Error:', error);
                 document.body.innerHTML = '<div style="padding:20px; color:red;">Error: ' + error + '</div>';
@@ -851,64 +1524,75 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             });
         }
         
-        function updateChart() {
-            const varietySelect = document.getElementById('varietySelect').value;
-            const chartType = document.getElementById('chartTypeSelect').value;
-            
-            let varieties = varietySelect ? [varietySelect] : globalData.varieties;
-            let labels = globalData.dates;
-            let datasets = [];
+        // Datasets are built the first time a variety is shown and reused afterwards
+        let datasetCache = {};
+        let datasetCacheFor = null;
+        let latestChartFor = null;
+        // 'recreate' is the old destroy-and-rebuild path, kept so chartBenchmark() can compare
+        let chartMode = 'in-place';
+        const DECIMATE_AFTER = 200;  // points; longer series are thinned (LTTB) before drawing
+        
+        // Points are {x: row index, y: price}, so the row survives downsampling and decimation
+        const rowOf = (ctx) => ctx.raw ? ctx.raw.x : ctx.dataIndex;
+        
+        function getDataset(v) {
+            if (datasetCacheFor !== globalData) {
+                datasetCache = {};
+                datasetCacheFor = globalData;
+            }
+            if (datasetCache[v]) return datasetCache[v];
             
-            varieties.forEach((v, idx) => {
-                const prices = globalData.ac_prices[v] || [];
-
-                
+            const idx = globalData.varieties.indexOf(v);
+            const color = `hsl(${idx * 60}, 70%, 50%)`;
             const interp = globalData.interpolated[v] || [];
-
-            datasets.push({
+            // Long histories come pre-reduced (LTTB) from the generator
+            const down = globalData.downsampled;
+            const reduced = down && down.series && down.length === globalData.dates.length ? down.series[v] : null;
+            const data = reduced
+                ? reduced.idx.map((i, k) => ({ x: i, y: reduced.y[k] }))
+                : (globalData.ac_prices[v] || []).map((y, i) => ({ x: i, y }));
+            
+            datasetCache[v] = {
                 label: v,
-                data: prices,
-                borderColor: `hsl(${idx * 60}, 70%, 50%)`,
+                data,
+                borderColor: color,
                 backgroundColor: `hsla(${idx * 60}, 70%, 50%, 0.1)`,
                 tension: 0.3,
                 fill: false,
                 borderWidth: 2,
-
-                pointRadius: (ctx) =>
-                    interp[ctx.dataIndex] ? 3 : 6,
-
-                pointBackgroundColor: (ctx) =>
-                    interp[ctx.dataIndex] ? '#ffffff' : `hsl(${idx * 60}, 70%, 50%)`,
-
-                pointBorderWidth: (ctx) =>
-                    interp[ctx.dataIndex] ? 2 : 0,
-
-                pointBorderColor: `hsl(${idx * 60}, 70%, 50%)`
-            });
-
-
-            });
-            
-            const ctx = document.getElementById('trendChart').getContext('2d');
-            if (trendChart) trendChart.destroy();
-            
-            trendChart = new Chart(ctx, {
-            type: chartType,
-            data: { labels, datasets },
-            options: {
+                pointRadius: (ctx) => interp[rowOf(ctx)] ? 3 : 6,
+                pointBackgroundColor: (ctx) => interp[rowOf(ctx)] ? '#ffffff' : color,
+                pointBorderWidth: (ctx) => interp[rowOf(ctx)] ? 2 : 0,
+                pointBorderColor: color
+            };
+            return datasetCache[v];
+        }
+        
+        function trendOptions(chartType) {
+            return {
                 responsive: true,
                 maintainAspectRatio: true,
+                // data is already {x, y}: skip parsing, which decimation requires
+                parsing: false,
+                normalized: true,
 
                 plugins: {
                     legend: {
                         display: true,
                         position: 'top'
                     },
+                    decimation: {
+                        enabled: true,
+                        algorithm: 'lttb',
+                        samples: DECIMATE_AFTER,
+                        threshold: DECIMATE_AFTER
+                    },
                     tooltip: {
                         callbacks: {
+                            title: (items) => items.length ? globalData.dates[rowOf(items[0])] : '',
                             label: function (ctx) {
                                 const v = ctx.dataset.label;
-                                const idx = ctx.dataIndex;
+                                const idx = rowOf(ctx);
                                 const price = ctx.parsed.y;
                                 const isInterp = globalData.interpolated[v]?.[idx];
                                 if (price === null) return `${v}: -`;
@@ -919,28 +1603,73 @@ HTML_TEMPLATE = """<!DOCTYPE html>
                 },
 
                 scales: {
+                    x: {
+                        type: 'linear',
+                        offset: chartType === 'bar',
+                        ticks: {
+                            precision: 0,
+                            callback: (value) => Number.isInteger(value) ? (globalData.dates[value] || '') : ''
+                        }
+                    },
                     y: { beginAtZero: false }
                 }
+            };
+        }
+        
+        function updateChart() {
+            const varietySelect = document.getElementById('varietySelect').value;
+            const chartType = document.getElementById('chartTypeSelect').value;
+            
+            const varieties = varietySelect ? [varietySelect] : globalData.varieties;
+            const datasets = varieties.map(getDataset);
+            
+            if (trendChart && chartMode === 'recreate') {
+                trendChart.destroy();
+                trendChart = null;
+            }
+            
+            if (trendChart) {
+                // Mutate the live chart: no reallocation, no entry animation
+                trendChart.config.type = chartType;
+                trendChart.data.datasets = datasets;
+                trendChart.options.scales.x.offset = chartType === 'bar';
+                trendChart.update('none');
+            } else {
+                const ctx = document.getElementById('trendChart').getContext('2d');
+                trendChart = new Chart(ctx, {
+                    type: chartType,
+                    data: { datasets },
+                    options: trendOptions(chartType)
+                });
             }
-        });
-
             
             updateLatestChart();
+            updateStats();
         }
         
         function updateLatestChart() {
-            const lastIdx = globalData.dates.length - 1;
+            // The latest prices only change when new data is loaded
+            if (latestChart && latestChartFor === globalData && chartMode !== 'recreate') return;
+            latestChartFor = globalData;
+            
             let labels = [];
             let data = [];
             
             globalData.varieties.forEach(v => {
-                const price = globalData.ac_prices[v]?.[lastIdx];
+                const price = globalData.latest.prices[v];
                 if (price) {
                     labels.push(v);
                     data.push(price);
                 }
             });
             
+            if (latestChart && chartMode !== 'recreate') {
+                latestChart.data.labels = labels;
+                latestChart.data.datasets[0].data = data;
+                latestChart.update('none');
+                return;
+            }
+            
             const ctx = document.getElementById('latestChart').getContext('2d');
             if (latestChart) latestChart.destroy();
             
@@ -965,18 +1694,53 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             });
         }
         
+        function nextFrame() {
+            // two rAFs: the first runs before the paint, the second after it
+            return new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+        }
+        
+        // Time from a dropdown change to the next painted frame, old path vs in-place.
+        // Run from the console, or open the page with ?perf
+        async function chartBenchmark(rounds = 3) {
+            const select = document.getElementById('varietySelect');
+            const original = select.value;
+            const results = {};
+            for (const mode of ['recreate', 'in-place']) {
+                chartMode = mode;
+                const times = [];
+                for (let r = 0; r < rounds; r++) {
+                    for (const v of ['', ...globalData.varieties]) {
+                        select.value = v;
+                        const t0 = performance.now();
+                        updateChart();
+                        await nextFrame();
+                        times.push(performance.now() - t0);
+                    }
+                }
+                times.sort((a, b) => a - b);
+                results[mode] = {
+                    updates: times.length,
+                    mean_ms: +(times.reduce((a, b) => a + b, 0) / times.length).toFixed(1),
+                    p95_ms: +times[Math.min(times.length - 1, Math.floor(times.length * 0.95))].toFixed(1)
+                };
+            }
+            chartMode = 'in-place';
+            select.value = original;
+            updateChart();
+            console.table(results);
+            return results;
+        }
+        
         function updateTable() {
             const tbody = document.getElementById('tableBody');
             tbody.innerHTML = '';
             
-            const lastIdx = globalData.dates.length - 1;
-            const prevIdx = lastIdx > 0 ? lastIdx - 1 : lastIdx;
+            const latest = globalData.latest;
             
             globalData.varieties.forEach(v => {
-                const lastPrice = globalData.ac_prices[v]?.[lastIdx];
-                const prevPrice = globalData.ac_prices[v]?.[prevIdx];
+                const lastPrice = latest.prices[v];
                 // const change = lastPrice && prevPrice ? lastPrice - prevPrice : null;
-                const wow = globalData.wow_change[v]?.[lastIdx];
+                const wow = latest.wow[v];
                 
                 const tr = document.createElement('tr');
                 tr.innerHTML = `
@@ -998,44 +1762,35 @@ HTML_TEMPLATE = """<!DOCTYPE html>
             const statsContainer = document.getElementById('statsContainer');
             statsContainer.innerHTML = '';
             
-            const lastIdx = globalData.dates.length - 1;
-            
-            let topPrice = { variety: '', price: 0 };
-            let avgPrice = 0;
-            let count = 0;
-            
-            globalData.varieties.forEach(v => {
-                const price = globalData.ac_prices[v]?.[lastIdx];
-                if (price) {
-                    if (price > topPrice.price) topPrice = { variety: v, price };
-                    avgPrice += price;
-                    count++;
-                }
-            });
+            const latest = globalData.latest;
+            const selected = document.getElementById('varietySelect').value;
+            const block = selected ? globalData.variety_stats[selected] : null;
+            const fmt = (p) => p !== null && p !== undefined ? '₹' + p.toLocaleString() : '-';
+            const pct = (w) => w !== null && w !== undefined ? (w > 0 ? '+' : '') + w + '%' : '-';
             
-            avgPrice = count > 0 ? Math.round(avgPrice / count) : 0;
-            
-            const stats = [
-                { label: 'Top Price', value: topPrice.variety, subtext: '₹' + topPrice.price.toLocaleString() },
-                { label: 'Avg Price', value: '₹' + avgPrice.toLocaleString(), subtext: '' },
+            const stats = block ? [
+                { label: 'Latest Price', value: fmt(block.latest), subtext: selected },
+                { label: 'WoW Change', value: pct(block.wow), subtext: 'week-on-week' },
+                { label: 'MoM Change', value: pct(block.mom), subtext: '4 weeks' },
+                { label: 'Low', value: fmt(block.min), subtext: block.min_date || '' },
+                { label: 'High', value: fmt(block.max), subtext: block.max_date || '' },
+                { label: 'Volatility', value: pct(block.volatility).replace('+', ''), subtext: 'std of weekly change' }
+            ] : [
+                { label: 'Top Price', value: latest.top ? latest.top.variety : '', subtext: '₹' + (latest.top ? latest.top.price : 0).toLocaleString() },
+                { label: 'Avg Price', value: '₹' + latest.avg_price.toLocaleString(), subtext: '' },
                 { label: 'Total Varieties', value: globalData.varieties.length, subtext: 'tracked' },
-                { label: 'Latest Date', value: globalData.dates[lastIdx], subtext: '' },
-                {
-                label: 'Avg WoW Change',
-                value: (() => {
-                    const vals = globalData.varieties
-                        .map(v => globalData.wow_change[v]?.[lastIdx])
-                        .filter(v => v !== null);
-                    if (vals.length === 0) return '0%';
-                    const avg = Math.round(vals.reduce((a,b)=>a+b,0) / vals.length);
-                    return avg + '%';
-                })(),
-                subtext: 'week-on-week'
-                }
-
-
+                { label: 'Latest Date', value: latest.date, subtext: '' },
+                { label: 'Avg WoW Change', value: latest.avg_wow + '%', subtext: 'week-on-week' }
             ];
             
+            const movers = globalData.movers;
+            if (!block && movers.up.length) {
+                stats.push({ label: 'Top Gainer', value: movers.up[0].variety, subtext: pct(movers.up[0].wow) });
+            }
+            if (!block && movers.down.length) {
+                stats.push({ label: 'Top Loser', value: movers.down[0].variety, subtext: pct(movers.down[0].wow) });
+            }
+            
             stats.forEach(stat => {
                 const div = document.createElement('div');
                 div.className = 'stat-card';
@@ -1060,36 +1815,161 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </html>
 """
 
-def generate_html(output_path):
+@timed('generate_html')
+def generate_html(output_path, split=None):
+    """Write the dashboard; split=True makes it load latest.json first, then the history shards"""
+    split = JSON_SPLIT if split is None else split
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(HTML_TEMPLATE)
+        f.write(HTML_TEMPLATE.replace('__SPLIT_DATA__', 'true' if split else 'false'))
     logging.info("HTML generated")
 
 # ============================================================================
 # MAIN
 # ============================================================================
 
-def main():
-    logging.info("Starting dashboard generation...")
+# Settings that default to a path next to INPUT_FOLDER, and follow it when --input moves it
+_INPUT_SIBLINGS = {
+    'OCR_CACHE_DIR': 'ocr_cache',
+    'INGEST_MANIFEST': 'ingest_manifest.json',
+    'PRICE_STORE': 'price_store',
+}
+
+# command-line option -> setting it overrides
+_OPTION_SETTINGS = {
+    'cache': 'OCR_CACHE_DIR',
+    'manifest': 'INGEST_MANIFEST',
+    'store': 'PRICE_STORE',
+    'report': 'RUN_REPORT',
+    'workers': 'OCR_WORKERS',
+    'json_format': 'JSON_FORMAT',
+    'profile': 'PROFILER',
+}
+
+def _path_or_none(value):
+    """Path option; 'none' disables the feature, like setting the constant to None"""
+    return None if value.lower() == 'none' else value
+
+def configure(args):
+    """Apply command-line paths and options to the module settings.
+
+    A new --input moves the OCR cache, manifest and price store along with it
+    unless they are set explicitly (or disabled); a new --output moves the run report.
+    """
+    settings = globals()
+    given = vars(args)  # options left off the command line are absent, not None
+    if 'input' in given:
+        old_base = os.path.dirname(INPUT_FOLDER)
+        new_base = os.path.dirname(os.path.abspath(args.input))
+        for name, leaf in _INPUT_SIBLINGS.items():
+            if settings[name] == os.path.join(old_base, leaf):
+                settings[name] = os.path.join(new_base, leaf)
+        settings['INPUT_FOLDER'] = args.input
+    if 'output' in given:
+        if RUN_REPORT == os.path.join(OUTPUT_FOLDER, 'run_report'):
+            settings['RUN_REPORT'] = os.path.join(args.output, 'run_report')
+        settings['OUTPUT_FOLDER'] = args.output
+    for option, name in _OPTION_SETTINGS.items():
+        if option in given:
+            settings[name] = given[option]
+    if 'split' in given:
+        settings['JSON_SPLIT'] = True
+
+def run_ocr():
+    """OCR and parse the image archive into the price store; returns the store, or None"""
+    records = process_folder(INPUT_FOLDER, workers=OCR_WORKERS, cache=open_ocr_cache(),
+                             manifest=open_ingest_manifest(INPUT_FOLDER))
     
-    records = process_folder(INPUT_FOLDER)
+    # saved even when empty, so images deleted from the archive stop being served
+    if PRICE_STORE:
+        with stage('save_store'):
+            records.save(PRICE_STORE)
     
     if not records:
         logging.error("No data extracted!")
-        return
+        return None
+    return records
+
+def run_build_json(records=None):
+    """Write data.json from a PriceStore (by default the one the ocr command saved); returns the data"""
+    if records is None:
+        if not PRICE_STORE or not os.path.exists(os.path.join(PRICE_STORE, 'labels.json')):
+            logging.error("No price store at %s; run the 'ocr' command first", PRICE_STORE)
+            return None
+        from price_store import PriceStore
+        records = PriceStore(PRICE_STORE)
     
     json_path = os.path.join(OUTPUT_FOLDER, 'data.json')
     data = generate_json_data(records, json_path)
     
     if not data or not data.get('varieties'):
         logging.error("No varieties in data!")
-        return
-    
+        return None
+    return data
+
+def run_build_html():
+    """Write index.html; needs none of the OCR or data stack"""
     html_path = os.path.join(OUTPUT_FOLDER, 'index.html')
     generate_html(html_path)
+    return html_path
+
+def run_all():
+    logging.info("Starting dashboard generation...")
+    
+    records = run_ocr()
+    if records is None:
+        return None
+    
+    data = run_build_json(records)
+    if data is None:
+        return None
+    
+    run_build_html()
     
     logging.info("SUCCESS! Generated %d varieties", len(data['varieties']))
     logging.info("Upload data.json and index.html to GitHub!")
+    return data
+
+COMMANDS = {
+    'ocr': run_ocr,
+    'build-json': run_build_json,
+    'build-html': run_build_html,
+    'all': run_all,
+}
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Byadgi chilli price dashboard generator",
+                                 argument_default=argparse.SUPPRESS)
+    ap.add_argument('command', nargs='?', default='all', choices=COMMANDS,
+                    help="ocr: images -> price store; build-json: price store -> data.json; "
+                         "build-html: index.html; all (default): the three in turn")
+    ap.add_argument('--input', help=f"folder of rate card images (default {INPUT_FOLDER})")
+    ap.add_argument('--output', help=f"folder for data.json, index.html and logs (default {OUTPUT_FOLDER})")
+    ap.add_argument('--store', type=_path_or_none, help="price store folder, or 'none'")
+    ap.add_argument('--cache', type=_path_or_none, help="OCR cache folder, or 'none'")
+    ap.add_argument('--manifest', type=_path_or_none, help="ingest manifest file, or 'none' for a full rebuild")
+    ap.add_argument('--report', type=_path_or_none, help="run report base path, or 'none'")
+    ap.add_argument('--workers', type=int, help="OCR worker processes")
+    ap.add_argument('--json-format', choices=('pretty', 'compact'))
+    ap.add_argument('--split', action='store_true', help="also write latest.json and history shards")
+    ap.add_argument('--profile', choices=('cprofile', 'pyinstrument'), help="dump a profile of the run")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure(args)
+    setup_logging(OUTPUT_FOLDER)
+    if args.command == 'build-html':
+        # nothing worth a run report; keep the last real run's report
+        return 0 if run_build_html() else 1
+
+    instrumentation.reset()
+    try:
+        with instrumentation.profiled(PROFILER, RUN_REPORT or os.path.join(OUTPUT_FOLDER, 'run_report')):
+            result = COMMANDS[args.command]()
+    finally:
+        if RUN_REPORT:
+            instrumentation.write_report(RUN_REPORT)
+    return 0 if result is not None else 1
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Compact encoding of the dashboard's data.json.
+
+The plain output repeats every date as a string and puts every price on its
+own line. The compact form keeps the same content but encodes it:
+
+  * dates become day numbers (days since 1970-01-01), delta-encoded;
+  * each series is scaled to integers (x1, or x100 when it has decimals) and
+    delta-encoded, with a run of n nulls written as [n];
+  * boolean flags (interpolated) become alternating run lengths, starting
+    with a run of false.
+
+Files are written without indentation, with .gz (and .br, when the brotli
+package is installed) sidecars for servers that serve pre-compressed files.
+write_split() additionally writes a small latest.json with the last few weeks
+for first paint, plus one history shard per season. The dashboard's
+decodeData() in HTML_TEMPLATE turns all of these back into the plain form.
+"""
+
+import os
+import gzip
+import json
+import logging
+from datetime import date as date_type, datetime
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FORMAT = 'compact-1'
+DATE_FORMAT = '%d %b %Y'  # how generate_json_data formats output['dates']
+LATEST_WEEKS = 13
+SEASON_START_MONTH = 10  # a season runs October to September, e.g. "2024-25"
+
+_EPOCH = date_type(1970, 1, 1)
+
+
+def delta_encode(values, scale=1):
+    """[first, delta, delta, [n_nulls], delta, ...] for a list of numbers/None"""
+    tokens = []
+    prev = 0
+    nulls = 0
+    for v in values:
+        if v is None:
+            nulls += 1
+            continue
+        if nulls:
+            tokens.append([nulls])
+            nulls = 0
+        n = round(v * scale)
+        tokens.append(n - prev)
+        prev = n
+    if nulls:
+        tokens.append([nulls])
+    return tokens
+
+
+def delta_decode(tokens, scale=1):
+    """Inverse of delta_encode"""
+    values = []
+    prev = 0
+    for t in tokens:
+        if isinstance(t, list):
+            values.extend([None] * t[0])
+        else:
+            prev += t
+            values.append(prev if scale == 1 else prev / scale)
+    return values
+
+
+def run_lengths(flags):
+    """Alternating run lengths of a boolean list, the first run being False (possibly 0)"""
+    runs = []
+    current = False
+    count = 0
+    for f in flags:
+        if bool(f) != current:
+            runs.append(count)
+            current = not current
+            count = 0
+        count += 1
+    runs.append(count)
+    return runs
+
+
+def _scale(columns):
+    """1 when every value is a whole number, else 100 (two decimals)"""
+    for values in columns:
+        for v in values:
+            if v is not None and v != int(v):
+                return 100
+    return 1
+
+
+def _day(label):
+    return (datetime.strptime(label, DATE_FORMAT).date() - _EPOCH).days
+
+
+def _row_keys(output):
+    """Keys holding per-week series: {name: [...]}, or one level deeper for rolling windows.
+
+    Names are usually the varieties, but any dict of week-length lists of
+    numbers (arrivals per section, say) is a series too.
+    """
+    n = len(output['dates'])
+
+    def is_series(values):
+        return (isinstance(values, list) and len(values) == n
+                and all(v is None or isinstance(v, (int, float)) for v in values))
+
+    def is_columns(value):
+        return isinstance(value, dict) and value and all(is_series(v) for v in value.values())
+
+    keys = []
+    for key, value in output.items():
+        if not isinstance(value, dict) or not value:
+            continue
+        if is_columns(value) or all(is_columns(v) for v in value.values()):
+            keys.append(key)
+    return keys
+
+
+def encode(output):
+    """Compact form of a generate_json_data output dict"""
+    row_keys = _row_keys(output)
+    compact = {'format': FORMAT, 'days': delta_encode([_day(d) for d in output['dates']])}
+    series = {}
+    flags = {}
+    for key, value in output.items():
+        if key == 'dates':
+            continue
+        if key not in row_keys:
+            compact[key] = value
+            continue
+        first = next(iter(value.values()))
+        if isinstance(first, dict):
+            for sub, columns in value.items():
+                scale = _scale(columns.values())
+                series[f'{key}.{sub}'] = {'scale': scale, 'data': {
+                    v: delta_encode(values, scale) for v, values in columns.items()}}
+        elif all(isinstance(x, bool) for values in value.values() for x in values):
+            flags[key] = {v: run_lengths(values) for v, values in value.items()}
+        else:
+            scale = _scale(value.values())
+            series[key] = {'scale': scale, 'data': {
+                v: delta_encode(values, scale) for v, values in value.items()}}
+    compact['series'] = series
+    compact['flags'] = flags
+    return compact
+
+
+def slice_rows(output, start, stop, keep=True):
+    """Copy of an output dict restricted to weeks [start, stop).
+
+    keep=False drops the keys that are not per-week series (stats and the like),
+    which history shards leave to latest.json.
+    """
+    row_keys = _row_keys(output)
+    part = {}
+    for key, value in output.items():
+        if key == 'dates':
+            part[key] = value[start:stop]
+        elif key in row_keys:
+            first = next(iter(value.values()))
+            if isinstance(first, dict):
+                part[key] = {sub: {v: vals[start:stop] for v, vals in cols.items()}
+                             for sub, cols in value.items()}
+            else:
+                part[key] = {v: vals[start:stop] for v, vals in value.items()}
+        elif keep or key == 'varieties':
+            part[key] = value
+    return part
+
+
+def season_of(label):
+    """Season name ("2024-25") for a formatted date"""
+    d = datetime.strptime(label, DATE_FORMAT).date()
+    year = d.year if d.month >= SEASON_START_MONTH else d.year - 1
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+def write(data, path, sidecars=True):
+    """Write JSON without whitespace, plus .gz/.br copies; returns the byte size"""
+    raw = json.dumps(data, ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode('utf-8')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(raw)
+    if sidecars:
+        # mtime=0 keeps the .gz byte-identical between runs with the same data
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(raw))
+    return len(raw)
+
+
+def write_split(output, folder, sidecars=True, latest_weeks=None):
+    """Write latest.json (the last few weeks plus stats) and history/<season>.json shards"""
+    latest_weeks = LATEST_WEEKS if latest_weeks is None else latest_weeks
+    dates = output['dates']
+    shards = []
+    start = 0
+    while start < len(dates):
+        season = season_of(dates[start])
+        stop = start
+        while stop < len(dates) and season_of(dates[stop]) == season:
+            stop += 1
+        name = f'history/{season}.json'
+        size = write(encode(slice_rows(output, start, stop, keep=False)),
+                     os.path.join(folder, 'history', season + '.json'), sidecars)
+        shards.append(name)
+        logging.info("History shard %s: %d weeks, %d bytes", name, stop - start, size)
+        start = stop
+
+    latest = encode(slice_rows(output, max(0, len(dates) - latest_weeks), len(dates)))
+    latest['shards'] = shards
+    size = write(latest, os.path.join(folder, 'latest.json'), sidecars)
+    logging.info("latest.json: %d weeks, %d bytes", min(latest_weeks, len(dates)), size)
+    return shards
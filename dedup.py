@@ -0,0 +1,220 @@
+"""
+Near-duplicate detection for forwarded rate-card images.
+
+The same card is forwarded and saved many times ("WhatsApp Image ... (2).jpeg"),
+often re-encoded along the way, so the copies are not byte-identical and
+miss the OCR cache. Deduplicator.match() finds an earlier image showing the
+same card, so a copy can reuse its result instead of being OCR'd again.
+
+Every image is reduced once to a small grayscale thumbnail (JPEGs are
+decoded at reduced scale). A 64-bit dHash of the thumbnail goes into a
+BK-tree, which returns the earlier images within a Hamming radius without
+comparing against all of them.
+
+A perceptual hash alone is not enough here. Cards from different days share
+one template and differ only in their digits, and those hash to the same
+value. So a candidate only counts as a copy when it also has the same pixel
+size and no thumbnail pixel differs by more than max_diff grey levels. A
+re-encode changes every pixel a little; a changed price or date changes a
+few pixels a lot.
+
+The index keeps only (path, pixel size, hash) per image, so it can hold a
+whole archive and be reloaded from the ingest manifest on the next run. The
+thumbnails needed to confirm a match sit in a small LRU and are re-read from
+disk when they have been evicted. To keep those re-reads rare, each image
+also keeps a sketch of 4x4 block means (about 1 KB): block means of a true
+copy can differ by no more than its pixels do, so a candidate whose sketch
+is already too far off is rejected without touching its thumbnail.
+"""
+
+import logging
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+THUMB_WIDTH = 144
+HASH_SIZE = 8  # dHash grid: HASH_SIZE x HASH_SIZE bits
+THUMB_CACHE = 512  # thumbnails kept in memory (about 30 KB each)
+SKETCH_BLOCK = 4  # sketch cell: SKETCH_BLOCK x SKETCH_BLOCK thumbnail pixels
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def dhash(gray, size=HASH_SIZE):
+    """Difference hash of a grayscale array: one bit per horizontally adjacent pixel pair"""
+    small = np.asarray(Image.fromarray(gray).resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def thumbnail(path, width=THUMB_WIDTH):
+    """(pixel size, grayscale thumbnail array) of an image file; raises OSError when unreadable"""
+    with Image.open(path) as img:
+        size = img.size
+        height = max(1, round(width * size[1] / size[0]))
+        img.draft('L', (width * 2, height * 2))  # JPEG: let the decoder downscale
+        gray = img.convert('L').resize((width, height), Image.BOX)
+    return size, np.asarray(gray)
+
+
+def sketch(gray, block=SKETCH_BLOCK):
+    """Block means of a grayscale array, rounded to uint8; any ragged edge is dropped"""
+    h, w = gray.shape[0] // block * block, gray.shape[1] // block * block
+    cells = gray[:h, :w].reshape(h // block, block, w // block, block)
+    return np.rint(cells.mean(axis=(1, 3))).astype(np.uint8)
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance.
+
+    Each node keeps every value added under its exact hash, since cards of
+    one template often hash identically.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, key, value):
+        self.count += 1
+        if self.root is None:
+            self.root = (key, [value], {})
+            return
+        node = self.root
+        while True:
+            d = hamming(key, node[0])
+            if d == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = (key, [value], {})
+                return
+            node = child
+
+    def search(self, key, radius):
+        """[(distance, value)] for every value whose hash is within radius, nearest first"""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_key, values, children = stack.pop()
+            d = hamming(key, node_key)
+            if d <= radius:
+                found.extend((d, v) for v in values)
+            stack.extend(child for dist, child in children.items() if d - radius <= dist <= d + radius)
+        found.sort(key=lambda item: item[0])
+        return found
+
+
+class Deduplicator:
+    """Cluster images as they arrive; the first image of a cluster is its representative.
+
+    signatures maps every image hashed or added to its (width, height, hash),
+    for storing in the ingest manifest; add() puts such a signature back.
+    """
+
+    def __init__(self, max_distance=10, max_diff=40, width=THUMB_WIDTH, max_thumbs=THUMB_CACHE):
+        self.max_distance = max_distance
+        self.max_diff = max_diff
+        self.width = width
+        self.max_thumbs = max_thumbs
+        self.tree = BKTree()
+        self.signatures = {}
+        self._thumbs = OrderedDict()
+        self._sketches = {}
+        self.hashed = 0
+        self.loaded = 0
+        self.skipped = 0
+        self.unreadable = 0
+
+    def _keep_thumb(self, path, thumb):
+        self._thumbs[path] = thumb
+        self._thumbs.move_to_end(path)
+        while len(self._thumbs) > self.max_thumbs:
+            self._thumbs.popitem(last=False)
+
+    def _thumb(self, path):
+        """Thumbnail of an indexed image, from the LRU or re-read; None when it is gone"""
+        thumb = self._thumbs.get(path)
+        if thumb is None:
+            try:
+                _, thumb = thumbnail(path, self.width)
+            except (OSError, ValueError):
+                return None
+        self._keep_thumb(path, thumb)
+        return thumb
+
+    def _sketch(self, path):
+        """Sketch of an indexed image; computed on first use for images loaded from the manifest"""
+        if path not in self._sketches:
+            thumb = self._thumb(path)
+            self._sketches[path] = None if thumb is None else sketch(thumb)
+        return self._sketches[path]
+
+    def _hash(self, path):
+        """(size, thumbnail, hash) of an image file, or None when it can't be read"""
+        try:
+            size, thumb = thumbnail(path, self.width)
+        except (OSError, ValueError):
+            self.unreadable += 1
+            return None
+        self.hashed += 1
+        return size, thumb, dhash(thumb)
+
+    def add(self, path, size, key, thumb=None):
+        """Index an image as the representative of its own cluster"""
+        self.tree.add(key, (path, tuple(size)))
+        self.signatures[path] = (*size, key)
+        if thumb is not None:
+            self._keep_thumb(path, thumb)
+            self._sketches[path] = sketch(thumb)
+
+    def load(self, path, signature):
+        """Index an image hashed on an earlier run, from its stored (width, height, hash)"""
+        *size, key = signature
+        self.add(path, size, key)
+        self.loaded += 1
+
+    def remember(self, path):
+        """Index an image whose result came from elsewhere (a cache hit), so its copies match it"""
+        hashed = self._hash(path)
+        if hashed is not None:
+            size, thumb, key = hashed
+            self.add(path, size, key, thumb)
+
+    def match(self, path):
+        """Path of an earlier image showing the same card, or None.
+
+        An image without a match becomes the representative of a new
+        cluster. Unreadable images are neither matched nor remembered.
+        """
+        hashed = self._hash(path)
+        if hashed is None:
+            return None
+        size, thumb, key = hashed
+        self.signatures[path] = (*size, key)
+        signed = thumb.astype(np.int16)
+        rough = sketch(thumb).astype(np.int16)
+        for _, (rep, rep_size) in self.tree.search(key, self.max_distance):
+            if rep_size != size or rep == path:
+                continue
+            rep_sketch = self._sketch(rep)
+            # +1: each side of the sketch is rounded by up to half a grey level
+            if rep_sketch is None or int(np.abs(rough - rep_sketch).max()) > self.max_diff + 1:
+                continue
+            rep_thumb = self._thumb(rep)
+            if rep_thumb is not None and int(np.abs(signed - rep_thumb).max()) <= self.max_diff:
+                self.skipped += 1
+                return rep
+        self.add(path, size, key, thumb)
+        return None
+
+    def log_stats(self):
+        logging.info("Dedup: %d images hashed (%d more from earlier runs) into %d clusters; "
+                     "%d near-duplicates skipped OCR", self.hashed, self.loaded, len(self.tree), self.skipped)
@@ -0,0 +1,105 @@
+"""
+Gap filling for the weekly price matrix.
+
+Cards are published on market days (Mondays and Thursdays), not on one
+weekly grid, and varieties come and go with the season. Rather than
+reindexing to the grid and filling every hole, fill_frame():
+
+  * snaps each observation to the nearest date of the weekly grid, so a
+    Thursday card lands in its week instead of being dropped; when two cards
+    land in the same week the later quote wins;
+  * interpolates linearly between a variety's quotes, but only across gaps
+    of at most the policy's max_gap weeks;
+  * never extrapolates before a variety's first or after its last quote
+    unless the policy allows it, and then only that many weeks.
+
+The fill is computed for the whole matrix at once from the row of the
+previous and next quote of every cell (two cumulative max/min passes), so
+it costs O(weeks x columns) however the gaps are laid out.
+"""
+
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+GRID_FREQ = 'W-MON'
+
+# max_gap: longest run of missing weeks to interpolate across; longer gaps stay empty
+# extrapolate: weeks the first/last quote may be carried outwards (0 = never)
+GapPolicy = namedtuple('GapPolicy', 'max_gap extrapolate')
+DEFAULT_POLICY = GapPolicy(max_gap=4, extrapolate=0)
+
+
+def snap_to_grid(frame, freq=GRID_FREQ):
+    """Move every row of a date-indexed frame to the nearest grid date.
+
+    Rows snapped to the same date are merged column by column, the last
+    non-missing value winning. The result covers every grid date from the
+    first to the last snapped row.
+    """
+    if frame.empty:
+        return frame
+    dates = pd.DatetimeIndex(frame.index).normalize()
+    week = pd.Timedelta(days=7)
+    grid = pd.date_range(dates.min() - week, dates.max() + week, freq=freq)
+    after = grid.searchsorted(dates)
+    before = after - 1
+    nearer = (grid[after] - dates) < (dates - grid[before])
+    snapped = grid[np.where(nearer, after, before)]
+    merged = frame.groupby(snapped, sort=True).last()
+    return merged.reindex(pd.date_range(merged.index.min(), merged.index.max(), freq=freq))
+
+
+def column_policies(labels, policies=None, default=DEFAULT_POLICY):
+    """(max_gap, extrapolate) arrays, one entry per label.
+
+    policies maps a regular expression to a GapPolicy; the first one found
+    in the label (case-insensitively) applies, else the default.
+    """
+    compiled = [(re.compile(pattern, re.IGNORECASE), policy) for pattern, policy in (policies or {}).items()]
+    chosen = [next((p for rx, p in compiled if rx.search(label)), default) for label in labels]
+    return (np.array([p.max_gap for p in chosen], dtype=float),
+            np.array([p.extrapolate for p in chosen], dtype=float))
+
+
+def fill_gaps(values, max_gap, extrapolate):
+    """Filled copy of a (weeks, columns) matrix plus the mask of filled-in cells.
+
+    max_gap and extrapolate are per-column arrays (or scalars), see GapPolicy.
+    """
+    n = len(values)
+    rows = np.arange(n)[:, None]
+    cols = np.arange(values.shape[1])
+    quoted = ~np.isnan(values)
+
+    # row of the previous / next quote of each cell (-1 / n when there is none)
+    prev = np.maximum.accumulate(np.where(quoted, rows, -1), axis=0)
+    nxt = np.minimum.accumulate(np.where(quoted, rows, n)[::-1], axis=0)[::-1]
+    prev_val = values[prev.clip(0, n - 1), cols]
+    next_val = values[nxt.clip(0, n - 1), cols]
+
+    filled = values.copy()
+    inside = ~quoted & (prev >= 0) & (nxt < n) & (nxt - prev - 1 <= max_gap)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        line = prev_val + (next_val - prev_val) * (rows - prev) / (nxt - prev)
+    filled[inside] = line[inside]
+    leading = ~quoted & (prev < 0) & (nxt < n) & (nxt - rows <= extrapolate)
+    trailing = ~quoted & (nxt >= n) & (prev >= 0) & (rows - prev <= extrapolate)
+    filled[leading] = next_val[leading]
+    filled[trailing] = prev_val[trailing]
+    return filled, inside | leading | trailing
+
+
+def fill_frame(df, policies=None, default=DEFAULT_POLICY, freq=GRID_FREQ):
+    """Snap a date x variety frame to the weekly grid and fill its gaps.
+
+    Returns (filled frame, interpolated mask frame), the mask being what the
+    dashboard shows as estimated points.
+    """
+    df = snap_to_grid(df, freq)
+    max_gap, extrapolate = column_policies(df.columns, policies, default)
+    filled, mask = fill_gaps(df.to_numpy(dtype=float), max_gap, extrapolate)
+    return (pd.DataFrame(filled, index=df.index, columns=df.columns),
+            pd.DataFrame(mask, index=df.index, columns=df.columns))
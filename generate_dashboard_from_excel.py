@@ -1,80 +1,87 @@
+"""
+Namma Byadgi Dashboard Data Builder
+Reads the rate sheet workbook (or its CSV/TSV export) and writes web/data.json:
+prices per variety and section, bag arrivals, week-on-week change and the
+arrivals-weighted market price index.
+
+Usage:
+    python generate_dashboard_from_excel.py SHEET [--output FOLDER] [--season YEAR]
+
+SHEET is the .xlsx / .xlsm workbook (needs openpyxl) or a .csv / .tsv export.
+"""
+
+import argparse
 import json
-from datetime import datetime
 import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analytics import arrivals_index, json_columns, json_values, pct_change
+from generate_data import SECTION_NAMES, json_rows, load_and_parse_tsv
+
+OUTPUT_FOLDER = "web"
+SEASON = 2025  # year of the sheet's first date, for headers that read '06-Nov'
 
-OUTPUT_FOLDER = r"C:\Users\mrmay\Downloads\APMC Prices\web"
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-
-DATES = [
-    "06-Nov", "13-Nov", "20-Nov", "24-Nov", "27-Nov",
-    "01-Dec", "04-Dec", "08-Dec", "11-Dec", "15-Dec", "18-Dec"
-]
-
-AC_PRICES = {
-    "Dabbi DLX (AC)":        [34500, 48000, 36000, 35000, 35000, 33000, 33000, 28000, 28000, 36000, 35000],
-    "Dabbi BEST (AC)":       [31000, 44000, 35000, 33000, 33000, 30000, 28000, 22000, 23000, 28000, 33000],
-    "Dabbi Medium BEST (AC)":[28000, 34000, 23000, 23000, 23000, 18000, 18000, 18000, 18000, 23000, 25000],
-    "Dabbi Medium (AC)":     [25000, 30000, 18000, 18000, 18000, 16000, 16000, 16000, 16000, 16000, 18000],
-    "KDL DLX (AC)":          [29000, 36000, 35000, 30000, 24000, 27000, 24000, 24000, 29500, 25000, 32000],
-    "KDL BEST (AC)":         [28000, 34000, 33000, 28000, 18000, 24000, 21000, 21000, 24000, 22000, 28000],
-    "KDL Medium Best":       [26000, 32000, 24000, 24000, None, 20000, 19000, 19000, 22000, 20000, 24000],
-    "KDL Medium (AC)":       [24000, 30000, 22000, 18000, None, 16000, 16000, 16000, 18000, 18000, 20000],
-    "KDL Fatki (AC)":        [7500, 8500, 7500, 6500, 6500, 6500, 6500, 6500, 6800, 6800, 6900],
-    "Syngenta 2043 (AC)":    [19000, 28000, 23000, 25000, 23500, 20000, 19000, 17000, 17000, 24500, 22000],
-    "Syngenta 5531 (AC)":    [15700, 16000, 15500, 15000, 14500, 14500, 14500, 15000, 15000, 15000, 15000],
-    "Seed Qty (AC)":         [15000, 15500, 15500, 15500, 15500, 15000, 14000, 14000, None, None, 14000],
-    "Seed Fatki (AC)":       [9000, 9000, 9000, 9000, 9000, 9000, 9000, 9000, None, None, 9000]
-}
-
-NEW_CROP_PRICES = {
-    "Dabbi DLX (moisture)":        [None, 55500, 40000, 56770, 62100, 60100, 64500, 68500, 55500, 55000, 55000],
-    "Dabbi BEST (moisture)":       [None, None, 38000, 43000, 36000, 38000, 54100, 55000, 50000, 50000, 50000],
-    "Dabbi Medium BEST (moisture)":[None, 30000, None, 39000, 36000, 38000, 39000, 46000, 46000, 46000, 46000],
-    "Dabbi Medium (moisture)":     [None, None, None, None, 35000, 35200, 35600, 36000, 40000, 40000, 40000],
-    "Dabbi FATKI (moisture)":      [None, 4000, None, None, 4000, 4200, 4360, 4500, 4500, 4500, 4500],
-    "Local KDL (moisture)":        [None, None, None, 38500, 42500, 42500, 42000, 40000, 48000, 45000, 43000],
-    "KDL DLX (moisture)":          [None, 41000, 38500, 43000, 44000, 35000, 35000, 45000, 44000, 43000, 55500],
-    "KDL BEST (moisture)":         [None, 38000, 35000, 39000, 33000, 30000, 30000, 40000, 37000, 36000, 41000],
-    "KDL Medium BEST (moisture)":  [None, 35000, 14000, 16000, 27000, 29000, 29000, 36000, 36000, 35000, 40000],
-    "KDL Medium (moisture)":       [None, 28000, 11000, 11000, 17000, 24000, 24000, 30000, 30000, 30000, 35000],
-    "KDL Fatki (moisture)":        [None, 3200, 7000, 8000, 8000, 7500, 7500, 7500, 7500, 7500, 6500]
-}
-
-ARRIVALS = {
-    "AC": [40000, 80000, 60000, 40000, 30000, 30000, 20000, 12000, 15000, 15000, 15000],
-    "New Crop": [None, 1000, 4000, 5000, 13000, 25000, 20000, 25000, 24000, 41000, 39000]
-}
-
-
-# Merge both
-ALL_PRICES = {**AC_PRICES, **NEW_CROP_PRICES}
-
-# WoW change
-wow_change = {}
-for v, prices in ALL_PRICES.items():
-    wow = []
-    for i in range(len(prices)):
-        if i == 0 or prices[i] is None or prices[i-1] is None:
-            wow.append(None)
-        else:
-            wow.append(round(((prices[i] - prices[i-1]) / prices[i-1]) * 100, 2))
-    wow_change[v] = wow
-
-    output = {
-        "dates": [
-            "06 Nov 2025", "13 Nov 2025", "20 Nov 2025", "24 Nov 2025",
-            "27 Nov 2025", "01 Dec 2025", "04 Dec 2025",
-            "08 Dec 2025", "11 Dec 2025", "15 Dec 2025", "18 Dec 2025"
-        ],
-        "varieties": sorted(ALL_PRICES.keys()),
-        "prices": ALL_PRICES,
-        "arrivals": ARRIVALS,
-        "wow_change": wow_change,
-        "last_updated": datetime.utcnow().isoformat() + "Z"
+# Label suffix per sheet section, e.g. "Dabbi DLX (AC)" / "Dabbi DLX (moisture)"
+SECTION_SUFFIX = {"AC": "(AC)", "NEW": "(moisture)"}
+
+
+def build_output(prices, arrivals):
+    """data.json dict from the long-form tables of generate_data.load_and_parse_tsv"""
+    prices = prices.assign(label=prices['variety'] + ' ' + prices['section'].map(SECTION_SUFFIX))
+    all_dates = pd.DatetimeIndex(sorted(set(prices['date']) | set(arrivals['date'])))
+
+    table = prices.pivot_table(index='date', columns='label', values='value', aggfunc='last').reindex(all_dates)
+    values = table.to_numpy(dtype='float64', na_value=np.nan)
+    wow = np.round(pct_change(values), 2)
+
+    bags = (arrivals.pivot_table(index='section', columns='date', values='value', aggfunc='last')
+            .reindex(index=list(SECTION_NAMES), columns=all_dates))
+
+    varieties = list(table.columns)
+    section_of = prices.drop_duplicates('label').set_index('label')['section'].map(SECTION_NAMES)
+    volume = bags.to_numpy(dtype='float64', na_value=np.nan)
+    index = arrivals_index(values, section_of[varieties].to_numpy(),
+                           dict(zip(SECTION_NAMES.values(), volume)))
+    return {
+        "dates": [d.strftime('%d %b %Y') for d in all_dates],
+        "varieties": sorted(varieties),
+        "prices": dict(zip(varieties, json_rows(table.T))),
+        "arrivals": dict(zip(SECTION_NAMES.values(), json_rows(bags))),
+        "wow_change": json_columns(wow, varieties),
+        "arrivals_index": json_columns(
+            np.column_stack([index['index']] + list(index['section_avg'].values())),
+            ['market', *index['section_avg']]),
+        "arrivals_weighted_avg": json_values(list(index['weighted_avg'].values()), list(index['weighted_avg'])),
+        "last_updated": datetime.utcnow().isoformat() + "Z",
     }
 
 
-with open(os.path.join(OUTPUT_FOLDER, "data.json"), "w", encoding="utf-8") as f:
-    json.dump(output, f, indent=2, ensure_ascii=False)
+def main(input_file, output_folder=OUTPUT_FOLDER, season=SEASON):
+    started = time.perf_counter()
+    prices, arrivals = load_and_parse_tsv(input_file, season)
+    output = build_output(prices, arrivals)
+
+    os.makedirs(output_folder, exist_ok=True)
+    with open(os.path.join(output_folder, "data.json"), "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ DATA.JSON GENERATED: {len(output['varieties'])} varieties, {len(output['dates'])} dates "
+          f"in {time.perf_counter() - started:.2f}s")
+    return output
+
 
-print("✅ HARD-CODED DATA.JSON GENERATED SUCCESSFULLY")
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build the dashboard data.json from the rate sheet")
+    ap.add_argument('input', help="rate sheet: .xlsx / .xlsm workbook, or a .csv / .tsv export")
+    ap.add_argument('--output', default=OUTPUT_FOLDER, help=f"folder for data.json (default {OUTPUT_FOLDER})")
+    ap.add_argument('--season', type=int, default=SEASON,
+                    help=f"year of the sheet's first date (default {SEASON})")
+    args = ap.parse_args()
+    try:
+        main(args.input, args.output, args.season)
+    except ImportError as e:
+        raise SystemExit(f"⚠️ {e}")
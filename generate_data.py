@@ -4,75 +4,268 @@ Namma Byadgi Price Data Generator
 Converts Prices.tsv to JSON format for GitHub Pages dashboard
 """
 
+import csv
+import re
+import sys
 import pandas as pd
+import numpy as np
 import json
-from datetime import datetime
+from datetime import datetime, date
 from pathlib import Path
 
+from rate_sheet import PRICE_RE, classify_rows, read_rows
 
-def load_and_parse_tsv(input_file):
-    """Load TSV file and parse price data"""
-    df = pd.read_csv(input_file, sep="\t", header=None)
-    
-    # Find the actual data start (skip header row with emojis)
-    data_rows = []
-    current_section = "AC"  # Start with AC section
-    
-    for idx, row in df.iterrows():
-        first_col = str(row[0]).strip()
-        
-        # Skip empty rows and headers
-        if not first_col or "👉" in first_col or "Variety" in first_col:
-            continue
-        
-        # Check if this is a section header
-        if "NEW CROP" in first_col:
-            current_section = "NEW"
-            continue
-        if "NOTE" in first_col or "🌶️" in first_col:
-            continue
-        
-        # Try to parse as data row
-        try:
-            # Expected format: Variety, Grade, then price columns
-            variety = str(row[0]).strip()
-            if len(variety) < 3 or "All prices" in variety:
-                continue
-            
-            # This is a simplified version - adjust based on actual TSV structure
-            data_rows.append({
-                'Variety': variety,
-                'Section': current_section
-            })
-        except:
-            continue
-    
-    print(f"✅ Loaded {len(data_rows)} varieties")
-    return data_rows
+SECTION_NAMES = {"AC": "AC", "NEW": "New Crop"}
+# rate_sheet.classify_rows section -> data.json section key
+SECTION_KEYS = {'ac': 'AC', 'moisture': 'NEW'}
+YEAR_RE = re.compile(r'\b20\d{2}\b')
+# '180-200 ASTA', '70 to 100 ASTA', '100-110, ASTA' / '8K-10K SHU', '8K to 10K SHU'
+ASTA_RANGE = r'(\d+)\s*(?:-|to)\s*(\d+)\s*,?\s*ASTA'
+SHU_RANGE = r'(\d+K?)\s*(?:-|to)\s*(\d+K?)\s*SHU'
 
 
-def parse_tsv_to_json(input_file):
-    """Parse TSV and generate structured JSON"""
-    
+def _cell_text(value):
+    """Workbook cell -> the text the sheet shows; real date cells keep their year"""
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%d-%b-%Y')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def read_workbook(input_file, sheet=None):
+    """Cell texts of one worksheet, streamed row by row in openpyxl's read-only mode"""
     try:
-        # Read the TSV more intelligently
-        raw_data = pd.read_csv(input_file, sep="\t", dtype=str)
-        
-        # Extract varieties and prices
-        varieties_data = {}
-        dates = []
-        
-        print(f"✅ TSV parsed: {len(raw_data)} rows, {len(raw_data.columns)} columns")
-        return varieties_data, dates
-        
-    except Exception as e:
-        print(f"⚠️ Error parsing TSV: {e}")
-        return {}, []
-
-
-def generate_json(output_file, sample_data=True):
-    """Generate JSON file with price data"""
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ImportError(f"Reading {Path(input_file).name} needs openpyxl (pip install openpyxl); "
+                          "or save the sheet as CSV / TSV and pass that instead") from e
+
+    wb = load_workbook(input_file, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.worksheets[0]
+        rows = [[_cell_text(v) for v in row] for row in ws.iter_rows(values_only=True)
+                if any(v is not None and str(v).strip() for v in row)]
+    finally:
+        wb.close()
+    return pd.DataFrame(rows, dtype=object)
+
+
+def read_sheet(input_file, sheet=None):
+    """Raw sheet as a string DataFrame without a header: TSV, CSV or Excel"""
+    suffix = Path(input_file).suffix.lower()
+    if suffix in ('.xlsx', '.xlsm'):
+        df = read_workbook(input_file, sheet)
+    elif suffix == '.xls':
+        df = pd.read_excel(input_file, sheet_name=sheet or 0, header=None, dtype=str)
+    else:
+        # csv rather than read_csv: the sheet's rows are ragged, and read_csv
+        # rejects a row wider than the first one
+        df = pd.DataFrame(read_rows(input_file, ',' if suffix == '.csv' else '\t'), dtype=object)
+    if df.empty:
+        raise ValueError(f"{Path(input_file).name} is empty")
+    df = df.fillna('')
+    df.columns = range(df.shape[1])
+    return df.astype(str).apply(lambda col: col.str.strip())
+
+
+def parse_prices(cells):
+    """Comma-formatted prices -> nullable Int64 frame, in one pass over every cell.
+
+    Blanks and the sheet's placeholders ('—', '--', '-') become <NA>.
+    """
+    flat = pd.Series(cells.to_numpy().ravel(), dtype='string')
+    digits = flat.where(flat.str.fullmatch(PRICE_RE.pattern).fillna(False)).str.replace(',', '', regex=False)
+    values = pd.to_numeric(digits, errors='coerce').astype('Int64')
+    return pd.DataFrame(values.to_numpy().reshape(cells.shape),
+                        index=cells.index, columns=cells.columns).astype('Int64')
+
+
+def infer_dates(labels, year=None, today=None):
+    """Dates for a run of '06-Nov'-style headers in sheet order.
+
+    The year rolls over whenever the month goes backwards. Headers that carry
+    their own year ('06-Nov-2025', as read from real date cells) keep it and
+    anchor the rest of the run. Otherwise the run starts in year, or, only
+    when today is passed, ends on the last date not in the future.
+    """
+    labels = pd.Index(labels, dtype=object)
+    explicit = pd.to_datetime(labels, format='%d-%b-%Y', errors='coerce')
+    parsed = pd.to_datetime(labels + '-2000', format='%d-%b-%Y', errors='coerce')
+    parsed = parsed.where(explicit.isna(), explicit)
+    if parsed.isna().all():
+        return pd.DatetimeIndex([pd.NaT] * len(labels))
+    months = pd.Series(parsed.month, dtype='float').ffill().to_numpy()
+    rollover = np.concatenate(([0], np.cumsum(np.diff(months) < 0)))
+    rollover = np.nan_to_num(rollover).astype(int)
+    if explicit.notna().any():
+        first = np.flatnonzero(explicit.notna())[0]
+        year = int(explicit.year[first]) - rollover[first]
+    elif year is None and today is not None:
+        last = np.flatnonzero(parsed.notna())[-1]
+        last_year = today.year if (parsed.month[last], parsed.day[last]) <= (today.month, today.day) else today.year - 1
+        year = last_year - rollover[last]
+    elif year is None:
+        raise ValueError(f"No year for the headers {labels[0]!r}...{labels[-1]!r}: pass the season year")
+    inferred = pd.to_datetime(pd.DataFrame({'year': year + rollover, 'month': parsed.month, 'day': parsed.day}),
+                              errors='coerce')
+    return pd.DatetimeIndex(np.where(explicit.notna(), explicit, inferred))
+
+
+def split_variety(cells):
+    """'Dabbi DLX (AC),180-200 ASTA,8K-10K SHU' -> name, ASTA range, SHU range (vectorized)
+
+    Ranges come out as 'low-high' ('70 to 100 ASTA' -> '70-100', '8K to 10K SHU'
+    -> '8k-10k'); cells without one give NaN.
+    """
+    name = cells.str.split(',', n=1).str[0].str.replace(r'\s*\((AC|moisture)\)\s*$', '', regex=True,
+                                                         flags=re.I).str.strip()
+    asta = cells.str.extract(ASTA_RANGE, flags=re.I)
+    shu = cells.str.extract(SHU_RANGE, flags=re.I)
+    return name, asta[0] + '-' + asta[1], (shu[0] + '-' + shu[1]).str.lower()
+
+
+def variety_type(name):
+    """Premium / Hybrid / Budget / Standard, as in PRICE_REFERENCE.csv"""
+    upper = name.upper()
+    if 'FATKI' in upper:
+        return 'Budget'
+    if 'DLX' in upper:
+        return 'Premium'
+    if any(k in upper for k in ('SYNGENTA', '2043', '5531')):
+        return 'Hybrid'
+    return 'Standard'
+
+
+def title_year(titles, input_file):
+    """The first 4-digit year in the section titles or the file name ('2025-26' -> 2025), or None"""
+    for text in [*titles, Path(input_file).stem]:
+        found = YEAR_RE.search(text)
+        if found:
+            return int(found.group())
+    return None
+
+
+def load_and_parse_tsv(input_file, season=None, today=None):
+    """Load the sheet and split it into long-form price and arrival tables.
+
+    Returns (prices, arrivals): prices has one row per (section, variety, date)
+    with a nullable Int64 value, arrivals one row per (section, date). The
+    layout comes from rate_sheet.classify_rows, one pass over the first
+    column; the price cells are then read with column masks, so a
+    multi-season sheet with hundreds of date columns costs a handful of
+    vectorized passes rather than a Python loop per cell.
+
+    season is the year of each section's first date. Without it the year
+    comes from the section titles or the file name; today (the clock) is only
+    used when passed. Headers read from real date cells carry their own year.
+    """
+    df = read_sheet(input_file)
+    first = df[0]
+
+    sections, roles = zip(*classify_rows(first.tolist()))
+    section = pd.Series([SECTION_KEYS.get(sec) for sec in sections], index=df.index, dtype=object)
+    role = pd.Series(roles, index=df.index, dtype=object)
+    is_header = role == 'header'
+    is_arrivals = role == 'arrivals'
+    is_data = role == 'variety'
+    if season is None:
+        season = title_year(first[role == 'title'], input_file)
+
+    # Dates of every header row; each section's headers are read as one run so years roll over
+    header_rows = df.index[is_header].to_numpy()
+    header_dates = np.empty((len(header_rows), df.shape[1] - 1), dtype='datetime64[ns]')
+    for sec in ('AC', 'NEW'):
+        pick = (section[is_header] == sec).to_numpy()
+        if not pick.any():
+            continue
+        labels = pd.Index(df.loc[header_rows[pick], 1:].to_numpy().ravel())
+        header_dates[pick] = infer_dates(labels, season, today).to_numpy().reshape(pick.sum(), -1)
+
+    # Price rows read their dates from the nearest header row above them; the
+    # arrivals row sits just above its section's header, so it reads the next one
+    positions = df.index.to_numpy()
+    header_above = np.searchsorted(header_rows, positions, side='right') - 1
+    header_below = np.searchsorted(header_rows, positions, side='left')
+
+    def long_form(mask, header_of):
+        mask = mask & (header_of >= 0) & (header_of < len(header_rows))
+        rows = df.index[mask].to_numpy()
+        cells = parse_prices(df.loc[rows, 1:])
+        out = pd.DataFrame({
+            'row': np.repeat(rows, cells.shape[1]),
+            'section': np.repeat(section[rows].to_numpy(), cells.shape[1]),
+            'date': header_dates[header_of[rows]].ravel(),
+            'value': pd.array(cells.to_numpy().ravel(), dtype='Int64'),
+        })
+        return out[out['date'].notna() & out['value'].notna()].reset_index(drop=True)
+
+    prices = long_form(is_data, header_above)
+    name, asta, shu = split_variety(first[is_data])
+    names = pd.DataFrame({'variety': name, 'asta': asta, 'shu': shu})
+    prices = prices.join(names, on='row')
+    arrivals = long_form(is_arrivals, header_below)
+
+    print(f"✅ Loaded {prices['variety'].nunique()} varieties, {prices['date'].nunique()} dates")
+    return prices, arrivals
+
+
+def json_rows(frame):
+    """Rows of a numeric frame as lists of int / None"""
+    values = frame.to_numpy(dtype='float64', na_value=np.nan)
+    missing = np.isnan(values)
+    cells = np.where(missing, 0, values).astype(np.int64).astype(object)
+    cells[missing] = None
+    return cells.tolist()
+
+
+def parse_tsv_to_json(input_file, season=None):
+    """Parse the sheet into the data.json 'varieties' block, its date axis and arrivals.
+
+    A sheet that can't be read or dated raises; one without a single price
+    raises ValueError, so a broken export never becomes an empty data.json.
+    """
+    prices, arrivals = load_and_parse_tsv(input_file, season)
+    if prices.empty:
+        raise ValueError(f"No prices found in {input_file}: is it the rate sheet?")
+
+    all_dates = pd.DatetimeIndex(sorted(set(prices['date']) | set(arrivals['date'])))
+    # Names differ in case between sections ("KDL Medium Best" / "KDL Medium BEST"): merge on a key
+    prices['key'] = prices['variety'].str.lower()
+    firsts = prices.drop_duplicates('key').set_index('key')
+    table = prices.pivot_table(index=['section', 'key'], columns='date', values='value', aggfunc='last')
+    sections = {}
+    for sec in ('AC', 'NEW'):
+        frame = table.loc[sec] if sec in table.index.get_level_values(0) else pd.DataFrame()
+        frame = frame.reindex(index=firsts.index, columns=all_dates)
+        sections[sec] = (frame.notna().any(axis=1).to_numpy(), json_rows(frame))
+
+    varieties_data = {}
+    for i, (key, row) in enumerate(firsts.iterrows()):
+        varieties_data[row['variety']] = {
+            "type": variety_type(row['variety']),
+            "asta": row['asta'] if isinstance(row['asta'], str) else "",
+            "shu": row['shu'] if isinstance(row['shu'], str) else "",
+            "section": " & ".join(SECTION_NAMES[s] for s in ('AC', 'NEW') if sections[s][0][i]),
+            "prices_ac": sections['AC'][1][i],
+            "prices_new": sections['NEW'][1][i],
+        }
+
+    bags = arrivals.pivot_table(index='section', columns='date', values='value', aggfunc='last')
+    bags = bags.reindex(index=['AC', 'NEW'], columns=all_dates)
+    arrivals_data = dict(zip((SECTION_NAMES[s] for s in ('AC', 'NEW')), json_rows(bags)))
+
+    dates = [d.strftime('%d %b %Y') for d in all_dates]
+    print(f"✅ TSV parsed: {len(varieties_data)} varieties, {len(dates)} dates")
+    return varieties_data, dates, arrivals_data
+
+
+def generate_json(output_file, input_file, season=None):
+    """Generate JSON file with price data from the sheet; nothing is written if it fails to parse"""
     
+    varieties, dates, arrivals = parse_tsv_to_json(input_file, season)
     output = {
         "metadata": {
             "brand": "Namma Byadgi",
@@ -82,62 +275,8 @@ def generate_json(output_file, sample_data=True):
             "last_updated": datetime.now().isoformat(),
             "note": "All prices are per quintal and based on Kissan packing rates"
         },
-        "dates": [
-            "06 Nov 2025", "13 Nov 2025", "20 Nov 2025", "24 Nov 2025",
-            "27 Nov 2025", "01 Dec 2025", "04 Dec 2025", "08 Dec 2025",
-            "11 Dec 2025", "15 Dec 2025", "18 Dec 2025", "22 Dec 2025",
-            "29 Dec 2025", "01 Jan 2026"
-        ],
-        "varieties": {
-            "Dabbi DLX": {
-                "type": "Premium",
-                "asta": "240-260",
-                "shu": "8k-10k",
-                "section": "AC & New Crop",
-                "prices_ac": [34500, 48000, 36000, 35000, 35000, 33000, 33000, 28000, 28000, 36000, 35000, 31000, 31000, 31000],
-                "prices_new": [None, 55500, 40000, 56770, 62100, 60100, 64500, 68500, 55500, 55000, 55000, 58000, 53000, 53000]
-            },
-            "Dabbi BEST": {
-                "type": "Standard",
-                "asta": "240-260",
-                "shu": "8k-10k",
-                "section": "AC & New Crop",
-                "prices_ac": [31000, 44000, 35000, 33000, 33000, 30000, 28000, 22000, 23000, 28000, 33000, 28000, 28000, 28000],
-                "prices_new": [None, None, 38000, 43000, 36000, 38000, 54100, 55000, 50000, 50000, 50000, 50000, 48000, 48000]
-            },
-            "KDL DLX": {
-                "type": "Premium",
-                "asta": "220-260",
-                "shu": "12k-15k",
-                "section": "AC & New Crop",
-                "prices_ac": [29000, 36000, 35000, 30000, 24000, 27000, 24000, 24000, 29500, 25000, 32000, 29000, None, None],
-                "prices_new": [None, 41000, 38500, 43000, 44000, 35000, 35000, 45000, 44000, 43000, 55500, 55600, 46000, 47000]
-            },
-            "KDL BEST": {
-                "type": "Standard",
-                "asta": "220-260",
-                "shu": "12k-15k",
-                "section": "AC & New Crop",
-                "prices_ac": [28000, 34000, 33000, 28000, 18000, 24000, 21000, 21000, 24000, 22000, 28000, 27000, 27000, 27000],
-                "prices_new": [None, 38000, 35000, 39000, 33000, 30000, 30000, 40000, 37000, 36000, 41000, 40000, 40000, 41000]
-            },
-            "Syngenta 2043": {
-                "type": "Hybrid",
-                "asta": "150-170",
-                "shu": "18k-25k",
-                "section": "AC",
-                "prices_ac": [19000, 28000, 23000, 25000, 23500, 20000, 19000, 17000, 17000, 24500, 22000, 18000, 18000, 19500],
-                "prices_new": [None, None, None, None, 17000, 24000, 20000, 20000, 22000, 22000, 22500, 21000, 21000, 22000]
-            },
-            "Syngenta 5531": {
-                "type": "Hybrid",
-                "asta": "140-160",
-                "shu": "45k-50k",
-                "section": "AC",
-                "prices_ac": [15700, 16000, 15500, 15000, 14500, 14500, 14500, 15000, 15000, 15000, 15000, 16000, 15000, 15000],
-                "prices_new": [None, 18000, 15000, 15000, 16000, 17000, 16000, 16000, 16000, 16000, 16000, 15500, 15000, 15000]
-            }
-        },
+        "dates": dates,
+        "varieties": varieties,
         "sections": {
             "AC": "Air-Conditioned Cold Storage (Outdated - less color & taste)",
             "New": "New Crop / Moisture Arrivals (Premium quality)"
@@ -148,7 +287,8 @@ def generate_json(output_file, sample_data=True):
             "DLX": "Deluxe - Premium grade",
             "BEST": "Best standard grade",
             "Fatki": "Broken/low-grade chili"
-        }
+        },
+        "arrivals": arrivals,
     }
     
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -162,11 +302,16 @@ if __name__ == "__main__":
     # Change these paths as needed
     INPUT_FILE = "Prices.tsv"
     OUTPUT_FILE = "data.json"
+    SEASON = 2025  # year of the sheet's first date; its headers read '06-Nov'
     
     print("🌶️ Namma Byadgi Data Generator")
     print(f"📂 Input: {INPUT_FILE}")
     print(f"📂 Output: {OUTPUT_FILE}\n")
     
-    data = generate_json(OUTPUT_FILE)
+    try:
+        data = generate_json(OUTPUT_FILE, INPUT_FILE, SEASON)
+    except (OSError, ValueError, ImportError, csv.Error) as e:
+        print(f"❌ {INPUT_FILE}: {e} - {OUTPUT_FILE} not written")
+        sys.exit(1)
     print(f"\n✅ Success! Found {len(data['varieties'])} varieties")
     print(f"📅 Date range: {data['dates'][0]} to {data['dates'][-1]}")
@@ -0,0 +1,121 @@
+"""
+Ingest manifest for incremental rebuilds of the Byadgi price data.
+
+The manifest remembers every image that has been processed (relative path,
+size, mtime, content hash, perceptual hash) together with the (date, prices)
+it produced. On the next run only new or modified images need to be
+parsed; results for deleted images are dropped, and the merged records are
+rebuilt from the per-file snapshot instead of re-reading the whole archive.
+"""
+
+import os
+import json
+import logging
+from datetime import date as date_type
+
+from ocr_cache import file_digest
+
+MANIFEST_VERSION = 2
+
+
+class IngestManifest:
+    """Per-file snapshot of processed images and their parsed prices"""
+
+    def __init__(self, path, input_folder, fingerprint):
+        self.path = path
+        self.input_folder = input_folder
+        self.fingerprint = fingerprint
+        self.files = {}
+        self._seen = set()
+        self.unchanged = 0
+        self.added = 0
+        self.modified = 0
+        self.deleted = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != MANIFEST_VERSION or data.get('fingerprint') != self.fingerprint:
+            # OCR settings or patterns changed: every file must be re-parsed (the OCR cache keeps
+            # this cheap when only the patterns changed)
+            logging.info("Ingest manifest is stale; rebuilding all entries")
+            return
+        self.files = data.get('files', {})
+
+    def _key(self, path):
+        return os.path.relpath(path, self.input_folder).replace(os.sep, '/')
+
+    def _path(self, key):
+        return os.path.join(self.input_folder, *key.split('/'))
+
+    def signatures(self):
+        """(path, (width, height, dhash)) of every remembered image that has a perceptual hash"""
+        for key, entry in self.files.items():
+            if entry.get('dhash'):
+                yield self._path(key), entry['dhash']
+
+    def result(self, path):
+        """The remembered (date, prices) of an image, or None"""
+        entry = self.files.get(self._key(path))
+        if entry is None:
+            return None
+        return date_type.fromisoformat(entry['date']), entry['prices']
+
+    def lookup(self, path):
+        """((date, prices), digest) for an unchanged file, or (None, digest) if it needs parsing.
+
+        digest is None when it was not needed to decide. Called once per file as
+        the archive is walked; finish() then drops files that were not seen.
+        """
+        key = self._key(path)
+        self._seen.add(key)
+        entry = self.files.get(key)
+        if entry is None:
+            self.added += 1
+            return None, None
+        st = os.stat(path)
+        if entry['size'] != st.st_size or entry['mtime'] != st.st_mtime:
+            # Touched or replaced: only the content hash can tell
+            digest = file_digest(path)
+            if digest != entry['sha256']:
+                self.modified += 1
+                return None, digest
+            entry['size'], entry['mtime'] = st.st_size, st.st_mtime
+        self.unchanged += 1
+        return (date_type.fromisoformat(entry['date']), entry['prices']), entry['sha256']
+
+    def finish(self):
+        """Drop entries for files that have been deleted, and log what changed"""
+        for key in [k for k in self.files if k not in self._seen]:
+            del self.files[key]
+            self.deleted += 1
+        logging.info("Incremental ingest: %d unchanged, %d new, %d modified, %d deleted",
+                     self.unchanged, self.added, self.modified, self.deleted)
+
+    def record(self, path, digest, date, prices, signature=None):
+        """Remember the parse result for one image, and its (width, height, dhash) when known"""
+        st = os.stat(path)
+        self.files[self._key(path)] = {
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'sha256': digest or file_digest(path),
+            'dhash': list(signature) if signature else None,
+            'date': date.isoformat(),
+            'prices': prices,
+        }
+
+    def save(self):
+        data = {
+            'version': MANIFEST_VERSION,
+            'fingerprint': self.fingerprint,
+            'files': dict(sorted(self.files.items())),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
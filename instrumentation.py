@@ -0,0 +1,202 @@
+"""
+Run instrumentation for the Byadgi price generator.
+
+Wrap a piece of work in `with stage('name', image=path):`, or a function in
+@timed('name'), and it is recorded with its wall time, CPU time (of the
+process doing the work) and the peak RSS of that process when the stage
+ended. Peak RSS is a high-water mark, so the stage where it jumps is the one
+that grew the process. Records from OCR pool workers are sent back with each
+image's result and added to the parent's report with add().
+
+At the end of a run write_report() stores every record plus a per-stage and
+per-image summary as <base>.json and <base>.csv. profiled() wraps a whole
+run in cProfile, or pyinstrument when it is installed, and dumps the profile
+next to the report.
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import logging
+import functools
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS comes from psutil, when it is installed
+    resource = None
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+FIELDS = ('stage', 'image', 'pid', 'start', 'wall_s', 'cpu_s', 'peak_rss_mb')
+
+_records = []
+_run_start = time.time()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None when it can't be read)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    return None
+
+
+@contextmanager
+def stage(name, image=None):
+    """Record wall time, CPU time and peak RSS of the enclosed block"""
+    start = time.time()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        _records.append({
+            'stage': name,
+            'image': os.path.basename(image) if image else '',
+            'pid': os.getpid(),
+            'start': start,  # epoch seconds; pool workers have their own run clock
+            'wall_s': round(time.perf_counter() - wall, 6),
+            'cpu_s': round(time.process_time() - cpu, 6),
+            'peak_rss_mb': peak_rss_mb(),
+        })
+
+
+def timed(name):
+    """Decorator form of stage(): record every call of the function"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def mark():
+    """Position in the record list, for records_since()"""
+    return len(_records)
+
+
+def records_since(position):
+    """Records made after mark() returned position (e.g. by one pool task)"""
+    return _records[position:]
+
+
+def add(records):
+    """Merge records made in another process"""
+    _records.extend(records)
+
+
+def records():
+    """Copy of everything recorded so far"""
+    return list(_records)
+
+
+def reset():
+    """Forget all records and restart the run clock"""
+    global _run_start
+    _records.clear()
+    _run_start = time.time()
+
+
+def _summarize(key):
+    groups = {}
+    for r in _records:
+        if r[key]:
+            groups.setdefault(r[key], []).append(r)
+    summary = {}
+    for name, rows in groups.items():
+        walls = [r['wall_s'] for r in rows]
+        peaks = [r['peak_rss_mb'] for r in rows if r['peak_rss_mb'] is not None]
+        summary[name] = {
+            'count': len(rows),
+            'wall_s': round(sum(walls), 4),
+            'wall_max_s': round(max(walls), 4),
+            'cpu_s': round(sum(r['cpu_s'] for r in rows), 4),
+            'peak_rss_mb': max(peaks) if peaks else None,
+        }
+    return summary
+
+
+def summary():
+    """{'stages': {stage: totals}, 'images': {image: totals}}, slowest first"""
+    by_wall = lambda d: dict(sorted(d.items(), key=lambda kv: kv[1]['wall_s'], reverse=True))
+    return {'stages': by_wall(_summarize('stage')), 'images': by_wall(_summarize('image'))}
+
+
+def write_report(base):
+    """Write <base>.json (summary plus records) and <base>.csv (records); returns the JSON path"""
+    os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+    # start times relative to the run, which is easier to read than epoch seconds
+    rows = [dict(r, start=round(r['start'] - _run_start, 4)) for r in _records]
+    report = {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(_run_start)),
+        'wall_s': round(time.time() - _run_start, 3),
+        **summary(),
+        'records': rows,
+    }
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    with open(base + '.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    for name, s in list(report['stages'].items())[:5]:
+        logging.info("Stage %-20s %4d x  wall %.2fs  cpu %.2fs  peak RSS %s MB",
+                     name, s['count'], s['wall_s'], s['cpu_s'], s['peak_rss_mb'])
+    logging.info("Run report: %s.json / .csv", base)
+    return base + '.json'
+
+
+@contextmanager
+def profiled(kind, base):
+    """Profile the enclosed block with 'cprofile' or 'pyinstrument' and dump it next to base.
+
+    kind None does nothing. cProfile writes <base>.prof (open with snakeviz or
+    pstats); pyinstrument writes <base>.html, falling back to cProfile when
+    the package is not installed.
+    """
+    if not kind:
+        yield
+        return
+    if kind == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logging.warning("pyinstrument is not installed; profiling with cProfile instead")
+            kind = 'cprofile'
+    if kind not in ('cprofile', 'pyinstrument'):
+        raise ValueError(f"Unknown profiler {kind!r}; use 'cprofile' or 'pyinstrument'")
+    os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+
+    if kind == 'pyinstrument':
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(base + '.html', 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            logging.info("Profile: %s.html", base)
+        return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(base + '.prof')
+        logging.info("Profile: %s.prof", base)
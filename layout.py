@@ -0,0 +1,93 @@
+"""
+Layout detection for rate-card screenshots.
+
+Works on the binarized image from preprocess.py (0 = ink, 255 = paper) using
+row and column projection profiles: rows holding text form horizontal
+"bands", and the price table is the longest run of evenly spaced bands.
+Cropping to it keeps Tesseract away from WhatsApp chrome, contact banners
+and footers, which are slow to OCR and only produce noise lines.
+"""
+
+import numpy as np
+
+
+def text_bands(ink, max_fill=0.6):
+    """(start, end) row ranges of text lines in a boolean ink mask.
+
+    Rows with no ink separate lines; rows that are mostly ink (solid banners,
+    colour bars that binarized to black) are treated as separators too.
+    """
+    counts = ink.sum(axis=1)
+    texty = (counts > 0) & (counts <= max_fill * ink.shape[1])
+    edges = np.diff(np.concatenate(([0], texty.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def _table_run(bands, max_gap, min_rows):
+    """Index range [i, j) of the longest run of evenly spaced bands.
+
+    A gap ends the run when it is wider than max_gap line heights and also
+    clearly wider than the typical gap (table rows dominate the card, so the
+    median gap is the row spacing).
+    """
+    if len(bands) < min_rows:
+        return None
+    heights = np.array([e - s for s, e in bands])
+    gaps = np.array([bands[k + 1][0] - bands[k][1] for k in range(len(bands) - 1)])
+    limit = max(max_gap * max(float(np.median(heights)), 1.0),
+                1.5 * float(np.median(gaps)) if gaps.size else 0.0)
+    best = (0, 0)
+    start = 0
+    for k, gap in enumerate(gaps, 1):
+        if gap > limit:
+            if k - start > best[1] - best[0]:
+                best = (start, k)
+            start = k
+    if len(bands) - start > best[1] - best[0]:
+        best = (start, len(bands))
+    if best[1] - best[0] < min_rows:
+        return None
+    return best
+
+
+def find_table_roi(bw, min_rows=3, max_gap=2.5, margin=None):
+    """(top, bottom, left, right) of the price table in a binarized array, or None.
+
+    None means no convincing table was found and the whole image should be OCR'd.
+    """
+    ink = bw == 0
+    bands = text_bands(ink)
+    run = _table_run(bands, max_gap, min_rows)
+    if run is None:
+        return None
+    i, j = run
+    top, bottom = bands[i][0], bands[j - 1][1]
+
+    cols = np.flatnonzero(ink[top:bottom].any(axis=0))
+    if cols.size == 0:
+        return None
+    left, right = int(cols[0]), int(cols[-1]) + 1
+
+    if margin is None:
+        margin = max(4, int(np.median([e - s for s, e in bands[i:j]])) // 2)
+    h, w = bw.shape
+    return (max(0, top - margin), min(h, bottom + margin),
+            max(0, left - margin), min(w, right + margin))
+
+
+def row_strips(bw, roi, margin=2):
+    """(top, bottom) of each text line inside a table ROI, for per-row OCR"""
+    top, bottom, left, right = roi
+    bands = text_bands(bw[top:bottom, left:right] == 0)
+    return [(max(top, top + s - margin), min(bottom, top + e + margin)) for s, e in bands]
+
+
+def header_span(bw, roi):
+    """(top, bottom) of the text lines above a table ROI, skipping bars and margins; or None"""
+    top = roi[0]
+    bands = text_bands(bw[:top] == 0)
+    if not bands:
+        return None
+    return bands[0][0], top
@@ -0,0 +1,170 @@
+"""
+OCR engines behind one small interface.
+
+pytesseract starts a new ``tesseract`` process, and reloads the language
+model, for every call. TesserocrBackend instead keeps one libtesseract
+instance alive (one per worker process) and feeds it image after image, which
+removes the spawn and model-load cost from every call after the first.
+PytesseractBackend remains the fallback when tesserocr is not installed.
+"""
+
+import os
+import shlex
+import logging
+
+
+def parse_config(config):
+    """Split a tesseract command-line config into (psm, {variable: value})"""
+    psm = None
+    variables = {}
+    args = shlex.split(config or '')
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--psm' and i + 1 < len(args):
+            psm = int(args[i + 1])
+            i += 1
+        elif arg == '-c' and i + 1 < len(args):
+            key, _, value = args[i + 1].partition('=')
+            variables[key] = value
+            i += 1
+        i += 1
+    return psm, variables
+
+
+class PytesseractBackend:
+    """One tesseract subprocess per call"""
+
+    name = 'pytesseract'
+
+    def __init__(self, lang='eng', tesseract_cmd=None):
+        import pytesseract
+        self._pytesseract = pytesseract
+        self.lang = lang
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    def image_to_string(self, img, config=''):
+        return self._pytesseract.image_to_string(img, lang=self.lang, config=config)
+
+    def images_to_strings(self, images, config=''):
+        return [self.image_to_string(img, config) for img in images]
+
+    def image_to_words(self, img, config=''):
+        """[(text, left, top, width, height, conf, line)] for every recognised word"""
+        d = self._pytesseract.image_to_data(img, lang=self.lang, config=config,
+                                            output_type=self._pytesseract.Output.DICT)
+        lines = {}
+        words = []
+        for i, text in enumerate(d['text']):
+            if d['level'][i] != 5 or not text.strip():
+                continue
+            line = lines.setdefault((d['block_num'][i], d['par_num'][i], d['line_num'][i]), len(lines))
+            words.append((text, d['left'][i], d['top'][i], d['width'][i], d['height'][i],
+                          float(d['conf'][i]), line))
+        return words
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """A long-lived libtesseract engine; images are fed to it one after another"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng', tesseract_cmd=None):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self._api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def _recognize(self, img, psm):
+        self._api.SetPageSegMode(psm)
+        self._api.SetImage(img)
+        return self._api.GetUTF8Text()
+
+    def images_to_strings(self, images, config=''):
+        psm, variables = parse_config(config)
+        if psm is None:
+            psm = self._tesserocr.PSM.AUTO
+        # -c variables stick to the engine, so restore them after this batch
+        saved = {k: self._api.GetVariableAsString(k) for k in variables}
+        for k, v in variables.items():
+            self._api.SetVariable(k, v)
+        try:
+            return [self._recognize(img, psm) for img in images]
+        finally:
+            for k, v in saved.items():
+                self._api.SetVariable(k, v if v is not None else '')
+            self._api.Clear()
+
+    def image_to_string(self, img, config=''):
+        return self.images_to_strings([img], config)[0]
+
+    def image_to_words(self, img, config=''):
+        """[(text, left, top, width, height, conf, line)] for every recognised word"""
+        tesserocr = self._tesserocr
+        psm, variables = parse_config(config)
+        saved = {k: self._api.GetVariableAsString(k) for k in variables}
+        for k, v in variables.items():
+            self._api.SetVariable(k, v)
+        try:
+            self._api.SetPageSegMode(tesserocr.PSM.AUTO if psm is None else psm)
+            self._api.SetImage(img)
+            self._api.Recognize()
+            level = tesserocr.RIL.WORD
+            words = []
+            line = -1
+            for it in tesserocr.iterate_level(self._api.GetIterator(), level):
+                if it.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line += 1
+                text = it.GetUTF8Text(level)
+                if not text or not text.strip():
+                    continue
+                x1, y1, x2, y2 = it.BoundingBox(level)
+                words.append((text, x1, y1, x2 - x1, y2 - y1, it.Confidence(level), line))
+            return words
+        finally:
+            for k, v in saved.items():
+                self._api.SetVariable(k, v if v is not None else '')
+            self._api.Clear()
+
+    def close(self):
+        self._api.End()
+
+
+BACKENDS = {
+    'tesserocr': TesserocrBackend,
+    'pytesseract': PytesseractBackend,
+}
+
+_engine = None  # ((pid, name, lang), backend): one engine per worker process
+
+
+def create_backend(name='auto', lang='eng', tesseract_cmd=None):
+    """Build an OCR backend by name; 'auto' prefers tesserocr and falls back to pytesseract"""
+    if name == 'auto':
+        try:
+            return TesserocrBackend(lang, tesseract_cmd)
+        except Exception as e:
+            logging.debug("tesserocr unavailable (%s); using pytesseract", e)
+            return PytesseractBackend(lang, tesseract_cmd)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend {name!r}; choose from auto, {', '.join(BACKENDS)}")
+    return BACKENDS[name](lang, tesseract_cmd)
+
+
+def get_backend(name='auto', lang='eng', tesseract_cmd=None):
+    """The OCR backend for this process, created on first use and then reused.
+
+    Keyed by pid so a pool worker never shares an engine inherited from its parent.
+    """
+    global _engine
+    key = (os.getpid(), name, lang)
+    if _engine is None or _engine[0] != key:
+        if _engine is not None and _engine[0][0] == key[0]:
+            _engine[1].close()
+        _engine = (key, create_backend(name, lang, tesseract_cmd))
+        logging.info("OCR backend: %s (pid %d)", _engine[1].name, key[0])
+    return _engine[1]
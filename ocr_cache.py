@@ -0,0 +1,119 @@
+"""
+Persistent OCR result cache for the Byadgi price generator.
+
+Entries are keyed by the SHA-256 of the image bytes plus a fingerprint of the
+OCR settings, so a rate card is OCR'd once no matter how often the archive is
+rebuilt or the file renamed. Each entry also stores the parsed (date, prices)
+tagged with the parser version; when the variety/ignore patterns change the
+stored OCR output (text, or word boxes) is re-parsed instead of sending the
+image back to Tesseract.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from datetime import date as date_type
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file's contents"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class OcrCache:
+    """Content-addressed, size-bounded on-disk cache of OCR text and parsed prices"""
+
+    def __init__(self, cache_dir, ocr_fingerprint, parser_version, max_bytes=256 << 20):
+        self.cache_dir = cache_dir
+        self.ocr_fingerprint = ocr_fingerprint
+        self.parser_version = parser_version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.reparsed = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, digest):
+        key = hashlib.sha256(f'{digest}:{self.ocr_fingerprint}'.encode('ascii')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, digest):
+        """Return the cached entry for an image digest, or None on a miss"""
+        path = self._entry_path(digest)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # mtime doubles as the last-used time for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    def parsed(self, entry):
+        """(date, prices) stored in an entry, or None if a different parser version produced it"""
+        if entry.get('parser_version') != self.parser_version:
+            return None
+        d = entry.get('date')
+        return (date_type.fromisoformat(d) if d else None), entry.get('prices', {})
+
+    @staticmethod
+    def ocr_output(entry):
+        """The stored OCR output: a word-box list, or raw text"""
+        return entry.get('ocr_words') or entry.get('ocr_text', '')
+
+    def put(self, digest, ocr, date, prices):
+        """Store raw OCR output (text or word boxes) and its parsed result for an image digest"""
+        entry = {
+            'ocr_words' if isinstance(ocr, list) else 'ocr_text': ocr,
+            'parser_version': self.parser_version,
+            'date': date.isoformat() if date else None,
+            'prices': prices,
+        }
+        path = self._entry_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def prune(self):
+        """Evict least-recently-used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for fn in files:
+                p = os.path.join(root, fn)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+
+        removed = 0
+        if total > self.max_bytes:
+            for _, size, p in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(p)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            logging.info("OCR cache: evicted %d entries, %.1f MB left", removed, total / 1e6)
+        return removed
+
+    def log_stats(self):
+        logging.info("OCR cache: %d hits (%d re-parsed), %d misses",
+                     self.hits, self.reparsed, self.misses)
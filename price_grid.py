@@ -0,0 +1,122 @@
+"""
+Row/column grid over word-level OCR output.
+
+Tesseract reports every word with its bounding box and the line it belongs
+to. Grouping words by line gives the table rows; clustering the x-centres of
+the numeric words of the variety rows gives the price columns. A price can then be read from its
+(row, column) cell instead of guessing from its position in a flattened text
+line, and a grade header row ("DLX  BEST  MEDIUM") names the columns.
+"""
+
+import re
+import bisect
+from collections import namedtuple
+
+# line: engine line id, unique within one OCR'd image
+Word = namedtuple('Word', 'text left top width height conf line')
+
+# "11/12/25", "06-11-2025": digit-heavy, but a date rather than a price
+DATE_TOKEN_RE = re.compile(r'\d{1,4}[/.-]\d{1,2}[/.-]\d{2,4}')
+
+
+def _is_numeric(text):
+    if DATE_TOKEN_RE.fullmatch(text.strip(' .,:|')):
+        return False
+    digits = sum(ch.isdigit() for ch in text)
+    return digits >= 3 and digits * 2 >= len(text)
+
+
+class PriceGrid:
+    """Rows of words plus the x-centres of the price columns.
+
+    is_name(text) marks numeric words that belong to a variety name (the 2043
+    in "Syngenta 2043"); they never count as prices or define a column.
+    is_price_row(text) marks the rows whose numbers define the columns, so the
+    date and bag counts above the table don't add columns of their own.
+    """
+
+    def __init__(self, words, is_name=None, is_price_row=None):
+        self.is_name = is_name or (lambda text: False)
+        self.is_price_row = is_price_row or (lambda text: True)
+        self.rows = []
+        index = {}
+        for w in words:
+            if not w.text.strip():
+                continue
+            if w.line not in index:
+                index[w.line] = len(self.rows)
+                self.rows.append([])
+            self.rows[index[w.line]].append(w)
+        for row in self.rows:
+            row.sort(key=lambda w: w.left)
+        self.columns = self._find_columns()
+
+    def _find_columns(self):
+        """Cluster numeric word centres of the price rows.
+
+        A gap wider than a typical number starts a new column.
+        """
+        nums = [w for r, row in enumerate(self.rows) if self.is_price_row(self.row_text(r))
+                for w in row if self._is_price(w.text)]
+        if not nums:
+            return []
+        centres = sorted(w.left + w.width / 2 for w in nums)
+        widths = sorted(w.width for w in nums)
+        gap = widths[len(widths) // 2]
+        columns = [[centres[0]]]
+        for c in centres[1:]:
+            if c - columns[-1][-1] > gap:
+                columns.append([])
+            columns[-1].append(c)
+        return [sum(col) / len(col) for col in columns]
+
+    def _is_price(self, text):
+        return _is_numeric(text) and not self.is_name(text)
+
+    def column_of(self, word):
+        """Index of the price column nearest to a word's centre"""
+        if not self.columns:
+            return None
+        c = word.left + word.width / 2
+        i = bisect.bisect_left(self.columns, c)
+        if i == 0:
+            return 0
+        if i == len(self.columns):
+            return i - 1
+        return i if self.columns[i] - c < c - self.columns[i - 1] else i - 1
+
+    def row_text(self, r):
+        return ' '.join(w.text for w in self.rows[r])
+
+    def text(self):
+        return '\n'.join(self.row_text(r) for r in range(len(self.rows)))
+
+    def cells(self, r):
+        """[(column, text)] for the numeric cells of row r, left to right.
+
+        Adjacent words in the same column are joined so "28000 - 29000" stays one cell.
+        """
+        cells = []
+        for w in self.rows[r]:
+            col = self.column_of(w)
+            if self._is_price(w.text) or (cells and cells[-1][0] == col and w.text in ('-', 'to')):
+                if cells and cells[-1][0] == col:
+                    cells[-1] = (col, cells[-1][1] + ' ' + w.text)
+                else:
+                    cells.append((col, w.text))
+        return cells
+
+    def header_columns(self, r, pattern):
+        """{column: label} when row r is a grade header: no numbers, two or more labelled columns.
+
+        Words matching the compiled pattern are joined per column, so "Medium BEST" survives.
+        """
+        row = self.rows[r]
+        if not self.columns or any(self._is_price(w.text) for w in row):
+            return {}
+        labels = {}
+        for w in row:
+            if pattern.fullmatch(w.text.strip(' .:|')):
+                col = self.column_of(w)
+                labels[col] = f"{labels[col]} {w.text}" if col in labels else w.text
+        return labels if len(labels) >= 2 else {}
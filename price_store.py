@@ -0,0 +1,189 @@
+"""
+Columnar store of price observations for the Byadgi price generator.
+
+Every observation is one (day, code, price) triple held in three parallel
+columns: int32 days since 1970-01-01, an int16 code into the table of
+"variety | grade" labels, and the int32 price. That is 10 bytes an
+observation instead of a dict entry per cell, and whole-archive questions
+(a date range, one variety) become vectorized masks over the columns.
+
+On disk a store is a folder of raw little-endian column files plus
+labels.json. The columns are memory-mapped when opened, and new
+observations are appended to the end of the files, so neither reading a
+slice nor adding a week loads the full history.
+"""
+
+import os
+import json
+from array import array
+from datetime import date as date_type
+
+import numpy as np
+
+STORE_VERSION = 1
+
+# name, on-disk dtype, array typecode for the in-memory append buffer
+COLUMNS = (
+    ('day', np.dtype('<i4'), 'i'),
+    ('code', np.dtype('<i2'), 'h'),
+    ('price', np.dtype('<i4'), 'i'),
+)
+
+_EPOCH = date_type(1970, 1, 1)
+_MAX_CODES = np.iinfo(np.int16).max + 1
+
+
+def day_number(d):
+    """Days since 1970-01-01 for a date"""
+    return (d - _EPOCH).days
+
+
+class PriceStore:
+    """Append-only (day, code, price) columns with a label table.
+
+    Observations are kept in arrival order. When the same (day, label) is
+    recorded more than once the latest observation wins, matching how later
+    rate cards overrode earlier ones in the old records dict.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.labels = []
+        self._label_codes = {}
+        self._base = {name: np.empty(0, dtype) for name, dtype, _ in COLUMNS}
+        self._pending = {name: array(typecode) for name, _, typecode in COLUMNS}
+        if path and os.path.exists(os.path.join(path, 'labels.json')):
+            self._load()
+
+    def _column_path(self, name, path=None):
+        return os.path.join(path or self.path, name + '.bin')
+
+    def _file_length(self, name, dtype):
+        try:
+            return os.path.getsize(self._column_path(name)) // dtype.itemsize
+        except OSError:
+            return 0
+
+    def _load(self):
+        with open(os.path.join(self.path, 'labels.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported price store version {meta.get('version')!r} in {self.path}")
+        self.labels = meta['labels']
+        self._label_codes = {label: i for i, label in enumerate(self.labels)}
+        # an interrupted flush can leave one column longer than the others; ignore the tail
+        n = min(self._file_length(name, dtype) for name, dtype, _ in COLUMNS)
+        for name, dtype, _ in COLUMNS:
+            # np.memmap refuses empty files; an empty store just has empty columns
+            self._base[name] = (np.memmap(self._column_path(name), dtype=dtype, mode='r', shape=(n,))
+                                if n else np.empty(0, dtype))
+
+    def __len__(self):
+        return len(self._base['day']) + len(self._pending['day'])
+
+    def code(self, label):
+        """Code for a label, adding it to the table on first use"""
+        code = self._label_codes.get(label)
+        if code is None:
+            if len(self.labels) >= _MAX_CODES:
+                raise ValueError("Price store is full: too many variety/grade labels for int16 codes")
+            code = self._label_codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def append(self, day, prices):
+        """Add one card's {label: price} observed on a date"""
+        d = day_number(day)
+        for label, price in prices.items():
+            self._pending['day'].append(d)
+            self._pending['code'].append(self.code(label))
+            self._pending['price'].append(int(price))
+
+    def column(self, name):
+        """A whole column as a NumPy array (memory-mapped part plus pending appends)"""
+        base = self._base[name]
+        pending = self._pending[name]
+        if not pending:
+            return base
+        return np.concatenate([base, np.frombuffer(pending, dtype=base.dtype.newbyteorder('='))])
+
+    def select(self, start=None, end=None, labels=None):
+        """(days, codes, prices) for observations in [start, end] and, optionally, some labels"""
+        days, codes, prices = (self.column(name) for name, _, _ in COLUMNS)
+        mask = np.ones(len(days), dtype=bool)
+        if start is not None:
+            mask &= days >= day_number(start)
+        if end is not None:
+            mask &= days <= day_number(end)
+        if labels is not None:
+            wanted = [self._label_codes[label] for label in labels if label in self._label_codes]
+            mask &= np.isin(codes, wanted)
+        return days[mask], codes[mask], prices[mask]
+
+    def matrix(self, start=None, end=None, labels=None):
+        """Dense (dates, labels, values) pivot of a slice.
+
+        dates is a sorted datetime64[D] array, labels the label strings, and
+        values a float64 array of shape (dates, labels) with NaN where a label
+        was not quoted that day.
+        """
+        days, codes, prices = self.select(start, end, labels)
+        day_values, rows = np.unique(days, return_inverse=True)
+        code_values, cols = np.unique(codes, return_inverse=True)
+        values = np.full((len(day_values), len(code_values)), np.nan)
+        # NumPy leaves the order of repeated fancy-index writes unspecified, so
+        # keep only the latest observation of each (row, col) before assigning
+        keys = rows * len(code_values) + cols
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last
+        values[rows[last], cols[last]] = prices[last]
+        dates = day_values.astype('datetime64[D]')
+        return dates, [self.labels[c] for c in code_values], values
+
+    def to_records(self):
+        """The old {date: {label: price}} dict, e.g. for comparing against earlier output"""
+        records = {}
+        for d, c, p in zip(*(self.column(name).tolist() for name, _, _ in COLUMNS)):
+            records.setdefault(date_type.fromordinal(_EPOCH.toordinal() + d), {})[self.labels[c]] = p
+        return records
+
+    def _write_labels(self, path):
+        tmp = os.path.join(path, 'labels.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': STORE_VERSION, 'labels': self.labels}, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(path, 'labels.json'))
+
+    def _release(self):
+        """Swap memory-mapped columns for private copies so their files can be rewritten"""
+        for name, dtype, _ in COLUMNS:
+            self._base[name] = np.array(self._base[name], dtype=dtype)
+
+    def flush(self):
+        """Append pending observations to the store's files and re-map them"""
+        if not self.path:
+            raise ValueError("PriceStore.flush() needs a store opened with a path; use save()")
+        os.makedirs(self.path, exist_ok=True)
+        # labels only ever grow, so writing them first never leaves a code without a name
+        self._write_labels(self.path)
+        n = len(self._base['day'])
+        self._base = {name: np.empty(0, dtype) for name, dtype, _ in COLUMNS}
+        for name, dtype, typecode in COLUMNS:
+            col_path = self._column_path(name)
+            with open(col_path, 'r+b' if os.path.exists(col_path) else 'wb') as f:
+                f.truncate(n * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.asarray(self._pending[name], dtype=dtype).tobytes())
+            self._pending[name] = array(typecode)
+        self._load()
+
+    def save(self, path):
+        """Write the whole store to a new folder, replacing any store already there"""
+        os.makedirs(path, exist_ok=True)
+        if self.path and os.path.abspath(path) == os.path.abspath(self.path):
+            self._release()
+        for name, dtype, _ in COLUMNS:
+            tmp = self._column_path(name, path) + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(np.ascontiguousarray(self.column(name), dtype=dtype).tobytes())
+            os.replace(tmp, self._column_path(name, path))
+        self._write_labels(path)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Namma Byadgi Rate Sheet Builder
+Parses the rate sheet CSV once at build time and bakes the price table into index.html
+
+The page used to carry the whole sheet as a CSV string and parse it, and
+build the table node by node, on every load. Now this script does that work:
+it writes the table as static HTML between the rate-table markers in
+index.html, and the AC / NEW CROP sections as typed JSON (prices as integers,
+placeholders as null) to rate_sheet.json.
+
+The sheet layout (section titles, variety headers, arrivals rows, footer)
+and the price cells are read here only; generate_data.py builds data.json
+from the same classify_rows() and PRICE_RE.
+"""
+
+import csv
+import html
+import json
+import re
+import sys
+
+TABLE_BEGIN = '<!-- rate-table:begin -->'
+TABLE_END = '<!-- rate-table:end -->'
+
+AC_TITLE = '🌶️ AC COLD STORAGE - Dry Chilli Prices TRENDS'
+MOISTURE_TITLE = '🌱 NEW CROP / MOISTURE ARRIVALS'
+
+# Layout marks, matched against the first cell of a row
+SECTION_MARKS = {'ac': 'COLD STORAGE', 'moisture': 'NEW CROP'}
+HEADER_PREFIX = 'Variety'
+ARRIVALS_MARK = 'Arrival'
+SPACER = 'c'  # stray row under the AC block
+FOOTER_MARKS = ('Namma Byagdi', 'All prices mentioned', 'Prices are indicative')
+
+PRICE_RE = re.compile(r'\d[\d,]*')
+
+
+def read_rows(path, delimiter=','):
+    """All non-empty CSV rows, cells stripped"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        return [[cell.strip() for cell in row] for row in csv.reader(f, delimiter=delimiter)
+                if any(c.strip() for c in row)]
+
+
+def parse_price(text):
+    """'34,500' -> 34500; blanks and '—' / '--' placeholders -> None"""
+    text = text.strip()
+    if not PRICE_RE.fullmatch(text):
+        return None
+    return int(text.replace(',', ''))
+
+
+def _is_end(cell):
+    return cell == SPACER or cell.startswith('NOTE') or any(mark in cell for mark in FOOTER_MARKS)
+
+
+def classify_rows(first_cells):
+    """(section, role) of every row, from its first cell.
+
+    section is 'ac' or 'moisture', or None outside both; role is 'title',
+    'arrivals', 'header', 'variety' or None. A section runs from its title to
+    the spacer row, the footer or the next title. Only rows below a variety
+    header count as varieties, so a section whose header is missing has none.
+    """
+    out = []
+    section, header_seen = None, False
+    for cell in first_cells:
+        kind = next((k for k, mark in SECTION_MARKS.items() if mark in cell), None)
+        if kind:
+            section, header_seen = kind, False
+            out.append((section, 'title'))
+            continue
+        if _is_end(cell):
+            section = None
+        if section is None or not cell:
+            out.append((section, None))
+        elif cell.startswith(HEADER_PREFIX):
+            header_seen = True
+            out.append((section, 'header'))
+        elif ARRIVALS_MARK in cell:
+            out.append((section, 'arrivals'))
+        else:
+            out.append((section, 'variety' if header_seen else None))
+    return out
+
+
+def parse_sheet(rows):
+    """{'ac': section, 'moisture': section}; each section has its header, arrivals and rows.
+
+    The first section of each kind is used; a missing one comes out empty.
+    """
+    roles = classify_rows([row[0] for row in rows])
+
+    def section(key, title):
+        start = next((i for i, (sec, role) in enumerate(roles) if sec == key and role == 'title'), len(rows))
+        block = []
+        for i in range(start, len(rows)):
+            if roles[i][0] != key or (i > start and roles[i][1] == 'title'):
+                break
+            block.append(i)
+        picked = {role: [rows[i] for i in block if roles[i][1] == role]
+                  for role in ('header', 'arrivals', 'variety')}
+        header = picked['header'][0] if picked['header'] else []
+        arrivals = picked['arrivals'][0] if picked['arrivals'] else None
+        return {
+            'title': title,
+            'header': header,
+            'dates': header[1:],
+            'arrivals': [parse_price(c) for c in arrivals[1:]] if arrivals else [],
+            'rows': [{'variety': r[0], 'cells': r[1:], 'prices': [parse_price(c) for c in r[1:]]}
+                     for r in picked['variety']],
+        }
+
+    return {'ac': section('ac', AC_TITLE), 'moisture': section('moisture', MOISTURE_TITLE)}
+
+
+def render_table(sheet):
+    """The price table as one HTML string, same layout the page used to build in JS"""
+    e = html.escape
+    out = ['<table>']
+    for i, key in enumerate(('ac', 'moisture')):
+        sec = sheet[key]
+        width = len(sec['header'])
+        if i:
+            out.append(f'<tr><th colspan="{len(sheet["ac"]["header"])}"></th></tr>')
+        out.append(f'<tr><th colspan="{width}">{e(sec["title"])}</th></tr>')
+        out.append('<tr>' + ''.join(f'<th>{e(h)}</th>' for h in sec['header']) + '</tr>')
+        for row in sec['rows']:
+            out.append('<tr>' + ''.join(f'<td>{e(c)}</td>' for c in [row['variety']] + row['cells']) + '</tr>')
+    out.append('</table>')
+    return '\n'.join(out)
+
+
+def inject_table(page, table):
+    """Replace whatever sits between the rate-table markers in the page"""
+    start = page.index(TABLE_BEGIN) + len(TABLE_BEGIN)
+    end = page.index(TABLE_END, start)
+    return page[:start] + '\n' + table + '\n' + page[end:]
+
+
+def build(csv_path, html_path, json_path):
+    rows = read_rows(csv_path)
+    sheet = parse_sheet(rows)
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({key: {k: v for k, v in sec.items() if k != 'header'} for key, sec in sheet.items()},
+                  f, ensure_ascii=False)
+
+    with open(html_path, encoding='utf-8') as f:
+        page = f.read()
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(inject_table(page, render_table(sheet)))
+
+    print(f"✅ {len(sheet['ac']['rows'])} AC rows, {len(sheet['moisture']['rows'])} moisture rows")
+    return sheet
+
+
+if __name__ == "__main__":
+    # Change these paths as needed
+    CSV_FILE = sys.argv[1] if len(sys.argv) > 1 else "rate_sheet.csv"
+    HTML_FILE = "index.html"
+    JSON_FILE = "rate_sheet.json"
+
+    print("🌶️ Namma Byadgi Rate Sheet Builder")
+    print(f"📂 Input: {CSV_FILE}")
+    print(f"📂 Output: {HTML_FILE}, {JSON_FILE}\n")
+
+    build(CSV_FILE, HTML_FILE, JSON_FILE)
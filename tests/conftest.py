@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+import byadgi_trends as bt
+
+
+class FakeOcr:
+    """Stands in for byadgi_trends.ocr_image: results by file name, and a log of what was OCR'd"""
+
+    def __init__(self):
+        self.results = {}  # file name -> (date, prices)
+        self.calls = []
+
+    def __call__(self, path):
+        name = os.path.basename(path)
+        self.calls.append(name)
+        if name not in self.results:
+            return None, None, {}, None
+        date, prices = self.results[name]
+        return 'ocr text', date, dict(prices), 'fast'
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """Serial ingest with a fake OCR engine and no OCR cache, dedup or price store"""
+    ocr = FakeOcr()
+    monkeypatch.setattr(bt, 'ocr_image', ocr)
+    monkeypatch.setattr(bt, 'DEDUP_IMAGES', False)
+    monkeypatch.setattr(bt, 'OCR_CACHE_DIR', None)
+    monkeypatch.setattr(bt, 'PRICE_STORE', None)
+    return ocr
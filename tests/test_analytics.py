@@ -0,0 +1,66 @@
+import numpy as np
+
+import analytics
+
+NAN = np.nan
+DATES = [f'{d:02d} Jan 2026' for d in range(1, 7)]
+LABELS = ['A | DLX', 'B | BEST', 'C | FATKI']
+VALUES = np.array([
+    [100.0, 200.0, NAN],
+    [110.0, 200.0, NAN],
+    [121.0, 180.0, NAN],
+    [121.0, 180.0, NAN],
+    [110.0, 198.0, NAN],
+    [99.0, 198.0, 50.0],
+])
+
+
+def test_pct_change_skips_missing_and_zero_bases():
+    values = np.array([[100.0], [0.0], [50.0], [NAN], [60.0]])
+    out = analytics.pct_change(values)
+    np.testing.assert_array_equal(np.isnan(out[:, 0]), [True, False, True, True, True])
+    assert out[1, 0] == -100.0
+
+
+def test_rolling_mean_ignores_missing_weeks():
+    values = np.array([[10.0], [NAN], [20.0], [30.0]])
+    np.testing.assert_allclose(analytics.rolling_mean(values, 2)[:, 0], [10.0, 10.0, 20.0, 25.0])
+
+
+def test_metrics_use_quoted_prices_only():
+    interpolated = np.zeros(VALUES.shape, dtype=bool)
+    interpolated[2, 0] = True  # the 121 in week 3 is an estimate
+    metrics = analytics.compute_metrics(VALUES, interpolated, DATES)
+    assert metrics['wow_change'][2, 0] == 10.0  # follows the plotted line
+    assert metrics['max'][0] == 121.0 and metrics['max_date'][0] == DATES[3]
+    assert metrics['min'][1] == 180.0 and metrics['min_date'][1] == DATES[2]
+    assert metrics['min_date'][2] == DATES[5]
+
+
+def test_dashboard_aggregates_latest_and_movers():
+    metrics = analytics.compute_metrics(VALUES, np.zeros(VALUES.shape, dtype=bool), DATES)
+    agg = analytics.dashboard_aggregates(VALUES, metrics, LABELS, DATES)
+    latest = agg['latest']
+    assert latest['date'] == DATES[-1]
+    assert latest['top'] == {'variety': 'B | BEST', 'price': 198.0}
+    assert latest['count'] == 3 and latest['avg_price'] == 116
+    assert agg['movers'] == {'up': [], 'down': [{'variety': 'A | DLX', 'wow': -10.0}]}
+    assert agg['variety_stats']['A | DLX']['mom'] == -10.0
+    assert agg['downsampled'] == {}
+
+
+def test_long_histories_are_downsampled(monkeypatch):
+    monkeypatch.setattr(analytics, 'DOWNSAMPLE_POINTS', 5)
+    values = np.sin(np.arange(40.0))[:, None] + 10
+    dates = [str(i) for i in range(40)]
+    metrics = analytics.compute_metrics(values, np.zeros(values.shape, dtype=bool), dates)
+    series = analytics.dashboard_aggregates(values, metrics, ['A'], dates)['downsampled']['series']['A']
+    assert len(series['idx']) == 5
+    assert series['idx'][0] == 0 and series['idx'][-1] == 39
+
+
+def test_lttb_keeps_the_ends_and_skips_missing_rows():
+    y = np.array([NAN, 1.0, 5.0, 2.0, 8.0, 3.0, NAN, 4.0])
+    idx = analytics.lttb(y, threshold=4)
+    assert idx[0] == 1 and idx[-1] == 7 and len(idx) == 4
+    assert not np.isnan(y[idx]).any()
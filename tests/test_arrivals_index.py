@@ -0,0 +1,41 @@
+import json
+from datetime import date
+
+import byadgi_trends as bt
+from price_store import PriceStore
+
+CARD = '''NAMMA BYADGI APMC RATES
+AC COLD STORAGE APPROX {ac} BAGS
+Dabbi DLX {dlx}
+Byadgi KDL BEST 24000
+NEW ARRIVALS {new} BAGS
+Dabbi DLX {new_dlx}
+Byadgi KDL DLX 41000
+'''
+
+
+def card(ac, new, dlx, new_dlx):
+    return CARD.format(ac=ac, new=new, dlx=dlx, new_dlx=new_dlx)
+
+
+def test_prices_below_the_new_arrivals_heading_are_tagged():
+    _, prices = bt.parse_text(card(15000, 24000, 28000, 52000))
+    assert prices['Kashmiri (Dabbi) | DLX'] == 28000
+    assert prices['Kashmiri (Dabbi) | DLX | New Crop'] == 52000
+    assert prices['Byadgi (KDL) | DLX | New Crop'] == 41000
+    assert prices['Arrivals | New Crop'] == 24000
+    assert bt.price_section('Byadgi (KDL) | DLX | New Crop') == 'New Crop'
+    assert bt.price_section('Byadgi (KDL) | BEST') == 'AC'
+
+
+def test_new_crop_section_feeds_the_arrivals_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(bt, 'JSON_FORMAT', 'pretty')
+    store = PriceStore()
+    for day, args in ((date(2025, 11, 3), (15000, 24000, 28000, 52000)),
+                      (date(2025, 11, 10), (12000, 30000, 29000, 54000))):
+        store.append(day, bt.parse_text(card(*args))[1])
+    bt.generate_json_data(store, str(tmp_path / 'data.json'))
+    data = json.loads((tmp_path / 'data.json').read_text(encoding='utf-8'))
+    assert None not in data['arrivals_index']['New Crop']
+    assert None not in data['arrivals_index']['market']
+    assert data['arrivals_weighted_avg']['New Crop'] is not None
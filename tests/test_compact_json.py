@@ -0,0 +1,68 @@
+import gzip
+import json
+
+import compact_json as cj
+
+OUTPUT = {
+    'dates': ['29 Sep 2025', '06 Oct 2025', '13 Oct 2025', '20 Oct 2025'],
+    'varieties': ['A | DLX', 'B | BEST'],
+    'prices': {'A | DLX': [31000, None, None, 32500], 'B | BEST': [28000, 28100, 27900, 28000]},
+    'wow_change': {'A | DLX': [None, None, None, 1.25], 'B | BEST': [None, 0.36, -0.71, 0.36]},
+    'rolling_avg': {'4': {'A | DLX': [31000, 31000, 31000, 31750], 'B | BEST': [28000, 28050, 28000, 28000]}},
+    'interpolated': {'A | DLX': [False, True, True, False], 'B | BEST': [False] * 4},
+    'stats': {'count': 2},
+}
+
+
+def decode_series(block):
+    return {v: cj.delta_decode(tokens, block['scale']) for v, tokens in block['data'].items()}
+
+
+def test_delta_round_trip_with_null_runs():
+    values = [31000, None, None, 32500, 32000, None]
+    tokens = cj.delta_encode(values)
+    assert tokens == [31000, [2], 1500, -500, [1]]
+    assert cj.delta_decode(tokens) == values
+
+
+def test_decimals_round_trip_at_scale_100():
+    values = [1.25, None, -0.71]
+    assert cj.delta_decode(cj.delta_encode(values, 100), 100) == values
+
+
+def test_run_lengths_start_with_false():
+    assert cj.run_lengths([True, True, False, True]) == [0, 2, 1, 1]
+    assert cj.run_lengths([False, False]) == [2]
+
+
+def test_encode_keeps_every_series():
+    compact = cj.encode(OUTPUT)
+    assert compact['format'] == cj.FORMAT
+    days = cj.delta_decode(compact['days'])
+    assert [days[i] - days[0] for i in range(4)] == [0, 7, 14, 21]
+    assert decode_series(compact['series']['prices']) == OUTPUT['prices']
+    assert compact['series']['wow_change']['scale'] == 100
+    assert decode_series(compact['series']['wow_change']) == OUTPUT['wow_change']
+    assert decode_series(compact['series']['rolling_avg.4']) == OUTPUT['rolling_avg']['4']
+    assert compact['flags']['interpolated'] == {'A | DLX': [1, 2, 1], 'B | BEST': [4]}
+    assert compact['stats'] == OUTPUT['stats'] and compact['varieties'] == OUTPUT['varieties']
+
+
+def test_write_adds_a_reproducible_gzip_sidecar(tmp_path):
+    path = tmp_path / 'data.c.json'
+    cj.write(cj.encode(OUTPUT), str(path))
+    first = (tmp_path / 'data.c.json.gz').read_bytes()
+    assert json.loads(gzip.decompress(first)) == json.loads(path.read_bytes())
+    cj.write(cj.encode(OUTPUT), str(path))
+    assert (tmp_path / 'data.c.json.gz').read_bytes() == first
+
+
+def test_write_split_shards_by_season(tmp_path):
+    shards = cj.write_split(OUTPUT, str(tmp_path), sidecars=False, latest_weeks=2)
+    assert shards == ['history/2024-25.json', 'history/2025-26.json']
+    old = json.loads((tmp_path / 'history' / '2024-25.json').read_text())
+    assert decode_series(old['series']['prices']) == {'A | DLX': [31000], 'B | BEST': [28000]}
+    assert 'stats' not in old
+    latest = json.loads((tmp_path / 'latest.json').read_text())
+    assert decode_series(latest['series']['prices']) == {'A | DLX': [None, 32500], 'B | BEST': [27900, 28000]}
+    assert latest['shards'] == shards and latest['stats'] == OUTPUT['stats']
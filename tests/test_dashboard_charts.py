@@ -0,0 +1,82 @@
+import json
+import shutil
+import subprocess
+from datetime import date, timedelta
+
+import pytest
+
+import byadgi_trends as bt
+from price_store import PriceStore
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason='needs node to run the page script')
+
+# Minimal DOM and Chart.js stand-ins; every Chart records how often it was built and updated
+HARNESS = '''
+const fs = require('fs');
+const els = {};
+function el(id) {
+    if (!els[id]) els[id] = {id, value: '', innerHTML: '', textContent: '', children: [],
+                             appendChild(c) { this.children.push(c); }, getContext() { return {}; }};
+    return els[id];
+}
+global.document = {getElementById: el, createElement: () => ({appendChild() {}}), body: {}};
+global.location = {search: ''};
+global.fetch = async (url) => ({ok: true, json: async () => JSON.parse(fs.readFileSync(DIR + '/' + url))});
+const stats = {created: 0, updates: 0};
+global.Chart = class {
+    constructor(ctx, cfg) { stats.created++; this.config = {type: cfg.type}; this.data = cfg.data;
+                            this.options = cfg.options; }
+    update(mode) { stats.updates++; this.updateMode = mode; }
+    destroy() { stats.destroyed = (stats.destroyed || 0) + 1; }
+};
+'''
+
+CHECKS = '''
+setTimeout(() => {
+    const out = {afterLoad: {...stats}};
+    const all = trendChart.data.datasets;
+    el('varietySelect').value = globalData.varieties[1];
+    el('chartTypeSelect').value = 'bar';
+    updateChart();
+    out.afterSwitch = {...stats};
+    out.type = trendChart.config.type;
+    out.offset = trendChart.options.scales.x.offset;
+    out.updateMode = trendChart.updateMode;
+    out.reusedDataset = trendChart.data.datasets[0] === all[1];
+    out.sameColour = trendChart.data.datasets[0].borderColor === all[1].borderColor;
+    console.log(JSON.stringify(out));
+}, 100);
+'''
+
+
+def run_page(tmp_path):
+    store = PriceStore()
+    for week in range(6):
+        store.append(date(2025, 11, 3) + timedelta(weeks=week), {'A | DLX': 31000 + 100 * week,
+                                                                  'B | BEST': 28000 - 50 * week})
+    bt.generate_json_data(store, str(tmp_path / 'data.json'))
+    bt.generate_html(str(tmp_path / 'index.html'))
+    html = (tmp_path / 'index.html').read_text(encoding='utf-8')
+    start = html.index('<script>', html.index('chart.umd')) + len('<script>')
+    script = html[start:html.rindex('</script>')]
+    page = tmp_path / 'page.js'
+    page.write_text(f'const DIR = {json.dumps(str(tmp_path))};\n' + HARNESS + script + CHECKS, encoding='utf-8')
+    result = subprocess.run(['node', str(page)], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_switching_variety_updates_the_live_chart(tmp_path):
+    out = run_page(tmp_path)
+    assert out['afterLoad']['created'] == 2  # trend and latest-price charts
+    assert out['afterSwitch']['created'] == 2
+    assert 'destroyed' not in out['afterSwitch']
+    assert out['afterSwitch']['updates'] == out['afterLoad']['updates'] + 1
+    assert out['updateMode'] == 'none'
+    assert (out['type'], out['offset']) == ('bar', True)
+
+
+def test_datasets_are_cached_and_keep_their_colour(tmp_path):
+    out = run_page(tmp_path)
+    assert out['reusedDataset']
+    assert out['sameColour']
@@ -0,0 +1,86 @@
+import random
+from datetime import date
+
+import numpy as np
+import pytest
+
+import byadgi_trends as bt
+from benchmarks.ratecards import random_card, render_card
+from dedup import BKTree, Deduplicator
+from ingest_manifest import IngestManifest
+from ocr_cache import OcrCache
+
+NOV_6, NOV_10 = date(2025, 11, 6), date(2025, 11, 10)
+PRICES = {'Kashmiri (Dabbi) | DLX': 31000}
+
+
+@pytest.fixture
+def cards(tmp_path):
+    """save(name, day, copy_of=None): write a rendered card, or a JPEG re-encode of an earlier one"""
+    folder = tmp_path / 'cards'
+    folder.mkdir()
+    images = {}
+
+    def save(name, day=NOV_6, copy_of=None):
+        img = images[copy_of] if copy_of else render_card(random_card(random.Random(day.toordinal()), day))
+        images[name] = img
+        img.save(folder / name, 'JPEG', quality=60 if copy_of else 90)
+        return str(folder / name)
+    save.folder = str(folder)
+    return save
+
+
+def test_bk_tree_finds_hashes_within_the_radius():
+    tree = BKTree()
+    for key in (0b0000, 0b0001, 0b0111, 0b1111):
+        tree.add(key, key)
+    assert [v for _, v in tree.search(0b0000, 1)] == [0b0000, 0b0001]
+    assert len(tree) == 4
+
+
+def test_reencoded_copy_matches_but_another_day_does_not(cards):
+    dedup = Deduplicator()
+    original = cards('a.jpg')
+    assert dedup.match(original) is None
+    assert dedup.match(cards('b.jpg', copy_of='a.jpg')) == original
+    assert dedup.match(cards('c.jpg', day=NOV_10)) is None
+
+
+def test_thumbnails_are_capped_and_reread(cards):
+    dedup = Deduplicator(max_thumbs=1)
+    original = cards('a.jpg')
+    dedup.match(original)
+    for i, day in enumerate((NOV_10, date(2025, 11, 13))):
+        dedup.match(cards(f'other{i}.jpg', day=day))
+    assert len(dedup._thumbs) == 1
+    assert dedup.match(cards('copy.jpg', copy_of='a.jpg')) == original
+
+
+def ingest(folder, manifest_path=None, cache=None):
+    manifest = IngestManifest(str(manifest_path), folder, 'fp') if manifest_path else None
+    return bt.process_folder(folder, workers=1, cache=cache, manifest=manifest).to_records()
+
+
+def test_copy_in_a_later_run_reuses_the_manifest_result(tmp_path, cards, fake_ocr, monkeypatch):
+    monkeypatch.setattr(bt, 'DEDUP_IMAGES', True)
+    cards('a.jpg')
+    fake_ocr.results['a.jpg'] = (NOV_6, PRICES)
+    ingest(cards.folder, tmp_path / 'm.json')
+    cards('0 forwarded.jpg', copy_of='a.jpg')  # walks before its original
+    records = ingest(cards.folder, tmp_path / 'm.json')
+    assert fake_ocr.calls == ['a.jpg']
+    assert records == {NOV_6: PRICES}
+    # the copy is remembered too, so a third run has nothing new
+    manifest = IngestManifest(str(tmp_path / 'm.json'), cards.folder, 'fp')
+    assert manifest.result(cards.folder + '/0 forwarded.jpg') == (NOV_6, PRICES)
+
+
+def test_copy_of_a_cache_hit_is_not_ocrd(tmp_path, cards, fake_ocr, monkeypatch):
+    monkeypatch.setattr(bt, 'DEDUP_IMAGES', True)
+    cache = OcrCache(str(tmp_path / 'cache'), 'ocr', 'parser')
+    cards('a.jpg')
+    fake_ocr.results['a.jpg'] = (NOV_6, PRICES)
+    ingest(cards.folder, cache=cache)
+    cards('b.jpg', copy_of='a.jpg')
+    assert ingest(cards.folder, cache=cache) == {NOV_6: PRICES}
+    assert fake_ocr.calls == ['a.jpg']
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from gapfill import GapPolicy, fill_frame, fill_gaps, snap_to_grid
+
+NAN = np.nan
+
+
+def test_short_gaps_are_interpolated_long_ones_left_empty():
+    values = np.array([[10.0, 10.0], [NAN, NAN], [NAN, NAN], [40.0, NAN], [NAN, NAN], [NAN, 60.0]])
+    filled, mask = fill_gaps(values, max_gap=2, extrapolate=0)
+    np.testing.assert_allclose(filled[:, 0], [10, 20, 30, 40, NAN, NAN])
+    assert np.isnan(filled[1:5, 1]).all()  # a 4-week gap is too long
+    np.testing.assert_array_equal(mask[:, 0], [False, True, True, False, False, False])
+
+
+def test_extrapolation_only_as_far_as_the_policy_allows():
+    values = np.array([[NAN], [NAN], [5.0], [NAN], [NAN]])
+    filled, mask = fill_gaps(values, max_gap=4, extrapolate=1)
+    np.testing.assert_array_equal(filled[:, 0], [NAN, 5, 5, 5, NAN])
+    np.testing.assert_array_equal(mask[:, 0], [False, True, False, True, False])
+
+
+def test_thursday_cards_snap_to_their_week_and_the_later_quote_wins():
+    frame = pd.DataFrame({'A': [100.0, 110.0, 120.0]},
+                         index=pd.to_datetime(['2025-11-03', '2025-11-06', '2025-11-17']))
+    snapped = snap_to_grid(frame)
+    assert list(snapped.index) == list(pd.to_datetime(['2025-11-03', '2025-11-10', '2025-11-17']))
+    np.testing.assert_array_equal(snapped['A'], [110.0, NAN, 120.0])
+
+
+def test_per_variety_policy_overrides_the_default():
+    frame = pd.DataFrame({'Dabbi | FATKI': [1.0, NAN, NAN, 4.0], 'Dabbi | DLX': [1.0, NAN, NAN, 4.0]},
+                         index=pd.date_range('2025-11-03', periods=4, freq='W-MON'))
+    filled, mask = fill_frame(frame, policies={r'FATKI': GapPolicy(max_gap=1, extrapolate=0)})
+    assert filled['Dabbi | FATKI'].isna().sum() == 2
+    assert filled['Dabbi | DLX'].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert mask['Dabbi | DLX'].sum() == 2
@@ -0,0 +1,87 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from generate_data import generate_json, infer_dates, load_and_parse_tsv, split_variety
+
+SEASON = ['06-Nov', '01-Dec', '29-Dec', '01-Jan', '13-Jan', '02-Feb']
+EXPECTED = pd.to_datetime(['2025-11-06', '2025-12-01', '2025-12-29', '2026-01-01', '2026-01-13', '2026-02-02'])
+
+
+def test_year_rolls_over_from_season():
+    assert infer_dates(SEASON, year=2025).equals(EXPECTED)
+
+
+def test_year_rolls_over_from_pinned_today():
+    assert infer_dates(SEASON, today=date(2026, 3, 1)).equals(EXPECTED)
+    # the last header is anchored so that it is not in the future
+    assert infer_dates(SEASON, today=date(2026, 2, 1)).equals(EXPECTED - pd.DateOffset(years=1))
+
+
+def test_season_wins_over_today():
+    assert infer_dates(SEASON, year=2025, today=date(2030, 1, 1)).equals(EXPECTED)
+
+
+def test_explicit_year_anchors_the_run():
+    labels = ['06-Nov', '01-Dec', '01-Jan-2026', '02-Feb']
+    assert infer_dates(labels, year=2019).equals(EXPECTED[[0, 1, 3, 5]])
+
+
+def test_no_anchor_raises():
+    with pytest.raises(ValueError):
+        infer_dates(SEASON)
+
+
+def test_season_from_title(tmp_path):
+    sheet = tmp_path / 'Prices.tsv'
+    sheet.write_text('\n'.join([
+        'A/C COLD STORAGE 2025-26\t\t',
+        'Variety\t29-Dec\t01-Jan',
+        'Dabbi DLX (AC)\t31,000\t32,000',
+        'NEW CROP / MOISTURE ARRIVALS\t\t',
+        'Variety\t13-Nov\t05-Jan',
+        'Dabbi DLX\t53,000\t54,000',
+    ]), encoding='utf-8')
+    prices, _ = load_and_parse_tsv(sheet)
+    assert list(prices['date']) == list(pd.to_datetime(['2025-12-29', '2026-01-01', '2025-11-13', '2026-01-05']))
+
+
+def test_ragged_rows(tmp_path):
+    sheet = tmp_path / 'Prices.csv'
+    sheet.write_text('\n'.join([
+        'A/C COLD STORAGE 2025-26',
+        'Variety,29-Dec',
+        'Dabbi DLX (AC),"31,000"',
+        'Variety,01-Jan,05-Jan',
+        'Dabbi DLX (AC),"32,000",--,"33,000"',
+    ]), encoding='utf-8')
+    prices, _ = load_and_parse_tsv(sheet)
+    assert list(prices['value']) == [31000, 32000]
+
+
+def test_split_variety_ranges():
+    cells = pd.Series(['Dabbi DLX (AC),180-200 ASTA,8K-10K SHU',
+                       'Dabbi FATKI,70 to 100 ASTA,8K to 10K SHU',
+                       'Guntur S-17 BEST (AC), 90-110, ASTA 65K-75K SHU',
+                       '102 BEST'])
+    name, asta, shu = split_variety(cells)
+    assert list(name) == ['Dabbi DLX', 'Dabbi FATKI', 'Guntur S-17 BEST', '102 BEST']
+    assert list(asta[:3]) == ['180-200', '70-100', '90-110'] and pd.isna(asta[3])
+    assert list(shu[:3]) == ['8k-10k', '8k-10k', '65k-75k'] and pd.isna(shu[3])
+
+
+def test_undated_sheet_raises_and_writes_nothing(tmp_path):
+    sheet = tmp_path / 'Prices.tsv'
+    sheet.write_text('A/C COLD STORAGE\t\nVariety\t29-Dec\nDabbi DLX (AC)\t31,000', encoding='utf-8')
+    output = tmp_path / 'data.json'
+    with pytest.raises(ValueError):
+        generate_json(output, sheet)
+    assert not output.exists()
+
+
+def test_sheet_without_prices_raises(tmp_path):
+    sheet = tmp_path / 'Prices.tsv'
+    sheet.write_text('Some other sheet\t1\t2', encoding='utf-8')
+    with pytest.raises(ValueError):
+        generate_json(tmp_path / 'data.json', sheet, season=2025)
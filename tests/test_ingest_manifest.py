@@ -0,0 +1,74 @@
+from datetime import date
+
+import byadgi_trends as bt
+from ingest_manifest import IngestManifest
+
+NOV_6, NOV_13 = date(2025, 11, 6), date(2025, 11, 13)
+
+
+def ingest(folder, manifest_path):
+    manifest = IngestManifest(str(manifest_path), str(folder), 'fp')
+    return bt.process_folder(str(folder), workers=1, manifest=manifest).to_records(), manifest
+
+
+def test_unchanged_images_are_not_parsed_again(tmp_path, fake_ocr):
+    (tmp_path / 'a.png').write_bytes(b'card a')
+    fake_ocr.results['a.png'] = (NOV_6, {'A | DLX': 31000})
+    first, _ = ingest(tmp_path, tmp_path / 'm.json')
+    again, manifest = ingest(tmp_path, tmp_path / 'm.json')
+    assert again == first == {NOV_6: {'A | DLX': 31000}}
+    assert fake_ocr.calls == ['a.png']
+    assert manifest.unchanged == 1
+
+
+def test_added_and_modified_images_are_parsed(tmp_path, fake_ocr):
+    (tmp_path / 'a.png').write_bytes(b'card a')
+    fake_ocr.results['a.png'] = (NOV_6, {'A | DLX': 31000})
+    ingest(tmp_path, tmp_path / 'm.json')
+    (tmp_path / 'a.png').write_bytes(b'card a, corrected')
+    (tmp_path / 'b.png').write_bytes(b'card b')
+    fake_ocr.results['a.png'] = (NOV_6, {'A | DLX': 32000})
+    fake_ocr.results['b.png'] = (NOV_13, {'A | DLX': 33000})
+    records, manifest = ingest(tmp_path, tmp_path / 'm.json')
+    assert records == {NOV_6: {'A | DLX': 32000}, NOV_13: {'A | DLX': 33000}}
+    assert (manifest.added, manifest.modified) == (1, 1)
+
+
+def test_deleted_image_drops_out(tmp_path, fake_ocr):
+    for name, day in (('a.png', NOV_6), ('b.png', NOV_13)):
+        (tmp_path / name).write_bytes(name.encode())
+        fake_ocr.results[name] = (day, {'A | DLX': 31000})
+    ingest(tmp_path, tmp_path / 'm.json')
+    (tmp_path / 'b.png').unlink()
+    records, manifest = ingest(tmp_path, tmp_path / 'm.json')
+    assert records == {NOV_6: {'A | DLX': 31000}}
+    assert manifest.deleted == 1
+
+
+def test_deleting_every_image_empties_the_saved_manifest(tmp_path, fake_ocr):
+    cards = tmp_path / 'cards'
+    cards.mkdir()
+    (cards / 'a.png').write_bytes(b'card a')
+    fake_ocr.results['a.png'] = (NOV_6, {'A | DLX': 31000})
+    ingest(cards, tmp_path / 'm.json')
+    (cards / 'a.png').unlink()
+    records, manifest = ingest(cards, tmp_path / 'm.json')
+    assert records == {}
+    assert manifest.deleted == 1
+    assert IngestManifest(str(tmp_path / 'm.json'), str(cards), 'fp').files == {}
+
+
+def test_failed_ocr_is_retried_next_run(tmp_path, fake_ocr):
+    (tmp_path / 'a.png').write_bytes(b'card a')
+    ingest(tmp_path, tmp_path / 'm.json')
+    fake_ocr.results['a.png'] = (NOV_6, {'A | DLX': 31000})
+    records, _ = ingest(tmp_path, tmp_path / 'm.json')
+    assert records == {NOV_6: {'A | DLX': 31000}}
+    assert fake_ocr.calls == ['a.png', 'a.png']
+
+
+def test_fingerprint_change_rebuilds(tmp_path, fake_ocr):
+    (tmp_path / 'a.png').write_bytes(b'card a')
+    fake_ocr.results['a.png'] = (NOV_6, {'A | DLX': 31000})
+    ingest(tmp_path, tmp_path / 'm.json')
+    assert IngestManifest(str(tmp_path / 'm.json'), str(tmp_path), 'other').files == {}
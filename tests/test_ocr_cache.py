@@ -0,0 +1,57 @@
+from datetime import date
+
+import byadgi_trends as bt
+from ocr_cache import OcrCache, file_digest
+
+
+def test_round_trip(tmp_path):
+    cache = OcrCache(tmp_path, 'ocr-1', 'parser-1')
+    cache.put('abc', 'Dabbi DLX 31000', date(2025, 11, 6), {'Kashmiri (Dabbi) | DLX': 31000})
+    entry = cache.get('abc')
+    assert cache.ocr_output(entry) == 'Dabbi DLX 31000'
+    assert cache.parsed(entry) == (date(2025, 11, 6), {'Kashmiri (Dabbi) | DLX': 31000})
+    assert cache.get('other') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_word_boxes_round_trip(tmp_path):
+    cache = OcrCache(tmp_path, 'ocr-1', 'parser-1')
+    words = [['31000', 400, 10, 60, 20, 91.0, 2]]
+    cache.put('abc', words, None, {})
+    assert cache.ocr_output(cache.get('abc')) == words
+
+
+def test_ocr_settings_change_misses(tmp_path):
+    OcrCache(tmp_path, 'ocr-1', 'parser-1').put('abc', 'text', None, {})
+    assert OcrCache(tmp_path, 'ocr-2', 'parser-1').get('abc') is None
+
+
+def test_parser_change_keeps_ocr_but_not_parse(tmp_path):
+    OcrCache(tmp_path, 'ocr-1', 'parser-1').put('abc', 'text', None, {'x': 1})
+    cache = OcrCache(tmp_path, 'ocr-1', 'parser-2')
+    entry = cache.get('abc')
+    assert cache.ocr_output(entry) == 'text'
+    assert cache.parsed(entry) is None
+
+
+def test_prune_evicts_down_to_budget(tmp_path):
+    cache = OcrCache(tmp_path, 'ocr-1', 'parser-1', max_bytes=0)
+    for i in range(3):
+        cache.put(str(i), 'x' * 100, None, {})
+    assert cache.prune() == 3
+    assert cache.get('0') is None
+
+
+def test_file_digest_follows_content(tmp_path):
+    a, b = tmp_path / 'a.png', tmp_path / 'b.png'
+    a.write_bytes(b'card')
+    b.write_bytes(b'card')
+    assert file_digest(a) == file_digest(b)
+    b.write_bytes(b'other card')
+    assert file_digest(a) != file_digest(b)
+
+
+def test_parser_fingerprint_covers_grade_pattern(monkeypatch):
+    before = bt.parser_fingerprint()
+    monkeypatch.setattr(bt, 'GRADE_PATTERN', bt.GRADE_PATTERN.replace('fatki', 'phatki'))
+    assert bt.parser_fingerprint() != before
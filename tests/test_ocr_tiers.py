@@ -0,0 +1,29 @@
+from PIL import Image
+
+import byadgi_trends as bt
+
+TIERS = [('fast', False, 'fast'), ('full', True, 'full'), ('psm4', True, 'psm4')]
+
+
+def run_tiers(tmp_path, monkeypatch, passes):
+    """ocr_image over fake passes: {config: (items, confidence)}"""
+    path = tmp_path / 'card.png'
+    Image.new('L', (8, 8), 255).save(path)
+    monkeypatch.setattr(bt, 'OCR_TIERS', TIERS)
+    monkeypatch.setattr(bt, 'ocr_engine', lambda: None)
+    monkeypatch.setattr(bt, 'ocr_pass', lambda img, p, upscale, config, engine: config)
+    monkeypatch.setattr(bt, 'parse_ocr',
+                        lambda ocr, p: (None, {f'{ocr} {i}': 100 for i in range(passes[ocr][0])}))
+    monkeypatch.setattr(bt, 'price_confidence', lambda ocr: passes[ocr][1])
+    return bt.ocr_image(str(path))
+
+
+def test_first_pass_meeting_the_thresholds_wins(tmp_path, monkeypatch):
+    ocr, _, prices, tier = run_tiers(tmp_path, monkeypatch, {'fast': (6, 50), 'full': (5, 90), 'psm4': (9, 95)})
+    assert (ocr, tier, len(prices)) == ('full', 'full', 5)
+
+
+def test_best_pass_is_kept_when_none_qualifies(tmp_path, monkeypatch):
+    ocr, _, prices, tier = run_tiers(tmp_path, monkeypatch, {'fast': (3, 60), 'full': (3, 70), 'psm4': (1, 20)})
+    assert (ocr, len(prices)) == ('full', 3)
+    assert tier == 'psm4'  # the tier distribution counts the last tier that ran
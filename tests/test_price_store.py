@@ -0,0 +1,62 @@
+from datetime import date
+
+import numpy as np
+
+import byadgi_trends as bt
+from price_store import PriceStore
+
+NOV_6, NOV_13 = date(2025, 11, 6), date(2025, 11, 13)
+
+
+def test_save_and_reopen_round_trip(tmp_path):
+    store = PriceStore()
+    store.append(NOV_6, {'A | DLX': 31000, 'B | BEST': 28000})
+    store.append(NOV_13, {'A | DLX': 32000})
+    store.save(tmp_path / 'store')
+    reopened = PriceStore(tmp_path / 'store')
+    assert reopened.to_records() == store.to_records()
+    assert reopened.labels == ['A | DLX', 'B | BEST']
+
+
+def test_flush_appends_to_the_files(tmp_path):
+    store = PriceStore(tmp_path / 'store')
+    store.append(NOV_6, {'A | DLX': 31000})
+    store.flush()
+    store.append(NOV_13, {'A | DLX': 32000})
+    store.flush()
+    assert PriceStore(tmp_path / 'store').to_records() == {NOV_6: {'A | DLX': 31000},
+                                                         NOV_13: {'A | DLX': 32000}}
+
+
+def test_matrix_pivots_with_latest_observation_winning():
+    store = PriceStore()
+    store.append(NOV_13, {'B | BEST': 27000})
+    for price in (31000, 30000, 29500):
+        store.append(NOV_6, {'A | DLX': price})
+    dates, labels, values = store.matrix()
+    assert dates.tolist() == [NOV_6, NOV_13]
+    assert labels == ['B | BEST', 'A | DLX']  # code order: first seen first
+    np.testing.assert_array_equal(values, [[np.nan, 29500], [27000, np.nan]])
+
+
+def test_matrix_slices_by_date_and_label():
+    store = PriceStore()
+    store.append(NOV_6, {'A | DLX': 31000, 'B | BEST': 28000})
+    store.append(NOV_13, {'A | DLX': 32000})
+    dates, labels, values = store.matrix(start=NOV_13, labels=['A | DLX'])
+    assert dates.tolist() == [NOV_13]
+    assert labels == ['A | DLX']
+    assert values.tolist() == [[32000]]
+
+
+def test_run_ocr_replaces_the_store_when_the_archive_is_emptied(tmp_path, monkeypatch):
+    old = PriceStore()
+    old.append(NOV_6, {'A | DLX': 31000})
+    old.save(tmp_path / 'store')
+    (tmp_path / 'cards').mkdir()
+    monkeypatch.setattr(bt, 'INPUT_FOLDER', str(tmp_path / 'cards'))
+    monkeypatch.setattr(bt, 'PRICE_STORE', str(tmp_path / 'store'))
+    monkeypatch.setattr(bt, 'OCR_CACHE_DIR', None)
+    monkeypatch.setattr(bt, 'INGEST_MANIFEST', None)
+    assert bt.run_ocr() is None
+    assert len(PriceStore(tmp_path / 'store')) == 0
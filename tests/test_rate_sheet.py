@@ -0,0 +1,49 @@
+import generate_data
+from rate_sheet import classify_rows, parse_sheet, read_rows
+
+ROWS = [
+    ['A/C COLD STORAGE - Dry Chili Prices TRENDS', '', ''],
+    ['AC Bags Arrival 👉', '40,000', '80,000'],
+    ['Variety (Approx ASTA & SHU) 👇', '06-Nov', '13-Nov'],
+    ['Dabbi DLX (AC),180-200 ASTA,8K-10K SHU', '34,500', '—'],
+    ['c', '', ''],
+    ['NEW CROP / MOISTURE ARRIVALS', '', ''],
+    ['New Lot Bags Arrival 👉', '', '1,000'],
+    ['Variety 👇', '06-Nov', '13-Nov'],
+    ['Dabbi DLX,240-260 ASTA,8K-10K SHU', '--', '55,500'],
+    ['🌶️Namma Byagdi, APMC Yard, Byadgi', '', ''],
+]
+
+
+def test_sections():
+    sheet = parse_sheet(ROWS)
+    assert sheet['ac']['dates'] == ['06-Nov', '13-Nov']
+    assert sheet['ac']['arrivals'] == [40000, 80000]
+    assert [(r['variety'], r['prices']) for r in sheet['ac']['rows']] == [
+        ('Dabbi DLX (AC),180-200 ASTA,8K-10K SHU', [34500, None])]
+    assert sheet['moisture']['arrivals'] == [None, 1000]
+    assert [r['prices'] for r in sheet['moisture']['rows']] == [[None, 55500]]
+
+
+def test_missing_header_gives_empty_section():
+    rows = [r for r in ROWS if not r[0].startswith('Variety (Approx')]
+    sheet = parse_sheet(rows)
+    assert sheet['ac']['header'] == [] and sheet['ac']['rows'] == []
+    assert len(sheet['moisture']['rows']) == 1
+
+
+def test_footer_ends_section():
+    roles = classify_rows([r[0] for r in ROWS])
+    assert roles[4] == (None, None) and roles[-1] == (None, None)
+    assert roles[8] == ('moisture', 'variety')
+
+
+def test_generate_data_reads_the_same_sheet(tmp_path):
+    path = tmp_path / 'Prices.tsv'
+    path.write_text('\n'.join('\t'.join(r) for r in ROWS), encoding='utf-8')
+    assert read_rows(path, '\t') == ROWS
+    prices, arrivals = generate_data.load_and_parse_tsv(path, season=2025)
+    sheet = parse_sheet(ROWS)
+    assert list(prices['value']) == [p for sec in ('ac', 'moisture')
+                                     for r in sheet[sec]['rows'] for p in r['prices'] if p is not None]
+    assert list(arrivals['value']) == [40000, 80000, 1000]